@@ -2,19 +2,20 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from main_page.normalize import ensure_normalized
+from main_page.aggregates import category_counts, experience_distribution, quick_analytics, salary_by_category, set_dataset
 
 # --- 1. ПРОВЕРКА ДАННЫХ ---
 if 'vacancies_df' not in st.session_state or st.session_state['vacancies_df'] is None:
     st.warning("⚠️ Данные не найдены. Сначала запустите парсер на главной странице.")
     st.stop()
 
-# Загружаем реальные данные из сессии
-df = st.session_state['vacancies_df']
+# Зарплаты в рублях и коды опыта (нужны salary_by_category и experience_distribution)
+df = set_dataset(ensure_normalized(st.session_state['vacancies_df']))
 
 # --- 2. ПОДГОТОВКА СТАТИСТИКИ ---
-# Считаем количество вакансий по категориям
-df_stats = df['category'].value_counts().reset_index()
-df_stats.columns = ['Category', 'Count']
+# Количество вакансий по категориям (из общего кэша агрегатов)
+df_stats = category_counts(df)
 
 st.title("📊 Аналитика IT вакансий")
 st.markdown(f"**Всего проанализировано:** {len(df)} вакансий")
@@ -44,6 +45,25 @@ with col2:
         use_container_width=True
     )
 
+# --- 3.1 ТЕХНОЛОГИИ И РАБОТОДАТЕЛИ (общий движок аналитики с Flask) ---
+quick = quick_analytics(df)
+col_tech, col_comp = st.columns([2, 1])
+
+with col_tech:
+    st.subheader("Упоминания технологий")
+    if quick['by_technology']:
+        df_tech = pd.DataFrame(quick['by_technology'].items(), columns=['Технология', 'Вакансий'])
+        fig_tech = px.bar(df_tech.sort_values('Вакансий', ascending=False), x='Технология', y='Вакансий', text='Вакансий')
+        st.plotly_chart(fig_tech, use_container_width=True)
+
+with col_comp:
+    st.subheader("Топ работодателей")
+    st.dataframe(
+        pd.DataFrame(quick['top_companies'], columns=['Компания', 'Вакансий']),
+        hide_index=True,
+        use_container_width=True
+    )
+
 # --- 4. ИНСАЙТЫ ДЛЯ НОВИЧКА ---
 st.divider()
 st.subheader("💡 Анализ рынка для входа")
@@ -54,23 +74,17 @@ st.info(f"Наибольшее количество предложений со
 # --- 5. ЗАРПЛАТНЫЕ ВИЛКИ (РЕАЛЬНЫЕ ДАННЫЕ) ---
 st.title("💰 Зарплатные вилки в IT (тыс. руб.)")
 
-# Фильтруем только те вакансии, где указана зарплата
-df_salary = df.dropna(subset=['salary_from'])
+# МИН «от» и МАКС «до» по категориям (в рублях) — из общего кэша агрегатов
+salary_analys = salary_by_category(df)
 
-if not df_salary.empty:
-    # Группируем по категориям и считаем средний МИН и МАКС
-    # Делим на 1000 для формата "к"
-    salary_analys = df_salary.groupby('category').agg({
-        'salary_from': 'min',
-        'salary_to': 'max'
-    }).reset_index()
-    
+if not salary_analys.empty:
+    salary_analys = salary_analys[['category', 'from_min', 'to_max']].copy()
     # Если salary_to не указан, берем salary_from + 20% для вилки
-    salary_analys['salary_to'] = salary_analys['salary_to'].fillna(salary_analys['salary_from'] * 1.2)
+    salary_analys['to_max'] = salary_analys['to_max'].fillna(salary_analys['from_min'] * 1.2)
     
     # Переводим в тысячи
-    salary_analys['Min'] = (salary_analys['salary_from'] / 1000).round(0)
-    salary_analys['Max'] = (salary_analys['salary_to'] / 1000).round(0)
+    salary_analys['Min'] = (salary_analys['from_min'] / 1000).round(0)
+    salary_analys['Max'] = (salary_analys['to_max'] / 1000).round(0)
     salary_analys = salary_analys.sort_values('Max')
 
     fig_sal = go.Figure()
@@ -98,7 +112,7 @@ else:
 st.title("📈 Анализ сложности входа по направлениям")
 
 # Группируем реальный опыт
-df_exp = df.groupby(['category', 'experience']).size().reset_index(name='Количество')
+df_exp = experience_distribution(df)
 df_exp.columns = ['Направление', 'Опыт', 'Количество']
 
 # Определяем порядок опыта для графика
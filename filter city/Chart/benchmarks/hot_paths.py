@@ -0,0 +1,217 @@
+"""
+Бенчмарк горячих путей NLP и аналитики на «тест 1000 вакансий Москва.xlsx»
+и его синтетических увеличениях (копии с уникальными описаниями).
+
+    cd "filter city/Chart"
+    python benchmarks/hot_paths.py                     # замер + сравнение с базой
+    python benchmarks/hot_paths.py --save-baseline     # замер становится новой базой
+    python benchmarks/hot_paths.py --only lemmatize_tagged classify_vacancy --scale 1 10
+
+Поштучные сценарии (лемматизация, навыки, классификация, found_data_processing)
+идут на исходном файле — их время линейно по числу вакансий; на увеличенных
+датасетах — пакетные (compute_analytics, экспорт xlsx/csv).
+
+Для каждого сценария: пропускная способность (элементов/с), перцентили
+задержки одного вызова (p50/p95/p99, мс) и пиковая память (tracemalloc,
+отдельным прогоном на выборке — он замедляет код). Результат пишется в
+benchmarks/hot_paths_last.json и сравнивается с benchmarks/hot_paths_baseline.json:
+падение скорости или рост памяти больше порога (--threshold, по умолчанию 20%)
+помечается как регрессия, код выхода — 1.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+CHART_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(CHART_DIR)
+sys.path.append(os.path.join(CHART_DIR, 'setting_parse', 'word processing'))
+
+from main_page.analytics_engine import compute_analytics  # noqa: E402
+from main_page.export_stream import export_bytes  # noqa: E402
+from main_page.nlp import (  # noqa: E402
+    classify_vacancy, clean_and_lemmatize, extract_skills, extract_skills_raw, lemmatizer,
+)
+
+DEFAULT_FILE = os.path.join(CHART_DIR, '..', '..', 'тест 1000 вакансий Москва.xlsx')
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+LAST_PATH = os.path.join(BENCH_DIR, 'hot_paths_last.json')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'hot_paths_baseline.json')
+# Лемматизация с теггером — самая медленная, по умолчанию берём часть описаний
+NLP_LIMIT = 200
+# Сколько раз повторять «пакетные» сценарии (аналитика, экспорт)
+BULK_REPEATS = 5
+# Сколько вызовов прогонять под tracemalloc
+MEMORY_SAMPLE = 200
+REGRESSION_THRESHOLD = 0.2
+
+
+def scale_up(df, factor):
+    """factor копий датасета; к описаниям дописывается номер копии, чтобы тексты не совпадали."""
+    if factor == 1:
+        return df
+    copies = []
+    for k in range(factor):
+        copy = df.copy()
+        copy['description'] = copy['description'].astype(str) + f" #{k}"
+        copy['url'] = copy['url'].astype(str) + f"?copy={k}"
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def _run(call, items):
+    latencies = []
+    start = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        call(item)
+        latencies.append(time.perf_counter() - t0)
+    return time.perf_counter() - start, latencies
+
+
+def measure(call, items, count, reset=None):
+    """Прогон на время (с перцентилями) + отдельный прогон под tracemalloc для пика памяти."""
+    if reset:
+        reset()
+    gc.collect()
+    total, latencies = _run(call, items)
+
+    if reset:
+        reset()
+    gc.collect()
+    tracemalloc.start()
+    _run(call, items[:MEMORY_SAMPLE])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms = np.array(latencies) * 1000
+    return {
+        "items": count,
+        "seconds": round(total, 4),
+        "throughput": round(count / total, 1) if total else None,
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "peak_mb": round(peak / 1024 ** 2, 2),
+    }
+
+
+def found_data_processing_case():
+    """found_data_processing печатает разбор — вывод глушим, сама печать входит в замер."""
+    from word_processing import found_data_processing
+
+    def call(lemmas):
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            found_data_processing(lemmas)
+    return call
+
+
+def build_cases(df, scales, nlp_limit):
+    """{имя: (функция одного вызова, элементы, число обработанных вакансий, сброс кэшей)}"""
+    descriptions = df['description'].fillna('').astype(str).tolist()
+    lemmas = df['lemmatized_content'].fillna('').astype(str).tolist()
+    pairs = list(zip(df['name'].astype(str), lemmas))
+    cases = {
+        "lemmatize_tagged": (lambda t: clean_and_lemmatize(t, 'tagged'), descriptions[:nlp_limit], min(nlp_limit, len(df)), lemmatizer.clear),
+        "lemmatize_dictionary": (lambda t: clean_and_lemmatize(t, 'dictionary'), descriptions[:nlp_limit], min(nlp_limit, len(df)), lemmatizer.clear),
+        "extract_skills": (extract_skills, lemmas, len(df), None),
+        "extract_skills_raw": (extract_skills_raw, descriptions, len(df), None),
+        # classify_vacancy лемматизирует название — кэш лемм сбрасываем между прогонами
+        "classify_vacancy": (lambda p: classify_vacancy(*p), pairs, len(df), lemmatizer.clear),
+        "found_data_processing": (found_data_processing_case(), [l.split() for l in lemmas], len(df), None),
+    }
+    for factor in scales:
+        data = scale_up(df, factor)
+        suffix = f"_x{factor}"
+        cases.update({
+            "compute_analytics" + suffix: (compute_analytics, [data] * BULK_REPEATS, len(data) * BULK_REPEATS, None),
+            "export_xlsx" + suffix: (lambda d: export_bytes(d, fmt="xlsx"), [data] * BULK_REPEATS, len(data) * BULK_REPEATS, None),
+            "export_csv" + suffix: (lambda d: export_bytes(d, fmt="csv"), [data] * BULK_REPEATS, len(data) * BULK_REPEATS, None),
+        })
+    return cases
+
+
+def compare(results, baseline, threshold):
+    """Список регрессий: скорость ниже базы или память выше базы больше чем на threshold."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base.get("throughput") and current["throughput"] < base["throughput"] * (1 - threshold):
+            regressions.append(f"{name}: скорость {current['throughput']:,.0f}/с против {base['throughput']:,.0f}/с")
+        if base.get("peak_mb") and current["peak_mb"] > base["peak_mb"] * (1 + threshold) and current["peak_mb"] - base["peak_mb"] > 1:
+            regressions.append(f"{name}: память {current['peak_mb']} МБ против {base['peak_mb']} МБ")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', default=DEFAULT_FILE)
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 10], help='во сколько раз увеличить датасет (пакетные сценарии)')
+    parser.add_argument('--nlp-limit', type=int, default=NLP_LIMIT, help='сколько описаний лемматизировать')
+    parser.add_argument('--only', nargs='+', help='имена сценариев (без суффикса _xN — все масштабы)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    df = pd.read_excel(args.file)
+    cases = build_cases(df, args.scale, args.nlp_limit)
+    if args.only:
+        cases = {k: v for k, v in cases.items() if k in args.only or k.rsplit('_x', 1)[0] in args.only}
+
+    results = {}
+    print(f"{'сценарий':<30}{'элементов':>10}{'в секунду':>12}{'p50 мс':>10}{'p95 мс':>10}{'p99 мс':>10}{'пик МБ':>9}")
+    for name, (call, items, count, reset) in cases.items():
+        r = measure(call, items, count, reset)
+        results[name] = r
+        print(f"{name:<30}{r['items']:>10}{r['throughput']:>12,.0f}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['peak_mb']:>9}")
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "file": os.path.basename(args.file),
+            "rows": len(df),
+            "scales": args.scale,
+            "nlp_limit": args.nlp_limit,
+        },
+        "results": results,
+    }
+    with open(LAST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультат: {LAST_PATH}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"База обновлена: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("Базы нет — сохраните её: --save-baseline")
+        return
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline["results"], args.threshold)
+    if regressions:
+        print(f"\nРегрессии (порог {args.threshold:.0%}) против базы от {baseline['meta']['created']}:")
+        for line in regressions:
+            print("  - " + line)
+        sys.exit(1)
+    print(f"\nРегрессий нет (порог {args.threshold:.0%}, база от {baseline['meta']['created']}).")
+
+
+if __name__ == "__main__":
+    main()
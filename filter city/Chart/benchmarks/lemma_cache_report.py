@@ -0,0 +1,86 @@
+"""
+Отчёт по кэшу лемм на файле «тест 1000 вакансий Москва.xlsx»:
+исходная лемматизация (теггер + MorphVocab на каждый токен) против
+CachedLemmatizer в режимах "tagged" и "dictionary".
+
+    cd "filter city/Chart"
+    python benchmarks/lemma_cache_report.py --limit 300
+
+Печатает время, попадания в кэш, долю неоднозначных слов (для "dictionary")
+и совпадение лемм с исходным вариантом (по токенам).
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+CHART_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(CHART_DIR)
+
+from natasha import Doc  # noqa: E402
+
+from main_page.nlp import CachedLemmatizer, morph_vocab, segmenter, tagger  # noqa: E402
+
+DEFAULT_FILE = os.path.join(CHART_DIR, '..', '..', 'тест 1000 вакансий Москва.xlsx')
+
+
+def prepare(text):
+    # Та же очистка, что в clean_and_lemmatize
+    return text.lower().replace('-', ' ').replace('/', ' ')
+
+
+def baseline(texts):
+    """Как было в main.py: tag_morph + token.lemmatize для каждого токена."""
+    result = []
+    for text in texts:
+        doc = Doc(text)
+        doc.segment(segmenter)
+        doc.tag_morph(tagger)
+        for token in doc.tokens:
+            token.lemmatize(morph_vocab)
+        result.append([t.lemma for t in doc.tokens])
+    return result
+
+
+def agreement(reference, candidate):
+    same = total = 0
+    for ref, cand in zip(reference, candidate):
+        total += len(ref)
+        same += sum(a == b for a, b in zip(ref, cand))
+    return same / total if total else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', default=DEFAULT_FILE)
+    parser.add_argument('--limit', type=int, default=None, help='сколько описаний взять')
+    args = parser.parse_args()
+
+    descriptions = pd.read_excel(args.file)['description'].dropna().astype(str)
+    texts = [prepare(t) for t in descriptions.head(args.limit) if t.strip()]
+
+    t0 = time.perf_counter()
+    reference = baseline(texts)
+    base_time = time.perf_counter() - t0
+    tokens = sum(len(r) for r in reference)
+    print(f"Описаний: {len(texts)}, токенов: {tokens}")
+    print(f"{'исходный':>12}: {base_time:7.2f} с")
+
+    for mode in ('tagged', 'dictionary'):
+        lemmatizer = CachedLemmatizer()
+        t0 = time.perf_counter()
+        result = [lemmatizer.lemmatize(text, mode) for text in texts]
+        elapsed = time.perf_counter() - t0
+        stats = lemmatizer.stats()
+        print(
+            f"{mode:>12}: {elapsed:7.2f} с (x{base_time / elapsed:.2f}), "
+            f"попаданий в кэш {stats['lemma_hit_rate']:.1%}, "
+            f"неоднозначных слов {stats['ambiguous_share']:.1%}, "
+            f"совпадение лемм {agreement(reference, result):.2%}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import json
+
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from main_page import instrumentation
+from main_page.instrumentation import get_registry, stage_summary
+from main_page.nlp import lemmatizer
+
+st.title("🩺 Диагностика")
+st.markdown(
+    "Где уходит время сбора и обработки: ожидание HH (`http_fetch`), разбор HTML "
+    "(`html_extract`), лемматизация, поиск навыков, классификация, экспорт. "
+    "Метрики общие для всех сессий процесса и копятся с его запуска."
+)
+
+if not instrumentation.ENABLED:
+    st.warning("Сбор метрик выключен (HH_METRICS=0).")
+
+registry = get_registry()
+snapshot = registry.snapshot()
+st.caption(f"Собирается {snapshot['uptime_s']} с")
+
+# --- 1. ЭТАПЫ ---
+stages = pd.DataFrame(stage_summary())
+if stages.empty:
+    st.info("Метрик пока нет — запустите сбор или загрузите файл на главной странице.")
+else:
+    st.subheader("⏱️ Этапы")
+    by_stage = stages.groupby("stage", as_index=False)["total_s"].sum().sort_values("total_s")
+    fig = px.bar(by_stage, x="total_s", y="stage", orientation="h", labels={"total_s": "Суммарно, с", "stage": "Этап"})
+    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(
+        stages.rename(columns={
+            "stage": "Этап", "labels": "Метки", "calls": "Вызовов", "total_s": "Всего, с",
+            "mean_ms": "Среднее, мс", "p95_ms": "p95, мс", "max_ms": "Макс., мс",
+        }),
+        use_container_width=True, hide_index=True,
+    )
+
+# --- 2. СЧЁТЧИКИ ---
+counters = pd.DataFrame(snapshot["counters"])
+if not counters.empty:
+    st.subheader("🔢 Счётчики")
+    counters["labels"] = counters["labels"].map(lambda l: ", ".join(f"{k}={v}" for k, v in sorted(l.items())))
+    st.dataframe(counters.rename(columns={"name": "Счётчик", "labels": "Метки", "value": "Значение"}),
+                 use_container_width=True, hide_index=True)
+
+# --- 3. КЭШ ЛЕММ ---
+stats = lemmatizer.stats()
+col1, col2, col3 = st.columns(3)
+col1.metric("Попаданий в кэш лемм", f"{stats['lemma_hit_rate']:.0%}")
+col2.metric("Записей в кэше", stats["cache_size"])
+col3.metric("Неоднозначных слов (словарный режим)", f"{stats['ambiguous_share']:.1%}")
+
+# --- 4. ВЫГРУЗКА ---
+col1, col2, col3 = st.columns(3)
+col1.download_button("📥 JSON", json.dumps(snapshot, ensure_ascii=False, indent=2), "metrics.json", "application/json",
+                     use_container_width=True)
+col2.download_button("📥 Prometheus", registry.to_prometheus(), "metrics.prom", "text/plain", use_container_width=True)
+if col3.button("🗑️ Сбросить метрики", use_container_width=True):
+    registry.reset()
+    st.rerun()
+
+with st.expander("Текст Prometheus"):
+    st.code(registry.to_prometheus(), language="text")
@@ -3,6 +3,8 @@ import pandas as pd
 import plotly.express as px
 import numpy as np
 from typing import Optional
+from main_page.normalize import ensure_normalized
+from main_page.aggregates import category_counts, experience_distribution, experience_shares, set_dataset
 
 # --- КОНСТАНТЫ ---
 HH_EXP_ORDER = ["Нет опыта", "От 1 года до 3 лет", "От 3 до 6 лет", "Более 6 лет", "Не указан"]
@@ -20,24 +22,20 @@ def load_and_prepare_data() -> pd.DataFrame:
     if 'vacancies_df' not in st.session_state or st.session_state['vacancies_df'] is None:
         return pd.DataFrame()
 
-    df = st.session_state['vacancies_df'].copy()
-    mapping = {'experienceatized_co': 'lemmatized_content', 'alary_fron': 'salary_from'}
-    df = df.rename(columns=mapping)
-    
-    if not all(col in df.columns for col in ['experience', 'category']):
+    # Переименование кривых колонок и заполнение опыта делаются один раз при загрузке
+    df = set_dataset(ensure_normalized(st.session_state['vacancies_df']))
+
+    if 'category' not in df.columns:
         return pd.DataFrame()
-        
-    df['experience'] = df['experience'].fillna("Не указан")
     return df
 
-def get_category_display_names(df: pd.DataFrame) -> pd.DataFrame:
-    cat_totals = df['category'].value_counts()
-    def format_name(cat):
-        count = cat_totals.get(cat, 0)
-        prefix = "🔘 " if count < 30 else ""
-        return f"{prefix}{cat} ({count} вак.)"
-    df['category_display'] = df['category'].apply(format_name)
-    return df
+def get_category_display_names(df: pd.DataFrame) -> dict:
+    """{категория: подпись для графика}, по убыванию числа вакансий."""
+    cat_totals = category_counts(df)
+    return {
+        cat: f"{'🔘 ' if count < 30 else ''}{cat} ({count} вак.)"
+        for cat, count in zip(cat_totals['Category'], cat_totals['Count'])
+    }
 
 # --- 2. ВИЗУАЛИЗАЦИЯ (ГРАФИКИ) ---
 
@@ -58,14 +56,16 @@ def draw_donut_chart(share: float, color: str, center_text: str):
 def render_experience_chart(df: pd.DataFrame):
     st.subheader("📊 Распределение опыта по направлениям")
     
-    # Считаем количество
-    exp_stats = df.groupby(['category_display', 'experience']).size().reset_index(name='count')
+    # Количество по (категория, опыт) — из общего кэша агрегатов
+    display_names = get_category_display_names(df)
+    exp_stats = experience_distribution(df)
+    exp_stats['category_display'] = exp_stats['category'].map(display_names)
     
     # Считаем проценты вручную для каждой категории, чтобы в сумме было 100%
-    totals = exp_stats.groupby('category_display')['count'].transform('sum')
+    totals = exp_stats.groupby('category_display', observed=True)['count'].transform('sum')
     exp_stats['percent'] = (exp_stats['count'] / totals) * 100
 
-    category_order = df['category_display'].value_counts().index.tolist()
+    category_order = list(display_names.values())
 
     fig = px.bar(
         exp_stats, 
@@ -92,27 +92,16 @@ def render_experience_chart(df: pd.DataFrame):
 
 # --- 3. АНАЛИТИКА (КАРТОЧКИ) ---
 
-def render_insights(df: pd.DataFrame, title: str, is_exact: bool = True):
+def render_insights(shares: pd.DataFrame, title: str, is_exact: bool = True):
     st.markdown(f"### {title}")
     col1, col2 = st.columns(2)
     
-    # Сбор статистики для поиска лидеров
-    summary = []
-    for cat in df['category'].unique():
-        sub = df[df['category'] == cat]
-        t = len(sub)
-        no_exp_share = len(sub[sub['experience'] == "Нет опыта"]) / t
-        senior_share = len(sub[sub['experience'].isin(["От 3 до 6 лет", "Более 6 лет"])]) / t
-        # Score нужен для баланса: доля + объем вакансий (чтобы 1 вакансия не давала 100%)
-        score_easy = no_exp_share * np.log1p(t)
-        score_hard = senior_share * np.log1p(t)
-        summary.append({
-            'cat': cat, 'no_exp': no_exp_share, 'senior': senior_share, 
-            'total': t, 'score_e': score_easy, 'score_h': score_hard
-        })
-    
-    res_df = pd.DataFrame(summary)
+    # Доли по категориям (experience_shares): no_exp — нет опыта, senior — от 3 лет
+    res_df = shares.rename(columns={'category': 'cat'})
     if res_df.empty: return
+    # Score нужен для баланса: доля + объем вакансий (чтобы 1 вакансия не давала 100%)
+    res_df['score_e'] = res_df['no_exp'] * np.log1p(res_df['total'])
+    res_df['score_h'] = res_df['senior'] * np.log1p(res_df['total'])
 
     easy = res_df.sort_values('score_e', ascending=False).iloc[0]
     hard = res_df.sort_values('score_h', ascending=False).iloc[0]
@@ -149,23 +138,22 @@ def main():
     st.info("Ниже показано, какой процент от всех вакансий в каждом направлении занимают требования к опыту. Сумма всех частей в строке всегда равна 100%.")
 
     # 1. Основной график
-    df_display = get_category_display_names(df)
-    render_experience_chart(df_display)
+    render_experience_chart(df)
 
     st.divider()
 
-    # 2. Группировка вакансий по количеству
-    counts = df['category'].value_counts()
-    df_valid = df[df['category'].isin(counts[counts >= 30].index)]
-    df_small = df[df['category'].isin(counts[counts < 30].index)]
+    # 2. Группировка направлений по количеству вакансий
+    shares = experience_shares(df)
+    shares_valid = shares[shares['total'] >= 30]
+    shares_small = shares[shares['total'] < 30]
 
     # 3. Вывод аналитики
-    if not df_valid.empty:
-        render_insights(df_valid, "🎯 Точные выводы (от 30 вакансий)", is_exact=True)
+    if not shares_valid.empty:
+        render_insights(shares_valid, "🎯 Точные выводы (от 30 вакансий)", is_exact=True)
     
-    if not df_small.empty:
+    if not shares_small.empty:
         with st.expander("🔍 Посмотреть направления с малой выборкой"):
-            render_insights(df_small, "📉 Предварительные тренды", is_exact=False)
+            render_insights(shares_small, "📉 Предварительные тренды", is_exact=False)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,15 +2,12 @@ import streamlit as st
 import pandas as pd
 import requests
 import time
-from transformers import pipeline
+from main_page.inference_client import WORKER_COMMAND, get_client
 
-# --- 1. ЗАГРУЗКА ИИ МОДЕЛИ ---
-@st.cache_resource
-def load_ai_classifier():
-    # Используем мультиязычную модель (BART), которая понимает русский контекст
-    return pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
-
-classifier = load_ai_classifier()
+# --- 1. ИИ МОДЕЛЬ ---
+# BART (мультиязычная, понимает русский контекст) живёт в отдельном процессе-воркере:
+# не занимает память каждого воркера Streamlit и не блокирует интерфейс
+client = get_client()
 
 # Категории для ИИ (более точные, чтобы проверить гипотезу о разделении ролей)
 AI_LABELS = [
@@ -47,35 +44,43 @@ with st.sidebar:
     test_limit = st.slider("Сколько вакансий проверить?", 5, 30, 10)
     start_test = st.button("🚀 Запустить ИИ-анализ")
 
+    if client.available():
+        with st.expander("📡 Воркер инференса"):
+            st.json(client.metrics())
+
 if start_test:
-    items = fetch_test_vacancies(test_query)
+    items = fetch_test_vacancies(test_query) if client.available() else []
     
-    if not items:
+    if not client.available():
+        st.error(f"Воркер инференса не запущен ({client.url}). Запустите: {WORKER_COMMAND}")
+    elif not items:
         st.error("Не удалось получить вакансии.")
     else:
         results = []
         progress_bar = st.progress(0)
         status = st.empty()
 
-        for i, item in enumerate(items[:test_limit]):
+        batch = items[:test_limit]
+        texts = []
+        for item in batch:
             title = item.get('name')
             # Для ИИ лучше давать и заголовок, и короткое описание (snippet)
-            snippet = item.get('snippet', {}).get('requirement', '')
-            full_text = f"{title}. {snippet}" if snippet else title
-            
-            status.info(f"🤖 ИИ анализирует ({i+1}/{test_limit}): {title[:40]}...")
-            
-            # КЛАССИФИКАЦИЯ МОДЕЛЬЮ
-            ai_result = classifier(full_text, candidate_labels=AI_LABELS)
-            
+            snippet = (item.get('snippet') or {}).get('requirement', '')
+            texts.append(f"{title}. {snippet}" if snippet else title)
+
+        # КЛАССИФИКАЦИЯ МОДЕЛЬЮ: один запрос, воркер сам собирает батчи
+        status.info(f"🤖 ИИ анализирует {len(batch)} вакансий...")
+        ai_results = client.classify(texts, AI_LABELS)
+
+        for i, (item, ai_result) in enumerate(zip(batch, ai_results)):
             results.append({
-                "Вакансия": title,
+                "Вакансия": item.get('name'),
                 "ИИ Категория": ai_result['labels'][0],
                 "Уверенность": round(ai_result['scores'][0], 2),
                 "Альтернатива": ai_result['labels'][1] # Вторая по вероятности категория
             })
             
-            progress_bar.progress((i + 1) / test_limit)
+            progress_bar.progress((i + 1) / len(batch))
 
         status.success("✅ Анализ завершен!")
         
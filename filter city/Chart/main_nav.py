@@ -9,8 +9,10 @@ skills_page = st.Page("skills_page/skills.py", title="Навыки аналит
 faster_pars = st.Page("main_page/fast_parser.py", title="Быстрый парсинг", icon="📊", url_path="faster_pars")
 experiments_page = st.Page("experiments_page/experiments.py", title="Эксперименты", icon="📊", url_path="experiments")
 salary_page = st.Page("salary_page/salary.py", title="Зарплата аналитика", icon="📊", url_path="salary")
+stacks_page = st.Page("stacks_page/stacks.py", title="Стеки технологий", icon="📊", url_path="stacks")
+diagnostics_page = st.Page("diagnostics_page/diagnostics.py", title="Диагностика", icon="🩺", url_path="diagnostics")
 
 # Настраиваем навигацию
-pg = st.navigation([main_page, analysis_page, area_page, skills_page, salary_page, experiments_page, faster_pars])
+pg = st.navigation([main_page, analysis_page, area_page, skills_page, stacks_page, salary_page, experiments_page, faster_pars, diagnostics_page])
 # Запускаем навигацию
 pg.run()
\ No newline at end of file
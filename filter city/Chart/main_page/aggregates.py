@@ -0,0 +1,214 @@
+"""
+Общий слой агрегатов для страниц аналитики.
+
+Текущий датафрейм получает отпечаток (число строк + хэш содержимого), и все
+агрегаты (категории, зарплатные квантили, опыт, навыки, быстрая аналитика)
+мемоизируются через st.cache_data под этим отпечатком. Смена страницы или
+виджета не пересканирует датафрейм: сам df передаётся как `_df` (Streamlit его
+не хэширует), ключом кэша служит только fingerprint.
+
+Отпечаток считается, когда датафрейм кладётся в сессию (`set_dataset`), и лежит
+там же рядом с ним. Поэтому в st.session_state['vacancies_df'] пишем только через
+set_dataset, а после правки на месте вызываем set_dataset(df, modified=True).
+
+Навыки считаются через разреженную матрицу «вакансия × навык» (skill_matrix.py),
+она держится в st.cache_resource без копирования на каждый вызов.
+"""
+import hashlib
+
+import pandas as pd
+import streamlit as st
+
+from main_page.analytics_engine import compute_analytics
+from main_page.cooccurrence import stacks_by_category
+from main_page.skill_matrix import build_skill_matrix
+from main_page.text_store import load_texts
+
+# Колонки, по которым считаем хэш: идентичность вакансии и всё, что агрегируется.
+# description не берём — он большой и на агрегаты не влияет
+FINGERPRINT_COLUMNS = ['name', 'company', 'url', 'category', 'salary_from', 'salary_to', 'currency', 'experience', 'skills']
+# Сколько разных датасетов (поиск, загруженные файлы) держим в кэше одновременно
+AGGREGATE_CACHE_ENTRIES = 8
+SALARY_QUANTILES = [0.25, 0.5, 0.75]
+# Где в сессии лежат датафрейм и (датафрейм, отпечаток)
+DATASET_KEY = 'vacancies_df'
+FINGERPRINT_KEY = 'vacancies_fingerprint'
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """Отпечаток датасета: '<строк>-<sha1 содержимого>'. Считается заново при каждом вызове."""
+    cols = [c for c in FINGERPRINT_COLUMNS if c in df.columns]
+    digest = hashlib.sha1(",".join(cols).encode("utf-8"))
+    if cols:
+        part = df[cols]
+        try:
+            hashed = pd.util.hash_pandas_object(part, index=False)
+        except TypeError:
+            # списки/словари в ячейках не хэшируются напрямую
+            hashed = pd.util.hash_pandas_object(part.astype(str), index=False)
+        digest.update(hashed.to_numpy().tobytes())
+    return f"{len(df)}-{digest.hexdigest()}"
+
+
+def set_dataset(df, modified=False):
+    """
+    Кладёт датафрейм в сессию вместе с его отпечатком и возвращает его.
+    Тот же объект повторно не хэшируется; modified=True — он изменён на месте.
+    """
+    stored = st.session_state.get(FINGERPRINT_KEY)
+    st.session_state[DATASET_KEY] = df
+    if df is None:
+        st.session_state[FINGERPRINT_KEY] = None
+    elif modified or stored is None or stored[0] is not df:
+        # Храним ссылку на сам фрейм, а не id(): id освобождённого объекта может достаться новому
+        st.session_state[FINGERPRINT_KEY] = (df, dataset_fingerprint(df))
+    return df
+
+
+def _fingerprint(df):
+    stored = st.session_state.get(FINGERPRINT_KEY)
+    if stored is not None and stored[0] is df:
+        return stored[1]
+    # Фрейм не из сессии (выборка, производный датафрейм) — считаем по содержимому
+    return dataset_fingerprint(df)
+
+
+# --- Мемоизированные расчёты (ключ — fingerprint) ---
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def _category_counts(_df, fingerprint):
+    counts = _df['category'].value_counts().reset_index()
+    counts.columns = ['Category', 'Count']
+    return counts
+
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def _salary_by_category(_df, fingerprint):
+    with_salary = _df[_df['salary_from_rub'].notna()]
+    if with_salary.empty:
+        return pd.DataFrame()
+    grouped = with_salary.groupby('category', observed=True)
+    stats = pd.DataFrame({
+        'from_min': grouped['salary_from_rub'].min(),
+        'to_max': grouped['salary_to_rub'].max(),
+        'count': grouped.size(),
+    })
+    for q in SALARY_QUANTILES:
+        stats[f'from_q{int(q * 100)}'] = grouped['salary_from_rub'].quantile(q)
+        stats[f'to_q{int(q * 100)}'] = grouped['salary_to_clean'].quantile(q)
+    return stats.reset_index()
+
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def _salary_by_experience(_df, fingerprint):
+    known = _df[(_df['experience_code'] >= 0) & _df['salary_from_rub'].notna()]
+    return known.groupby(['experience_code', 'experience'], observed=True)['salary_from_rub'].median().reset_index()
+
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def _experience_distribution(_df, fingerprint):
+    return _df.groupby(['category', 'experience'], observed=True).size().reset_index(name='count')
+
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def _experience_shares(_df, fingerprint):
+    codes = _df['experience_code'].to_numpy()
+    shares = pd.DataFrame({
+        'category': _df['category'].to_numpy(),
+        'no_exp': codes == 0,
+        'senior': codes >= 2,
+    }).groupby('category', sort=False).agg(no_exp=('no_exp', 'mean'), senior=('senior', 'mean'), total=('no_exp', 'size'))
+    return shares.reset_index()
+
+
+@st.cache_resource(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def _skill_matrix(_df, fingerprint):
+    return build_skill_matrix(_df['skills_list'])
+
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def _skill_counts(_df, fingerprint):
+    matrix = _skill_matrix(_df, fingerprint)
+    overall = matrix.top(matrix.counts())
+    # Все категории одним произведением «категория × вакансия» @ «вакансия × навык»
+    groups, by_group = matrix.counts_by_group(_df['category'])
+    by_category = {cat: matrix.top(by_group[i]) for i, cat in enumerate(groups)}
+    return overall, by_category
+
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def _skill_salary(_df, fingerprint):
+    matrix = _skill_matrix(_df, fingerprint)
+    means, counts = matrix.mean_by_skill(_df['salary_from_rub'])
+    result = pd.DataFrame({'skill': matrix.vocabulary, 'mean': means, 'count': counts})
+    return result[result['count'] > 0].reset_index(drop=True)
+
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def _skill_stacks(_df, fingerprint):
+    return stacks_by_category(_skill_matrix(_df, fingerprint), _df['category'])
+
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def _quick_analytics(_df, fingerprint):
+    # Описания в сессии не хранятся — поднимаем их из хранилища текстов один раз на датасет
+    frame = _df if 'description' in _df.columns else _df.assign(description=load_texts(_df))
+    return compute_analytics(frame)
+
+
+# --- Публичные функции для страниц ---
+
+def category_counts(df):
+    """Category / Count по убыванию."""
+    return _category_counts(df, _fingerprint(df))
+
+
+def salary_by_category(df):
+    """По категориям: from_min, to_max, квантили 'от' и 'до' (в рублях), count."""
+    return _salary_by_category(df, _fingerprint(df))
+
+
+def salary_by_experience(df):
+    """Медианная зарплата 'от' по коду опыта (по возрастанию опыта)."""
+    return _salary_by_experience(df, _fingerprint(df))
+
+
+def experience_distribution(df):
+    """Число вакансий по паре (категория, опыт)."""
+    return _experience_distribution(df, _fingerprint(df))
+
+
+def experience_shares(df):
+    """Для каждой категории: доля без опыта, доля от 3 лет, total."""
+    return _experience_shares(df, _fingerprint(df))
+
+
+def skill_matrix(df):
+    """Разреженная матрица навыков датасета (SkillMatrix), общая для всех страниц."""
+    return _skill_matrix(df, _fingerprint(df))
+
+
+def skill_counts(df, category=None):
+    """DataFrame Skill / Count по убыванию — по всему датасету или одной категории."""
+    overall, by_category = _skill_counts(df, _fingerprint(df))
+    if category is None:
+        return overall
+    return by_category.get(category, pd.DataFrame(columns=['Skill', 'Count']))
+
+
+def skill_salary(df):
+    """Средняя зарплата 'от' и число вакансий по каждому навыку."""
+    return _skill_salary(df, _fingerprint(df))
+
+
+def skill_stacks(df):
+    """
+    Пары навыков (count, lift, PMI) и частые стеки — для всего датасета (ключ None)
+    и по каждой категории: {категория: {'pairs', 'stacks', 'total'}}.
+    """
+    return _skill_stacks(df, _fingerprint(df))
+
+
+def quick_analytics(df):
+    """compute_analytics (технологии, компании) под тем же отпечатком."""
+    return _quick_analytics(df, _fingerprint(df))
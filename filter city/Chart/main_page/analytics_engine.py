@@ -0,0 +1,170 @@
+"""
+Колоночный движок быстрой аналитики (направления, технологии, топ компаний,
+зарплатные диапазоны) — общий для Flask (app.py, asgi_app.py) и Streamlit-страниц.
+
+Вместо цикла по вакансиям одинаковые тексты `name + description` схлопываются,
+уникальные склеиваются в одну строку байтов в нижнем регистре, и все ключевые
+слова ищутся по ней за один проход numpy (отбор кандидатов по первым двум
+байтам слова, дальше сравнение массивов) — без цикла Python по текстам.
+Зарплаты раскладываются по корзинам через `np.digitize`, компании — через `value_counts`.
+"""
+import numpy as np
+import pandas as pd
+
+# Направления и технологии для аналитики (ключевые слова, по которым считаем вхождения)
+DIRECTION_KEYWORDS = {
+    "Backend": ["backend", "бэкенд", "бэкенд", "back-end", "серверн"],
+    "Frontend": ["frontend", "фронтенд", "front-end", "front end", "верстк", "верстальщик"],
+    "Fullstack": ["fullstack", "full-stack", "фуллстек", "full stack"],
+    "Data / ML": ["data science", "machine learning", "ml", "аналитик данных", "data analyst", "нейросет", "ai ", "искусственный интеллект"],
+    "DevOps / SRE": ["devops", "sre", "инфраструктур", "ci/cd", "deployment"],
+    "Mobile": ["mobile", "мобильн", "android", "ios", "react native", "flutter", "кроссплатформен"],
+    "QA / Тестирование": ["qa", "тестиров", "quality assurance", "automation test", "sdet"],
+    "Управление": ["менеджер", "manager", "team lead", "тимлид", "руководитель", "project manager", "pm "],
+}
+
+TECH_KEYWORDS = [
+    "Python", "Java", "JavaScript", "TypeScript", "React", "Vue", "Angular",
+    "SQL", "PostgreSQL", "MongoDB", "Redis", "Docker", "Kubernetes", "K8s",
+    "Git", "Linux", "AWS", "Kotlin", "Swift", "Go", "Golang", "PHP", "C#",
+    "1C", "Node.js", "Django", "Flask", "FastAPI", "Spring", "GraphQL", "REST",
+]
+
+# Границы зарплатных корзин (правая граница не включается, как в исходном if-каскаде)
+SALARY_EDGES = [50000, 100000, 150000, 200000, 300000]
+SALARY_LABELS = ["до 50k", "50–100k", "100–150k", "150–200k", "200–300k", "300k+"]
+TOP_COMPANIES = 15
+
+# Уникальные тексты склеиваются в одну строку байтов через разделитель, которого нет в словах.
+# Кодировка cp1251: латиница и кириллица — один байт на символ, поэтому нижний регистр —
+# это bytes.translate; остальные символы становятся "?" и совпасть с ключевым словом не могут
+SEPARATOR = "\x00"
+TEXT_ENCODING = "cp1251"
+_LOWER = bytes.maketrans(
+    bytes(range(0x41, 0x5B)) + bytes(range(0xC0, 0xE0)) + b"\xa8",  # A-Z, А-Я, Ё
+    bytes(range(0x61, 0x7B)) + bytes(range(0xE0, 0x100)) + b"\xb8",
+)
+
+# Ключевые слова кодируются один раз при импорте
+DIRECTION_NEEDLES = {
+    direction: [kw.lower().encode(TEXT_ENCODING) for kw in dict.fromkeys(keywords)]
+    for direction, keywords in DIRECTION_KEYWORDS.items()
+}
+TECH_NEEDLES = {tech: tech.lower().encode(TEXT_ENCODING) for tech in TECH_KEYWORDS}
+_ALL_NEEDLES = list(dict.fromkeys([n for ns in DIRECTION_NEEDLES.values() for n in ns] + list(TECH_NEEDLES.values())))
+# Все слова не короче двух байт: первые два байта (биграмма) — ключ отбора кандидатов
+_NEEDLE_HEADS = [(needle, (needle[0] << 8) | needle[1]) for needle in _ALL_NEEDLES]
+_HEAD_TABLE = np.zeros(1 << 16, dtype=bool)
+_HEAD_TABLE[[head for _, head in _NEEDLE_HEADS]] = True
+_PAD = max(len(n) for n in _ALL_NEEDLES)
+
+
+def to_frame(vacancies):
+    """Список словарей или DataFrame -> DataFrame с нужными для аналитики колонками."""
+    if isinstance(vacancies, pd.DataFrame):
+        frame = vacancies
+    else:
+        vacancies = list(vacancies)
+        frame = pd.DataFrame({
+            col: [v.get(col) for v in vacancies]
+            for col in ("name", "description", "company", "salary_from")
+        })
+    for col in ("name", "description", "company", "salary_from"):
+        if col not in frame.columns:
+            frame = frame.assign(**{col: None})
+    return frame
+
+
+def lowered_texts(frame):
+    """
+    Коды строк и уникальные тексты `name + " " + description` одной строкой байтов
+    в нижнем регистре (через SEPARATOR) + позиции концов текстов в ней.
+    Одинаковые вакансии (одна вакансия в нескольких городах) сканируются один раз.
+    """
+    text = (frame["name"].fillna("").astype(str) + " " + frame["description"].fillna("").astype(str)).tolist()
+    # Схлопывание через dict: на длинных строках в разы быстрее pd.factorize
+    index = {}
+    codes = np.fromiter((index.setdefault(t, len(index)) for t in text), dtype=np.int64, count=len(text))
+    uniques = list(index)
+    blob = SEPARATOR.join(uniques).encode(TEXT_ENCODING, errors="replace").translate(_LOWER)
+    ends = np.flatnonzero(np.frombuffer(blob, dtype=np.uint8) == ord(SEPARATOR))
+    if len(ends) != len(uniques) - 1:
+        # Разделитель внутри самого текста — заменяем пробелом и склеиваем заново
+        blob = SEPARATOR.join(u.replace(SEPARATOR, " ") for u in uniques).encode(TEXT_ENCODING, errors="replace").translate(_LOWER)
+        ends = np.flatnonzero(np.frombuffer(blob, dtype=np.uint8) == ord(SEPARATOR))
+    return codes, blob, np.append(ends, len(blob))
+
+
+def needle_presence(blob, ends):
+    """
+    {слово: маска уникальных текстов, где оно встречается} для всех ключевых слов за один
+    проход numpy: позиции, где начинается биграмма какого-то слова, отбираются по таблице,
+    дальше каждое слово добирает свои байты сравнением массивов только на кандидатах.
+    """
+    size = len(blob)
+    data = np.frombuffer(blob + b"\x00" * _PAD, dtype=np.uint8)
+    bigrams = (data[:size].astype(np.uint16) << 8) | data[1:size + 1]
+    positions = np.flatnonzero(_HEAD_TABLE[bigrams])
+    heads = bigrams[positions]
+    order = np.argsort(heads, kind="stable")
+    positions, heads = positions[order], heads[order]
+    presence = {}
+    for needle, head in _NEEDLE_HEADS:
+        lo, hi = np.searchsorted(heads, [head, head + 1])
+        pos = positions[lo:hi]
+        for k in range(2, len(needle)):
+            pos = pos[data[pos + k] == needle[k]]
+        mask = np.zeros(len(ends), dtype=bool)
+        # Текст i занимает позиции между ends[i-1] и ends[i]
+        mask[np.searchsorted(ends, pos)] = True
+        presence[needle] = mask
+    return presence
+
+
+def keyword_presence(blob, ends):
+    """Булевы маски присутствия по уникальным текстам: {направление: mask}, {технология: mask}."""
+    presence = needle_presence(blob, ends)
+    by_direction = {
+        direction: np.logical_or.reduce([presence[n] for n in needles])
+        for direction, needles in DIRECTION_NEEDLES.items()
+    }
+    by_technology = {tech: presence[needle] for tech, needle in TECH_NEEDLES.items()}
+    return by_direction, by_technology
+
+
+def salary_distribution(salary_from):
+    values = pd.to_numeric(pd.Series(salary_from), errors="coerce").dropna().to_numpy(dtype=float)
+    if not len(values):
+        return {}
+    counts = np.bincount(np.digitize(values, SALARY_EDGES), minlength=len(SALARY_LABELS))
+    return {label: int(c) for label, c in zip(SALARY_LABELS, counts) if c > 0}
+
+
+def top_companies(company, limit=TOP_COMPANIES):
+    names = company.dropna().astype(str).str.strip()
+    names = names[names != ""]
+    # sort=False сохраняет порядок первого появления — при равенстве как в исходном sorted()
+    counts = names.value_counts(sort=False).sort_values(ascending=False, kind="stable")
+    return [(name, int(c)) for name, c in counts.head(limit).items()]
+
+
+def compute_analytics(vacancies):
+    """Классификация по направлениям, технологиям, топ компаний, зарплаты."""
+    frame = to_frame(vacancies)
+    if frame.empty:
+        return {"by_direction": {}, "by_technology": {}, "top_companies": [], "salary_dist": {}}
+
+    codes, blob, ends = lowered_texts(frame)
+    # Сколько строк приходится на каждый уникальный текст
+    weights = np.bincount(codes, minlength=len(ends))
+    direction_masks, tech_masks = keyword_presence(blob, ends)
+
+    by_direction = {k: int(weights[m].sum()) for k, m in direction_masks.items()}
+    by_technology = {k: int(weights[m].sum()) for k, m in tech_masks.items()}
+
+    return {
+        "by_direction": {k: v for k, v in by_direction.items() if v > 0},
+        "by_technology": {k: v for k, v in by_technology.items() if v > 0},
+        "top_companies": top_companies(frame["company"]),
+        "salary_dist": salary_distribution(frame["salary_from"]),
+    }
@@ -0,0 +1,91 @@
+"""
+Бэкенды классификации ролей для главной страницы.
+
+- "rules" — словарный classify_vacancy (по умолчанию, работает всегда);
+- "distilled" — линейная модель, дистиллированная из BART (role_model.py),
+  доступна, если обучен артефакт (use model/distill.py);
+- "embeddings" — сходство эмбеддингов вакансии и прототипов меток
+  (embedding_classifier.py), доступен при установленном sentence-transformers;
+- "worker" — zero-shot BART в отдельном процессе (use model/inference_worker.py),
+  доступен, если воркер запущен.
+"""
+import os
+from functools import lru_cache
+
+from main_page.embedding_classifier import EmbeddingRoleClassifier, encoder_available
+from main_page.inference_client import get_client
+from main_page.instrumentation import inc, span
+from main_page.nlp import LEMMA_MODE, classify_vacancy
+from main_page.role_model import MODEL_PATH, ROLE_LABELS, DistilledRoleClassifier, model_available
+
+# Zero-shot через воркер: ниже этой уверенности — "Other", описание обрезается (BART — до 1024 токенов)
+ZERO_SHOT_MIN_SCORE = 0.2
+ZERO_SHOT_MAX_CHARS = 1500
+
+CLASSIFIER_BACKENDS = {
+    "rules": "Словари (быстро, без модели)",
+    "distilled": "Дистиллированная модель (BART → линейная)",
+    "embeddings": "Эмбеддинги (энкодер + прототипы меток)",
+    "worker": "Zero-shot BART (воркер инференса)",
+}
+
+
+def available_backends() -> list:
+    backends = ["rules"]
+    if model_available():
+        try:
+            get_distilled_model()
+            backends.append("distilled")
+        except ValueError:
+            # Артефакт обучен на старом наборе меток или на леммах другого режима — не предлагаем
+            pass
+    if encoder_available():
+        backends.append("embeddings")
+    if get_client().available():
+        backends.append("worker")
+    return backends
+
+
+@lru_cache(maxsize=2)
+def _distilled_model(path, mtime):
+    # mtime в ключе — переобученный артефакт подхватывается без перезапуска
+    return DistilledRoleClassifier.load(path, lemma_mode=LEMMA_MODE)
+
+
+def get_distilled_model(path=MODEL_PATH) -> DistilledRoleClassifier:
+    return _distilled_model(path, os.path.getmtime(path))
+
+
+@lru_cache(maxsize=1)
+def get_embedding_model() -> EmbeddingRoleClassifier:
+    # Энкодер грузится один раз на процесс
+    return EmbeddingRoleClassifier()
+
+
+def classify_roles(names, lemmatized_texts, backend="rules", descriptions=None) -> list:
+    """
+    Категории для списка вакансий (название + леммы описания).
+    descriptions — исходные тексты: энкодеру они полезнее лемм.
+    """
+    names, lemmatized_texts = list(names), list(lemmatized_texts)
+    inc("classified_vacancies", len(names), backend=backend)
+    with span("classify", backend=backend):
+        return _classify(names, lemmatized_texts, backend, descriptions)
+
+
+def _classify(names, lemmatized_texts, backend, descriptions):
+    if backend == "distilled":
+        return get_distilled_model().predict(names, lemmatized_texts)
+    if backend == "embeddings":
+        texts = list(descriptions) if descriptions is not None else lemmatized_texts
+        return get_embedding_model().predict(names, texts)
+    if backend == "worker":
+        texts = list(descriptions) if descriptions is not None else lemmatized_texts
+        labels = [label for label in ROLE_LABELS if label != "Other"]
+        results = get_client().classify(
+            [f"{name}. {str(text)[:ZERO_SHOT_MAX_CHARS]}" for name, text in zip(names, texts)], labels
+        )
+        return [r["labels"][0] if r["scores"][0] >= ZERO_SHOT_MIN_SCORE else "Other" for r in results]
+    if backend != "rules":
+        raise ValueError(f"Неизвестный классификатор: {backend}")
+    return [classify_vacancy(name, text) for name, text in zip(names, lemmatized_texts)]
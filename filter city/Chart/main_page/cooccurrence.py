@@ -0,0 +1,178 @@
+"""
+Совместная встречаемость навыков и «стеки» технологий.
+
+- пары: C = M.T @ M по разреженной матрице навыков (skill_matrix.py), на диагонали —
+  частоты навыков; для каждой пары считаются support, lift и PMI;
+- стеки: частые наборы навыков (Eclat — поиск в глубину по пересечениям
+  множеств вакансий, упакованных в битовые маски). Кандидат отбрасывается, как
+  только его поддержка падает ниже порога, поэтому перебор не растёт
+  квадратично от числа вакансий.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Минимальная доля вакансий, в которых встречается пара/стек
+MIN_SUPPORT = 0.03
+# И минимальное абсолютное число вакансий (чтобы на маленьких выборках не было «стеков» из 1-2 вакансий)
+MIN_COUNT = 3
+MAX_STACK_SIZE = 5
+# Предохранитель от комбинаторного взрыва на маленьких плотных выборках:
+# наборы перебираются от самых частых навыков, после лимита перебор останавливается
+MAX_ITEMSETS = 20000
+TOP_PAIRS = 30
+TOP_STACKS = 15
+
+
+def _rows(skill_matrix, rows):
+    matrix = skill_matrix.matrix
+    if rows is not None:
+        matrix = matrix[np.flatnonzero(np.asarray(rows, dtype=bool))]
+    return matrix
+
+
+def _min_count(n_rows, min_support, min_count):
+    return max(min_count, int(np.ceil(min_support * n_rows)))
+
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(bits):
+        return int(np.bitwise_count(bits).sum())
+else:  # numpy < 2.0
+    def _popcount(bits):
+        return int(np.unpackbits(bits).sum())
+
+
+def pair_stats(skill_matrix, rows=None, min_support=MIN_SUPPORT, min_count=MIN_COUNT) -> pd.DataFrame:
+    """
+    Пары навыков: count (вакансий с обоими), support, lift = P(a,b) / (P(a) P(b)), pmi = log2(lift).
+    Отсортировано по count.
+    """
+    matrix = _rows(skill_matrix, rows)
+    n = matrix.shape[0]
+    columns = ['skill_a', 'skill_b', 'count', 'support', 'lift', 'pmi']
+    if n == 0:
+        return pd.DataFrame(columns=columns)
+
+    threshold = _min_count(n, min_support, min_count)
+    freq = np.asarray(matrix.sum(axis=0)).ravel()
+    # Навыки реже порога не могут дать частую пару — отрезаем их до произведения
+    keep = np.flatnonzero(freq >= threshold)
+    sub = matrix[:, keep]
+    co = sparse.triu(sub.T @ sub, k=1).tocoo()
+    mask = co.data >= threshold
+    a, b, count = keep[co.row[mask]], keep[co.col[mask]], co.data[mask].astype(np.int64)
+
+    lift = count * n / (freq[a] * freq[b])
+    vocab = skill_matrix.vocabulary
+    pairs = pd.DataFrame({
+        'skill_a': [vocab[i] for i in a],
+        'skill_b': [vocab[i] for i in b],
+        'count': count,
+        'support': count / n,
+        'lift': lift,
+        'pmi': np.log2(lift),
+    }, columns=columns)
+    return pairs.sort_values(['count', 'lift'], ascending=False, kind='stable').reset_index(drop=True)
+
+
+def frequent_itemsets(skill_matrix, rows=None, min_support=MIN_SUPPORT, min_count=MIN_COUNT,
+                      max_size=MAX_STACK_SIZE) -> pd.DataFrame:
+    """
+    Частые наборы навыков размером от 2 до max_size (Eclat).
+    Множество вакансий каждого навыка — битовая маска (np.packbits); расширение
+    набора — побитовое И, ветка обрывается при count < порога.
+    """
+    matrix = _rows(skill_matrix, rows)
+    n = matrix.shape[0]
+    columns = ['stack', 'size', 'count', 'support', 'lift']
+    if n == 0:
+        return pd.DataFrame(columns=columns)
+
+    threshold = _min_count(n, min_support, min_count)
+    freq = np.asarray(matrix.sum(axis=0)).ravel().astype(np.int64)
+    items = [i for i in np.argsort(-freq, kind='stable') if freq[i] >= threshold]
+    # По n/8 байт на частый навык: 200 навыков на 100k вакансий — 2.5 МБ
+    csc = matrix.tocsc()
+    tids = {}
+    for item in items:
+        column = np.zeros(n, dtype=bool)
+        column[csc.indices[csc.indptr[item]:csc.indptr[item + 1]]] = True
+        tids[item] = np.packbits(column)
+
+    vocab = skill_matrix.vocabulary
+    found = []
+
+    def extend(prefix, prefix_tids, candidates):
+        for pos, item in enumerate(candidates):
+            if len(found) >= MAX_ITEMSETS:
+                return
+            joined = prefix_tids & tids[item]
+            count = _popcount(joined)
+            if count < threshold:
+                continue
+            itemset = prefix + [item]
+            if len(itemset) >= 2:
+                found.append((itemset, count))
+            if len(itemset) < max_size:
+                extend(itemset, joined, candidates[pos + 1:])
+
+    for pos, item in enumerate(items):
+        extend([item], tids[item], items[pos + 1:])
+
+    if not found:
+        return pd.DataFrame(columns=columns)
+    counts = np.array([c for _, c in found], dtype=np.int64)
+    # lift набора: P(все) / произведение P(каждого)
+    expected = np.array([np.prod(freq[itemset] / n) for itemset, _ in found])
+    result = pd.DataFrame({
+        'stack': [" + ".join(vocab[i] for i in itemset) for itemset, _ in found],
+        'size': [len(itemset) for itemset, _ in found],
+        'count': counts,
+        'support': counts / n,
+        'lift': (counts / n) / expected,
+    }, columns=columns)
+    return result.sort_values(['size', 'count'], ascending=False, kind='stable').reset_index(drop=True)
+
+
+def maximal_stacks(itemsets: pd.DataFrame, limit=TOP_STACKS) -> pd.DataFrame:
+    """
+    Топ «максимальных» стеков по частоте: набор выбрасывается, если его можно
+    расширить ещё одним навыком и остаться частым. По монотонности поддержки
+    достаточно проверить расширения на один навык — это поиск в множестве наборов.
+    """
+    if itemsets.empty:
+        return itemsets
+    sets = [frozenset(stack.split(" + ")) for stack in itemsets['stack']]
+    frequent = set(sets)
+    skills = set().union(*sets)
+    ordered = itemsets.assign(_set=sets).sort_values(['count', 'size'], ascending=False, kind='stable')
+
+    kept = []
+    for idx, skill_set in zip(ordered.index, ordered['_set']):
+        if any(skill_set | {s} in frequent for s in skills - skill_set):
+            continue
+        kept.append(idx)
+        if len(kept) >= limit:
+            break
+    return itemsets.loc[kept].reset_index(drop=True)
+
+
+def stacks_by_category(skill_matrix, categories, min_support=MIN_SUPPORT, min_count=MIN_COUNT,
+                       max_size=MAX_STACK_SIZE) -> dict:
+    """{категория: {'pairs': DataFrame, 'stacks': DataFrame, 'total': вакансий}} + ключ None для всего датасета."""
+    categories = pd.Series(categories).to_numpy()
+    result = {None: _stats(skill_matrix, None, min_support, min_count, max_size)}
+    result[None]['total'] = skill_matrix.shape[0]
+    for cat in pd.unique(categories):
+        rows = categories == cat
+        result[cat] = _stats(skill_matrix, rows, min_support, min_count, max_size)
+        result[cat]['total'] = int(rows.sum())
+    return result
+
+
+def _stats(skill_matrix, rows, min_support, min_count, max_size):
+    return {
+        'pairs': pair_stats(skill_matrix, rows, min_support, min_count).head(TOP_PAIRS),
+        'stacks': maximal_stacks(frequent_itemsets(skill_matrix, rows, min_support, min_count, max_size)),
+    }
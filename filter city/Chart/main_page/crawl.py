@@ -0,0 +1,285 @@
+"""
+Распределённый сбор рынка несколькими узлами через общую очередь (main_page/work_queue.py).
+
+    cd "filter city/Chart"
+    # координатор: разложить сбор на срезы запрос × регион × опыт
+    python -m main_page.crawl plan -q python -q java -a 1 -a 2 --pages 20 --queue redis://coordinator:6379/0
+    # на каждом узле — сколько угодно процессов
+    python -m main_page.crawl work --queue redis://coordinator:6379/0
+    # ход работы и скорость по узлам
+    python -m main_page.crawl status --queue redis://coordinator:6379/0
+    # слить результаты (по id вакансии), классифицировать, выгрузить
+    python -m main_page.crawl export -o market.parquet --store --queue redis://coordinator:6379/0
+
+Задачи двух видов:
+- listing — срез выдачи: страница 0 сообщает число страниц, вакансии среза
+  ставятся задачами detail с ключом по id — вакансию из нескольких срезов
+  скачают один раз;
+- detail — описание через API HH (как setting_parse/api_vacan.py), если API
+  не отдало текст — со страницы вакансии; дальше навыки и леммы
+  (pipeline.process_description), результат — upsert по id вакансии.
+
+Пока узел обрабатывает пачку, фоновый поток продлевает аренду её задач.
+Упавший узел перестаёт продлевать — задачи уходят другим после LEASE_SECONDS.
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+
+from main_page.classifiers import CLASSIFIER_BACKENDS, classify_roles
+from main_page.instrumentation import inc, span
+from main_page.nlp import LEMMA_MODE, LEMMA_MODES
+from main_page.pipeline import (
+    FETCH_WORKERS, MAX_RESULTS, PER_PAGE, REQUEST_TIMEOUT, VACANCIES_URL, fetch_full_description,
+    fetch_listing_page, log, process_description, resolve_area, vacancy_record, write_output, write_store,
+)
+from main_page.prefilter import PREFILTER_MIN_SCORE, split_by_relevance
+from main_page.work_queue import LEASE_BATCH, LEASE_SECONDS, QUEUE_URL, open_queue
+
+EXPERIENCE_SLICES = ["noExperience", "between1And3", "between3And6", "moreThan6"]
+API_HEADERS = {"User-Agent": "HH-Parser/1.0", "Accept": "application/json"}
+# Пауза, когда задач нет, и сколько ждать работы, прежде чем узел завершится
+POLL_SECONDS = 5
+IDLE_EXIT_SECONDS = 60
+# HH просит подождать (429) — не дольше этого
+MAX_BACKOFF_SECONDS = 60
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"429 Too Many Requests, Retry-After {retry_after}")
+        self.retry_after = retry_after
+
+
+def default_node() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def plan(queue, queries, areas, pages, per_page=PER_PAGE, min_score=0) -> int:
+    """Ставит срезы запрос × регион × опыт; повторный plan с теми же срезами ничего не добавит."""
+    items = [
+        (f"listing:{query}:{area_id}:{exp}",
+         {"query": query, "area": area_id, "experience": exp, "pages": pages, "per_page": per_page, "min_score": min_score})
+        for query in queries for area_id in areas for exp in EXPERIENCE_SLICES
+    ]
+    return queue.enqueue("listing", items)
+
+
+def fetch_vacancy_detail(item, session=requests):
+    """(описание, навыки HH) по API; если API не отдало текст — со страницы вакансии."""
+    with span("http_fetch", target="api"):
+        resp = session.get(f"{VACANCIES_URL}/{item['id']}", headers=API_HEADERS, timeout=REQUEST_TIMEOUT)
+    inc("http_responses", target="api", status=resp.status_code)
+    if resp.status_code == 429:
+        raise RateLimited(int(resp.headers.get("Retry-After", MAX_BACKOFF_SECONDS)))
+    key_skills = ""
+    if resp.status_code == 200:
+        data = resp.json()
+        key_skills = ", ".join(s.get("name") for s in data.get("key_skills", []))
+        if data.get("description"):
+            with span("html_extract", source="api"):
+                return BeautifulSoup(data["description"], "html.parser").get_text("\n", strip=True), key_skills
+    description = fetch_full_description(item.get("alternate_url"), session)
+    if not description:
+        raise RuntimeError(f"описание не получено (API {resp.status_code})")
+    return description, key_skills
+
+
+def process_listing(queue, node, key, payload, session=requests) -> int:
+    """Срез выдачи -> задачи detail. Вернёт число новых вакансий в очереди."""
+    filters = {"experience": payload["experience"]}
+    first = fetch_listing_page(payload["query"], payload["area"], 0, payload["per_page"], session, full=True, **filters)
+    if first is None:
+        raise RuntimeError("HH не отдал страницу 0")
+    items = list(first.get("items", []))
+    pages = min(first.get("pages") or 1, payload["pages"], MAX_RESULTS // payload["per_page"])
+    for page in range(1, pages):
+        page_items = fetch_listing_page(payload["query"], payload["area"], page, payload["per_page"], session, **filters)
+        if page_items is None:
+            raise RuntimeError(f"HH не отдал страницу {page}")
+        items.extend(page_items)
+    kept, _ = split_by_relevance(items, payload.get("min_score", 0))
+    return queue.enqueue("detail", ((f"vacancy:{it['id']}", it) for it in kept))
+
+
+class Heartbeat(threading.Thread):
+    """Продлевает аренду задач, которые узел держит, каждые lease/3 секунд."""
+
+    def __init__(self, queue, node, lease_seconds=LEASE_SECONDS):
+        super().__init__(daemon=True)
+        self.queue, self.node, self.lease_seconds = queue, node, lease_seconds
+        self.keys = set()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def hold(self, keys):
+        with self.lock:
+            self.keys.update(keys)
+
+    def release(self, keys):
+        with self.lock:
+            self.keys.difference_update(keys)
+
+    def run(self):
+        while not self.stopped.wait(self.lease_seconds / 3):
+            with self.lock:
+                keys = list(self.keys)
+            if keys:
+                kept = self.queue.heartbeat(self.node, keys, self.lease_seconds)
+                if kept < len(keys):
+                    log(f"[{self.node}] аренда потеряна для {len(keys) - kept} задач — их уже обрабатывает другой узел")
+
+
+def work(queue, node, fetch_workers=FETCH_WORKERS, lemma_mode=LEMMA_MODE, batch=LEASE_BATCH,
+         lease_seconds=LEASE_SECONDS, idle_exit=IDLE_EXIT_SECONDS, session=requests) -> dict:
+    """Цикл узла: сначала срезы выдачи (они порождают работу), потом описания пачками."""
+    heartbeat = Heartbeat(queue, node, lease_seconds)
+    heartbeat.start()
+    done = {"listing": 0, "detail": 0, "failed": 0, "rate_limited": 0}
+    started = time.perf_counter()
+    idle_since = None
+    pool = ThreadPoolExecutor(fetch_workers)
+    try:
+        while True:
+            leased = queue.lease(node, "listing", 1, lease_seconds) or queue.lease(node, "detail", batch, lease_seconds)
+            if not leased:
+                idle_since = idle_since or time.perf_counter()
+                if time.perf_counter() - idle_since >= idle_exit:
+                    break
+                time.sleep(POLL_SECONDS)
+                continue
+            idle_since = None
+            keys = [key for key, _, _ in leased]
+            heartbeat.hold(keys)
+            t0 = time.perf_counter()
+            try:
+                if leased[0][1] == "listing":
+                    key, _, payload = leased[0]
+                    try:
+                        added = process_listing(queue, node, key, payload, session)
+                        # 0 — аренда истекла и срез уже у другого узла: его работа не наша
+                        done["listing"] += queue.complete(node, [key], "listing", time.perf_counter() - t0)
+                        log(f"[{node}] {key}: +{added} вакансий")
+                    except Exception as e:
+                        done["failed"] += queue.fail(node, key, "listing", e)
+                else:
+                    done["detail"] += process_details(queue, node, leased, pool, lemma_mode, session, t0, done)
+            finally:
+                heartbeat.release(keys)
+    finally:
+        heartbeat.stopped.set()
+        pool.shutdown()
+    elapsed = time.perf_counter() - started
+    return {"node": node, **done, "seconds": round(elapsed, 1),
+            "details_per_second": round(done["detail"] / elapsed, 2) if elapsed else None}
+
+
+def process_details(queue, node, leased, pool, lemma_mode, session, started, done) -> int:
+    """Пачка описаний: загрузка параллельно в потоках, NLP — в этом процессе."""
+    records, ok = [], []
+    futures = [(key, item, pool.submit(fetch_vacancy_detail, item, session)) for key, _, item in leased]
+    backoff = 0
+    for key, item, future in futures:
+        try:
+            description, key_skills = future.result()
+        except RateLimited as e:
+            # Лимит HH — не вина задачи: в очередь без расхода попытки, узел ждёт Retry-After
+            queue.fail(node, key, "detail", e, retryable=True)
+            done["rate_limited"] += 1
+            backoff = max(backoff, min(e.retry_after, MAX_BACKOFF_SECONDS))
+            continue
+        except Exception as e:
+            done["failed"] += queue.fail(node, key, "detail", e)
+            continue
+        skills, lemmas = process_description(description, lemma_mode)
+        records.append({**vacancy_record(item, description, skills, lemmas), "key_skills": key_skills})
+        ok.append(key)
+    completed = 0
+    if records:
+        queue.save_results(node, records)
+        completed = queue.complete(node, ok, "detail", time.perf_counter() - started)
+    if backoff:
+        log(f"[{node}] HH просит подождать {backoff} с")
+        time.sleep(backoff)
+    return completed
+
+
+def export(queue, output=None, store=False, classifier="rules") -> dict:
+    """Результаты всех узлов (по одному на вакансию) -> роли, нормализация, файл и/или хранилище."""
+    from main_page.normalize import normalize_vacancies
+
+    df = pd.DataFrame(list(queue.iter_results()))
+    stats = {"rows": len(df)}
+    if df.empty:
+        return stats
+    df.insert(2, "category", classify_roles(df["name"], df["lemmatized_content"], classifier, df["description"]))
+    df = normalize_vacancies(df)
+    stats["categories"] = df["category"].astype(str).value_counts().to_dict()
+    if output:
+        write_output(df, output)
+        stats["output"] = os.path.abspath(output)
+    if store:
+        stats.update(write_store(df))
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Распределённый сбор вакансий HH через общую очередь")
+    parser.add_argument("--queue", default=QUEUE_URL, help="sqlite:///путь или redis://host:port/db")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("plan", help="поставить срезы выдачи в очередь")
+    p.add_argument("-q", "--query", action="append", required=True)
+    p.add_argument("-a", "--area", action="append", default=None, help="id региона HH или город (по умолчанию Москва)")
+    p.add_argument("--pages", type=int, default=MAX_RESULTS // PER_PAGE)
+    p.add_argument("--per-page", type=int, default=PER_PAGE)
+    p.add_argument("--min-score", type=int, default=PREFILTER_MIN_SCORE)
+
+    w = commands.add_parser("work", help="обрабатывать задачи, пока они есть")
+    w.add_argument("--node", default=default_node())
+    w.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS)
+    w.add_argument("--lemma-mode", choices=LEMMA_MODES, default=LEMMA_MODE)
+    w.add_argument("--batch", type=int, default=LEASE_BATCH)
+    w.add_argument("--lease-seconds", type=int, default=LEASE_SECONDS)
+    w.add_argument("--idle-exit", type=int, default=IDLE_EXIT_SECONDS, help="завершиться после стольких секунд без задач")
+
+    commands.add_parser("status", help="очередь и скорость по узлам")
+
+    e = commands.add_parser("export", help="слить результаты и выгрузить")
+    e.add_argument("-o", "--output")
+    e.add_argument("--store", action="store_true")
+    e.add_argument("--classifier", choices=list(CLASSIFIER_BACKENDS), default="rules")
+    args = parser.parse_args(argv)
+
+    queue = open_queue(args.queue)
+    if args.command == "plan":
+        areas = []
+        for value in args.area or ["1"]:
+            area_id = resolve_area(value)
+            if area_id is None:
+                parser.error(f"регион не найден: {value}")
+            areas.append(area_id)
+        result = {"planned": plan(queue, args.query, areas, args.pages, args.per_page, args.min_score)}
+    elif args.command == "work":
+        result = work(queue, args.node, args.fetch_workers, args.lemma_mode, args.batch, args.lease_seconds, args.idle_exit)
+    elif args.command == "status":
+        result = queue.status()
+    else:
+        if not args.output and not args.store:
+            parser.error("укажите --output и/или --store")
+        result = export(queue, args.output, args.store, args.classifier)
+    print(json.dumps(result, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Классификация ролей через сходство эмбеддингов.
+
+Zero-shot NLI (BART) делает проход модели на каждую пару (вакансия, метка) —
+число меток умножает стоимость. Здесь вакансия кодируется компактным
+мультиязычным энкодером один раз, а метки — заранее посчитанные прототипы
+(название направления + его ключевые слова из CATEGORIES), которые кэшируются
+на диске. Категория — прототип с наибольшим косинусным сходством.
+
+Эмбеддинги вакансий сохраняются в SQLite (рядом с хранилищем текстов) по хэшу
+текста и модели: повторный сбор или загрузка тех же вакансий энкодер не вызывает.
+
+Нужен пакет sentence-transformers; без него бэкенд не предлагается.
+"""
+import hashlib
+import importlib.util
+import os
+import sqlite3
+import tempfile
+import threading
+
+import numpy as np
+
+from main_page.data import CATEGORIES
+from main_page.role_model import ROLE_LABELS
+from main_page.text_store import FETCH_BATCH, TEXT_STORE_PATH
+
+ENCODER_MODEL = os.environ.get("HH_EMBED_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+PROTOTYPE_CACHE_DIR = os.environ.get("HH_EMBED_CACHE", os.path.join(tempfile.gettempdir(), "hh_label_embeddings"))
+ENCODE_BATCH = 32
+# Сколько ключевых слов направления идёт в его прототип
+PROTOTYPE_KEYWORDS = 25
+# Ниже этого сходства с лучшим прототипом — "Other"
+MIN_SIMILARITY = 0.25
+# Энкодер всё равно обрезает длинный текст (max_seq_length) — не гоняем лишнее
+MAX_CHARS = 2000
+
+
+def encoder_available() -> bool:
+    return importlib.util.find_spec("sentence_transformers") is not None
+
+
+def prototype_texts() -> dict:
+    """{метка: текст прототипа} — название направления и его ключевые слова."""
+    return {
+        label: f"{label}: " + ", ".join(CATEGORIES[label][:PROTOTYPE_KEYWORDS])
+        for label in ROLE_LABELS if label in CATEGORIES
+    }
+
+
+def _text_key(text, model_name):
+    return hashlib.sha1(f"{model_name}\n{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Эмбеддинги вакансий в SQLite: ключ — sha1(модель + текст), значение — float32."""
+
+    def __init__(self, path=TEXT_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS embeddings (text_key TEXT PRIMARY KEY, vector BLOB)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys) -> dict:
+        conn = self._conn()
+        found = {}
+        for start in range(0, len(keys), FETCH_BATCH):
+            batch = keys[start:start + FETCH_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            for key, blob in conn.execute(
+                f"SELECT text_key, vector FROM embeddings WHERE text_key IN ({placeholders})", batch
+            ):
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items):
+        conn = self._conn()
+        conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (text_key, vector) VALUES (?, ?)",
+            ((key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items),
+        )
+        conn.commit()
+
+
+class EmbeddingRoleClassifier:
+    def __init__(self, encoder=None, model_name=ENCODER_MODEL, cache=None):
+        if encoder is None:
+            from sentence_transformers import SentenceTransformer
+            encoder = SentenceTransformer(model_name)
+        self.encoder = encoder
+        self.model_name = model_name
+        self.cache = cache or EmbeddingCache()
+        self.labels, self.prototypes = self._load_prototypes()
+        self.encoded = 0
+        self.cached = 0
+
+    def _encode(self, texts) -> np.ndarray:
+        vectors = self.encoder.encode(texts, batch_size=ENCODE_BATCH, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def _load_prototypes(self):
+        """Эмбеддинги меток: считаются один раз на (модель, тексты прототипов) и лежат в .npy."""
+        prototypes = prototype_texts()
+        labels = list(prototypes)
+        key = _text_key("\n".join(prototypes.values()), self.model_name)[:16]
+        path = os.path.join(PROTOTYPE_CACHE_DIR, f"labels_{key}.npy")
+        if os.path.exists(path):
+            return labels, np.load(path)
+        vectors = self._encode(list(prototypes.values()))
+        os.makedirs(PROTOTYPE_CACHE_DIR, exist_ok=True)
+        np.save(path, vectors)
+        return labels, vectors
+
+    def embed(self, texts) -> np.ndarray:
+        """Эмбеддинги текстов: из кэша, недостающие — одним проходом энкодера."""
+        texts = [str(t)[:MAX_CHARS] for t in texts]
+        keys = [_text_key(t, self.model_name) for t in texts]
+        found = self.cache.get_many(list(set(keys)))
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+        if missing:
+            by_key = dict(zip(keys, texts))
+            vectors = self._encode([by_key[k] for k in missing])
+            new = dict(zip(missing, vectors))
+            self.cache.put_many(new.items())
+            found.update(new)
+        self.encoded += len(missing)
+        self.cached += len(keys) - len(missing)
+        return np.vstack([found[k] for k in keys]) if keys else np.zeros((0, self.prototypes.shape[1]), np.float32)
+
+    def predict(self, titles, descriptions) -> list:
+        texts = [f"{title}. {desc}" if isinstance(desc, str) and desc else str(title)
+                 for title, desc in zip(titles, descriptions)]
+        similarity = self.embed(texts) @ self.prototypes.T
+        best = similarity.argmax(axis=1) if len(texts) else []
+        return [self.labels[i] if similarity[row, i] >= MIN_SIMILARITY else "Other"
+                for row, i in enumerate(best)]
@@ -0,0 +1,160 @@
+"""
+Потоковый экспорт вакансий в CSV и Excel.
+
+Строки обрабатываются пачками по EXPORT_BATCH_ROWS, поэтому потребление памяти
+не зависит от размера выборки. CSV по-настоящему потоковый: каждая пачка
+кодируется и сразу уходит клиенту. xlsx буферизуется: zip-архив собирается
+только при сохранении книги, поэтому строки сначала пишутся write-only листом
+openpyxl во временный файл на диске, и первые байты появляются, когда записана
+вся книга (память при этом всё равно не растёт).
+Генераторы `iter_*_bytes` подходят и для Flask `Response`, и для записи в файл.
+"""
+import csv
+import io
+import itertools
+import math
+import tempfile
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+from main_page.instrumentation import timed
+
+EXPORT_BATCH_ROWS = 1000
+CHUNK_SIZE = 64 * 1024
+# До этого размера временный xlsx живёт в памяти, дальше уходит на диск
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+CSV_MIMETYPE = "text/csv"
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+UTF8_BOM = b"\xef\xbb\xbf"
+
+
+def iter_row_batches(rows, columns=None, batch_size=EXPORT_BATCH_ROWS):
+    """
+    Нарезает DataFrame или итерируемое словарей на пачки кортежей.
+    Возвращает (columns, generator) — колонки известны до первой пачки.
+    """
+    if isinstance(rows, pd.DataFrame):
+        selected = columns is not None
+        columns = list(columns if selected else rows.columns)
+
+        def frame_batches():
+            # Колонки выбираем в каждой пачке: rows[columns] целиком скопировал бы всю выборку
+            for start in range(0, len(rows), batch_size):
+                batch = rows.iloc[start:start + batch_size]
+                if selected:
+                    batch = batch[columns]
+                yield list(batch.itertuples(index=False, name=None))
+
+        return columns, frame_batches()
+
+    rows = iter(rows)
+    if columns is None:
+        first = next(rows, None)
+        if first is None:
+            return [], iter(())
+        columns = list(first.keys())
+        rows = itertools.chain([first], rows)
+    columns = list(columns)
+
+    def dict_batches():
+        while True:
+            batch = [tuple(row.get(c) for c in columns) for row in itertools.islice(rows, batch_size)]
+            if not batch:
+                return
+            yield batch
+
+    return columns, dict_batches()
+
+
+def _cell_value(value):
+    """Приводит значение к виду, который понимают и csv, и openpyxl."""
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, (list, tuple, set)):
+        return ", ".join(str(v) for v in value)
+    if isinstance(value, str):
+        # openpyxl падает на управляющих символах из HTML-описаний
+        return ILLEGAL_CHARACTERS_RE.sub("", value)
+    if hasattr(value, "item"):  # numpy-скаляры
+        return value.item()
+    return value
+
+
+def iter_csv_bytes(rows, columns=None, sep=";", bom=True, batch_size=EXPORT_BATCH_ROWS):
+    """CSV в UTF-8 (с BOM для Excel), по одной пачке строк за раз."""
+    columns, batches = iter_row_batches(rows, columns, batch_size)
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter=sep, lineterminator="\n")
+    writer.writerow(columns)
+    head = buf.getvalue().encode("utf-8")
+    yield (UTF8_BOM + head) if bom else head
+
+    for batch in batches:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows([_cell_value(v) for v in row] for row in batch)
+        yield buf.getvalue().encode("utf-8")
+
+
+def iter_xlsx_bytes(rows, columns=None, sheet_title="Vacancies", batch_size=EXPORT_BATCH_ROWS):
+    """
+    xlsx через write-only лист. Буферизуется: строки уходят во временный файл,
+    а куски по CHUNK_SIZE отдаются только после сохранения всей книги.
+    """
+    columns, batches = iter_row_batches(rows, columns, batch_size)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title)
+    ws.append(columns)
+    for batch in batches:
+        for row in batch:
+            ws.append([_cell_value(v) for v in row])
+
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as tmp:
+        wb.save(tmp)
+        tmp.seek(0)
+        while True:
+            chunk = tmp.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _write_chunks(chunks, path_or_file):
+    if hasattr(path_or_file, "write"):
+        for chunk in chunks:
+            path_or_file.write(chunk)
+        return path_or_file
+    with open(path_or_file, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return path_or_file
+
+
+@timed("export", fmt="csv")
+def write_csv(rows, path_or_file, **kwargs):
+    return _write_chunks(iter_csv_bytes(rows, **kwargs), path_or_file)
+
+
+@timed("export", fmt="xlsx")
+def write_xlsx(rows, path_or_file, **kwargs):
+    return _write_chunks(iter_xlsx_bytes(rows, **kwargs), path_or_file)
+
+
+def export_bytes(rows, fmt="xlsx", **kwargs):
+    """
+    Готовый файл экспорта в виде bytes — для `st.download_button`, который
+    всё равно держит файл в памяти целиком. Промежуточные копии (DataFrame,
+    ExcelWriter) при этом не создаются: пишем пачками во временный файл.
+    """
+    writer = write_csv if fmt == "csv" else write_xlsx
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as tmp:
+        writer(rows, tmp, **kwargs)
+        tmp.seek(0)
+        return tmp.read()
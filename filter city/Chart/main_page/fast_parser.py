@@ -2,10 +2,13 @@ import streamlit as st
 import pandas as pd
 import asyncio
 import aiohttp
-import requests
 import time
 import re
+from html import unescape
 from bs4 import BeautifulSoup
+from main_page.export_stream import export_bytes
+from main_page.schema import apply_schema
+from main_page.instrumentation import inc, span, timed
 
 # --- КОНФИГУРАЦИЯ ---
 CITY_MAP = {
@@ -21,12 +24,24 @@ HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8"
 }
 BASE_URL = "https://api.hh.ru/vacancies"
+CITY_NAMES = {c_id: name for name, c_id in CITY_MAP.items()}
+EXPERIENCE_SLICES = ["noExperience", "between1And3", "between3And6", "moreThan6"]
+# HH отдаёт не больше 2000 вакансий на срез: 20 страниц по 100
+LISTING_PER_PAGE = 100
+LISTING_MAX_PAGES = 20
+# Одновременных запросов выдачи (описания — отдельный семафор на 40)
+LISTING_CONCURRENCY = 10
+# Счётчик загруженных описаний обновляем раз в столько описаний
+PROGRESS_EVERY = 50
+# Во фрагментах выдачи из разметки только <highlighttext> — хватает регулярки
+TAG_RE = re.compile(r"<[^>]+>")
 
 if 'final_df' not in st.session_state:
     st.session_state['final_df'] = None
 
 # --- ФУНКЦИИ ОЧИСТКИ ---
 
+@timed("html_extract")
 def clean_text_structure(html_content):
     """Превращает HTML в чистый текст с сохранением структуры блоков"""
     if not html_content: return ""
@@ -37,6 +52,21 @@ def clean_text_structure(html_content):
     text = re.sub(r'\s+', ' ', text)
     return text.strip()
 
+def snippet_text(*parts):
+    """Фрагменты описания из выдачи одной строкой: без тегов подсветки и лишних пробелов."""
+    text = unescape(TAG_RE.sub(" ", " ".join(filter(None, parts))))
+    return " ".join(text.split())
+
+def duplicate_key(name, employer, snippet):
+    """
+    Ключ «та же вакансия в другом городе»: название, работодатель и фрагменты описания
+    из выдачи совпадают точно (без учёта регистра и пробелов). Фрагменты короткие, поэтому
+    похожие, но не одинаковые не склеиваем; без фрагментов — не склеиваем вовсе.
+    """
+    if not snippet:
+        return None
+    return tuple(" ".join(str(part or "").lower().split()) for part in (name, employer, snippet))
+
 # --- АСИНХРОННЫЙ ДВИЖОК ---
 
 async def fetch_details_stable(session, v_id, url, semaphore):
@@ -45,76 +75,143 @@ async def fetch_details_stable(session, v_id, url, semaphore):
         res = {"id": v_id, "full_description": "Не удалось загрузить", "key_skills": ""}
         try:
             # 1. ПЫТАЕМСЯ ЧЕРЕЗ API (Самый надежный способ для данных)
-            async with session.get(f"{BASE_URL}/{v_id}", headers=HEADERS, timeout=5) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    res["key_skills"] = ", ".join([s.get('name') for s in data.get('key_skills', [])])
-                    api_desc = data.get('description')
-                    if api_desc:
-                        res["full_description"] = clean_text_structure(api_desc)
-                        return res # Если API дало текст, уходим
+            with span("http_fetch", target="api"):
+                async with session.get(f"{BASE_URL}/{v_id}", headers=HEADERS, timeout=5) as resp:
+                    inc("http_responses", target="api", status=resp.status)
+                    data = await resp.json() if resp.status == 200 else None
+            if data:
+                res["key_skills"] = ", ".join([s.get('name') for s in data.get('key_skills', [])])
+                api_desc = data.get('description')
+                if api_desc:
+                    res["full_description"] = clean_text_structure(api_desc)
+                    return res # Если API дало текст, уходим
 
             # 2. FALLBACK: ПРЯМОЙ ПАРСИНГ HTML (если API вернуло пустоту или ошибку)
-            async with session.get(url, headers=HEADERS, timeout=5) as resp:
-                if resp.status == 200:
-                    html = await resp.text()
+            with span("http_fetch", target="html"):
+                async with session.get(url, headers=HEADERS, timeout=5) as resp:
+                    inc("http_responses", target="html", status=resp.status)
+                    html = await resp.text() if resp.status == 200 else None
+            if html:
+                with span("html_extract", source="page"):
                     soup = BeautifulSoup(html, "html.parser")
                     # Ищем именно твой блок
                     block = soup.find("div", {"data-qa": "vacancy-description"}) or \
                             soup.find("div", class_="g-user-content")
-                    if block:
-                        res["full_description"] = clean_text_structure(str(block))
+                if block:
+                    res["full_description"] = clean_text_structure(str(block))
         except:
-            pass
+            inc("http_responses", target="details", status="error")
         return res
 
-async def run_enrichment(df):
-    semaphore = asyncio.Semaphore(40) # 40 одновременных запросов - оптимально
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch_details_stable(session, row['id'], row['url'], semaphore) for _, row in df.iterrows()]
-        return await asyncio.gather(*tasks)
-
 # --- БАЗОВЫЙ СБОР ---
 
+async def fetch_listing_page(session, params, semaphore):
+    """Одна страница выдачи (JSON целиком — нужны items и pages); None при ошибке."""
+    async with semaphore:
+        try:
+            with span("http_fetch", target="listing"):
+                async with session.get(BASE_URL, params=params, headers=HEADERS, timeout=10) as resp:
+                    inc("http_responses", target="listing", status=resp.status)
+                    return await resp.json() if resp.status == 200 else None
+        except Exception:
+            inc("http_responses", target="listing", status="error")
+            return None
+
+async def list_slice(session, query, c_id, exp, semaphore, on_items):
+    """Срез город × опыт: страница 0 сообщает число страниц (pages), остальные — параллельно."""
+    # Используем period=30 чтобы вытащить максимум за месяц
+    params = {"text": query, "area": c_id, "per_page": LISTING_PER_PAGE, "experience": exp, "period": 30}
+    first = await fetch_listing_page(session, {**params, "page": 0}, semaphore)
+    if not first or not first.get("items"):
+        return
+    on_items(first["items"], c_id)
+    pages = min(first.get("pages") or 1, LISTING_MAX_PAGES)
+    rest = [fetch_listing_page(session, {**params, "page": page}, semaphore) for page in range(1, pages)]
+    for next_page in asyncio.as_completed(rest):
+        data = await next_page
+        if data and data.get("items"):
+            on_items(data["items"], c_id)
+
+async def collect_vacancies(query, city_ids, progress=None):
+    """
+    Выдача по всем срезам город × опыт и загрузка описаний — на одной сессии.
+    Описание начинает качаться, как только вакансия пришла в выдаче, не дожидаясь
+    остальных страниц; для точных повторов (duplicate_key) — один раз на группу.
+    Возвращает (вакансии выдачи с duplicate_of, описания представителей).
+    """
+    vacancies, seen_ids = [], set()
+    representatives = {}
+    detail_tasks = []
+    loaded = 0
+    listing_semaphore = asyncio.Semaphore(LISTING_CONCURRENCY)
+    details_semaphore = asyncio.Semaphore(40)
+
+    async with aiohttp.ClientSession() as session:
+        def report():
+            if progress:
+                progress(len(vacancies), len(detail_tasks), loaded)
+
+        def on_detail_done(task):
+            # Описания докачиваются и после конца выдачи — счётчик двигается по ним
+            nonlocal loaded
+            loaded += 1
+            if loaded % PROGRESS_EVERY == 0 or loaded == len(detail_tasks):
+                report()
+
+        def on_items(items, c_id):
+            c_name = CITY_NAMES[c_id]
+            for it in items:
+                if it.get("id") in seen_ids:
+                    continue
+                seen_ids.add(it.get("id"))
+                s = it.get("salary") or {}
+                snippet = it.get("snippet") or {}
+                vacancy = {
+                    "id": it.get("id"), "city": c_name, "name": it.get("name"),
+                    "url": it.get("alternate_url"), "employer": (it.get("employer") or {}).get("name"),
+                    "salary_from": s.get("from"), "experience": (it.get("experience") or {}).get("name"),
+                    # Фрагменты описания из выдачи — по ним узнаём повторы до загрузки описаний
+                    "snippet": snippet_text(snippet.get("requirement"), snippet.get("responsibility"))
+                }
+                # Одна и та же вакансия в разных городах: описание грузим один раз на группу
+                key = duplicate_key(vacancy["name"], vacancy["employer"], vacancy["snippet"])
+                vacancy["duplicate_of"] = representatives.setdefault(key, vacancy["id"]) if key else vacancy["id"]
+                if vacancy["duplicate_of"] == vacancy["id"]:
+                    task = asyncio.create_task(fetch_details_stable(session, vacancy["id"], vacancy["url"], details_semaphore))
+                    task.add_done_callback(on_detail_done)
+                    detail_tasks.append(task)
+                vacancies.append(vacancy)
+            report()
+
+        await asyncio.gather(*(
+            list_slice(session, query, c_id, exp, listing_semaphore, on_items)
+            for c_id in city_ids for exp in EXPERIENCE_SLICES
+        ))
+        details = await asyncio.gather(*detail_tasks)
+    return vacancies, details
+
 def get_total_data(query, city_ids):
-    all_vacs = []
     status = st.empty()
-    
-    exp_list = ["noExperience", "between1And3", "between3And6", "moreThan6"]
-    
-    for c_id in city_ids:
-        c_name = [n for n, i in CITY_MAP.items() if i == c_id][0]
-        status.info(f"🔎 Собираем список вакансий: {c_name}")
-        
-        for exp in exp_list:
-            # Используем period=30 чтобы вытащить максимум за месяц
-            for page in range(20):
-                params = {"text": query, "area": c_id, "per_page": 100, "page": page, "experience": exp, "period": 30}
-                try:
-                    r = requests.get(BASE_URL, params=params, headers=HEADERS)
-                    items = r.json().get("items", [])
-                    if not items: break
-                    for it in items:
-                        s = it.get("salary") or {}
-                        all_vacs.append({
-                            "id": it.get("id"), "city": c_name, "name": it.get("name"),
-                            "url": it.get("alternate_url"), "employer": it.get("employer", {}).get("name"),
-                            "salary_from": s.get("from"), "experience": it.get("experience", {}).get("name")
-                        })
-                except: break
-
-    df = pd.DataFrame(all_vacs).drop_duplicates(subset=['id'])
-    
-    # Запуск асинхронного обогащения
-    status.warning(f"🚀 Глубокий парсинг описаний для {len(df)} вакансий...")
+    started = time.perf_counter()
+
+    def progress(found, unique, loaded):
+        status.info(f"🔎 Выдача: {found} вакансий ({unique} уникальных) | 🚀 описаний загружено: {loaded}")
+
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
-    details = loop.run_until_complete(run_enrichment(df))
-    
-    details_df = pd.DataFrame(details)
-    final = pd.merge(df, details_df, on='id', how='left')
-    status.success(f"✅ Сбор завершен! Найдено: {len(final)}")
-    return final
+    vacancies, details = loop.run_until_complete(collect_vacancies(query, city_ids, progress))
+
+    df = pd.DataFrame(vacancies)
+    if df.empty:
+        status.error("Вакансии не найдены")
+        return None
+
+    # Результаты представителя раздаём всем вакансиям его группы
+    details_df = pd.DataFrame(details).rename(columns={'id': 'duplicate_of'})
+    final = pd.merge(df, details_df, on='duplicate_of', how='left')
+    saved = len(df) - len(details_df)
+    status.success(f"✅ Сбор завершен за {time.perf_counter() - started:.0f} с! Найдено: {len(final)} | Повторов в других городах: {saved} (сэкономлено {saved} загрузок описаний)")
+    return apply_schema(final)
 
 # --- UI ---
 st.set_page_config(page_title="Stable HH Parser", layout="wide")
@@ -131,6 +228,6 @@ if st.session_state['final_df'] is not None:
     data = st.session_state['final_df']
     st.dataframe(data, use_container_width=True)
     
-    # Скачивание с правильной кодировкой
-    csv = data.to_csv(index=False, sep=';', encoding='utf-8-sig').encode('utf-8-sig')
+    # Скачивание с правильной кодировкой (UTF-8 с BOM, пишется пачками во временный файл)
+    csv = export_bytes(data, fmt="csv", sep=';')
     st.download_button("📥 Скачать CSV для Excel", csv, "hh_stable_data.csv", "text/csv", use_container_width=True)
\ No newline at end of file
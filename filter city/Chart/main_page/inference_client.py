@@ -0,0 +1,55 @@
+"""
+Клиент локального воркера инференса (use model/inference_worker.py).
+
+Модель zero-shot держит воркер, клиенты только шлют тексты по HTTP.
+Адрес — HH_INFERENCE_URL (по умолчанию http://127.0.0.1:8765).
+"""
+import os
+
+import requests
+
+INFERENCE_URL = os.environ.get("HH_INFERENCE_URL", "http://127.0.0.1:8765")
+TIMEOUT = 300
+# Сколько текстов в одном HTTP-запросе (батчи для модели воркер собирает сам)
+REQUEST_CHUNK = 64
+WORKER_COMMAND = 'python "use model/inference_worker.py"'
+
+
+class InferenceClient:
+    def __init__(self, url=INFERENCE_URL, timeout=TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def available(self) -> bool:
+        try:
+            return self.session.get(f"{self.url}/health", timeout=1).status_code == 200
+        except requests.RequestException:
+            return False
+
+    def classify(self, texts, labels, multi_label=False) -> list:
+        """[{"labels": [...], "scores": [...]}] — метки по убыванию уверенности, как у pipeline."""
+        texts = list(texts)
+        results = []
+        for start in range(0, len(texts), REQUEST_CHUNK):
+            response = self.session.post(
+                f"{self.url}/classify",
+                json={"texts": texts[start:start + REQUEST_CHUNK], "labels": list(labels), "multi_label": multi_label},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            results.extend(response.json()["results"])
+        return results
+
+    def metrics(self) -> dict:
+        return self.session.get(f"{self.url}/metrics", timeout=2).json()
+
+
+_client = None
+
+
+def get_client() -> InferenceClient:
+    global _client
+    if _client is None:
+        _client = InferenceClient()
+    return _client
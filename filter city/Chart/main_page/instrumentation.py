@@ -0,0 +1,241 @@
+"""
+Инструментирование этапов сбора и обработки: именованные спаны и счётчики.
+
+    with span("http_fetch", target="api"):
+        ...
+    inc("http_responses", target="api", status=200)
+
+    @timed("skill_match")
+    def extract_skills(...): ...
+
+Спан пишет длительность в гистограмму stage_seconds{stage=..., метки}, счётчики —
+просто суммы. Всё агрегируется в памяти процесса (общие для всех сессий Streamlit)
+и выгружается как JSON (`snapshot`) или текст Prometheus (`to_prometheus`);
+смотреть — страница «Диагностика».
+
+HH_METRICS=0 выключает сбор: span отдаёт общий пустой контекст, inc сразу
+возвращается — накладные расходы на вызов ~ одна проверка флага.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from functools import wraps
+
+ENABLED = os.environ.get("HH_METRICS", "1") != "0"
+# Границы корзин гистограмм, секунды (как у клиентов Prometheus по умолчанию)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_METRIC = "stage_seconds"
+PROMETHEUS_PREFIX = "hh_"
+
+_NOOP = nullcontext()
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        # Последняя корзина — +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Оценка квантиля по корзинам — линейно внутри корзины, как histogram_quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen, lower = 0, 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return min(lower + (bound - lower) * (rank - seen) / count, self.max)
+            seen += count
+            lower = bound
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "max": round(self.max, 6),
+            "buckets": {str(b): c for b, c in zip(self.buckets + ("+Inf",), self.counts)},
+        }
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.time()
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def span(self, stage, **labels):
+        """Длительность блока -> stage_seconds{stage=..., метки}; исключение помечается error=1."""
+        return _Span(self, stage, labels)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+    def snapshot(self) -> dict:
+        """JSON-совместимый срез: счётчики и гистограммы с метками."""
+        with self._lock:
+            counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in sorted(self.counters.items())]
+            histograms = [{"name": n, "labels": dict(l), **h.to_dict()} for (n, l), h in sorted(self.histograms.items())]
+        return {"enabled": ENABLED, "uptime_s": round(time.time() - self.started), "counters": counters, "histograms": histograms}
+
+    def to_prometheus(self) -> str:
+        """Текстовый формат экспозиции Prometheus."""
+        def fmt_labels(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = [(key, h.counts[:], h.buckets, h.sum, h.count) for key, h in sorted(self.histograms.items())]
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f"{PROMETHEUS_PREFIX}{name}_total"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            lines.append(f"{metric}{fmt_labels(labels)} {value}")
+        for (name, labels), counts, buckets, total, count in histograms:
+            metric = f"{PROMETHEUS_PREFIX}{name}"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} histogram")
+                declared.add(metric)
+            cumulative = 0
+            for bound, c in zip(buckets + ("+Inf",), counts):
+                cumulative += c
+                lines.append(f"{metric}_bucket{fmt_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{metric}_sum{fmt_labels(labels)} {total:.6f}")
+            lines.append(f"{metric}_count{fmt_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+class _Span:
+    # Класс, а не @contextmanager: вход/выход в разы дешевле генератора
+    __slots__ = ("registry", "stage", "labels", "started")
+
+    def __init__(self, registry, stage, labels):
+        self.registry = registry
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.labels["error"] = 1
+        self.registry.observe(STAGE_METRIC, time.perf_counter() - self.started, stage=self.stage, **self.labels)
+        return False
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> Registry:
+    """Один реестр на процесс."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = Registry()
+    return _registry
+
+
+def set_enabled(enabled: bool):
+    global ENABLED
+    ENABLED = bool(enabled)
+
+
+def span(stage, **labels):
+    if not ENABLED:
+        return _NOOP
+    return get_registry().span(stage, **labels)
+
+
+def inc(name, value=1, **labels):
+    if ENABLED:
+        get_registry().inc(name, value, **labels)
+
+
+def timed(stage, **labels):
+    """Декоратор: каждый вызов функции — спан stage."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with get_registry().span(stage, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def stage_summary() -> list:
+    """Строки для таблицы: этап, метки, вызовы, суммарное/среднее/p95 время."""
+    rows = []
+    for h in get_registry().snapshot()["histograms"]:
+        if h["name"] != STAGE_METRIC:
+            continue
+        labels = dict(h["labels"])
+        stage = labels.pop("stage", "")
+        rows.append({
+            "stage": stage,
+            "labels": ", ".join(f"{k}={v}" for k, v in sorted(labels.items())),
+            "calls": h["count"],
+            "total_s": round(h["sum"], 3),
+            "mean_ms": round(h["mean"] * 1000, 2),
+            "p95_ms": round(h["p95"] * 1000, 2),
+            "max_ms": round(h["max"] * 1000, 2),
+        })
+    return sorted(rows, key=lambda r: -r["total_s"])
+
+
+def format_summary() -> str:
+    """Текстовая сводка по этапам — для консольных скриптов."""
+    rows = stage_summary()
+    if not rows:
+        return "Метрик нет (HH_METRICS=0 или ничего не выполнялось)"
+    lines = [f"{'этап':<24}{'метки':<28}{'вызовов':>9}{'всего, с':>11}{'ср., мс':>10}{'p95, мс':>10}"]
+    for r in rows:
+        lines.append(f"{r['stage']:<24}{r['labels']:<28}{r['calls']:>9}{r['total_s']:>11}{r['mean_ms']:>10}{r['p95_ms']:>10}")
+    return "\n".join(lines)
@@ -1,112 +1,19 @@
 import streamlit as st
 import pandas as pd
-import requests
 import time
-from bs4 import BeautifulSoup
-from io import BytesIO
-from natasha import Segmenter, MorphVocab, NewsEmbedding, NewsMorphTagger, Doc
-import re
-from main_page.data import SKILL_MAP, CATEGORIES, PRIORITY
+from collections import Counter
+from main_page.nlp import LEMMA_MODE, clean_and_lemmatize, extract_skills_raw
+from main_page.classifiers import CLASSIFIER_BACKENDS, available_backends, classify_roles
 from main_page.setting.city_to_id import CITY_TO_ID
-
-# =========================================================
-# 1. НАСТРОЙКА NLP (NATASHA) И СЛОВАРЬ ТЕХНОЛОГИЙ
-# =========================================================
-segmenter = Segmenter()
-morph_vocab = MorphVocab()
-emb = NewsEmbedding()
-tagger = NewsMorphTagger(emb)
-
-# SKILL_MAP = {}
-
-def clean_and_lemmatize(text):
-    # Если текст пустой, NaN или не строка — возвращаем пустую строку
-    if pd.isna(text) or not isinstance(text, str) or not text.strip():
-        return ""
-    
-    # Теперь безопасно вызываем .lower() и замены
-    clean_text = text.lower().replace('-', ' ').replace('/', ' ')
-    
-    doc = Doc(clean_text)
-    doc.segment(segmenter)
-    doc.tag_morph(tagger)
-    for token in doc.tokens:
-        token.lemmatize(morph_vocab)
-    return " ".join([_.lemma for _ in doc.tokens])
-
-def extract_skills(lemmatized_text):
-    if not lemmatized_text: return []
-    
-    # Очистка текста
-    text = lemmatized_text.lower()
-    for char in "()/,[]": text = text.replace(char, " ")
-    
-    # Сюда будем сохранять найденное: { "Languages": ["python"], "Databases": ["sql"] }
-    found_by_category = {cat: [] for cat in SKILL_MAP.keys()}
-    
-    # Собираем все навыки для поиска с привязкой к категории
-    all_skills_to_search = []
-    for category, skills in SKILL_MAP.items():
-        for s in skills:
-            all_skills_to_search.append({"name": s, "cat": category})
-            
-    # Сортируем по длине, чтобы сначала найти C++, а не C
-    all_skills_to_search.sort(key=lambda x: len(x["name"]), reverse=True)
-
-    for skill_item in all_skills_to_search:
-        skill_clean = skill_item["name"].lower()
-        
-        # Паттерн (гибкий для C++ и обычный для SQL)
-        if "++" in skill_clean or "#" in skill_clean:
-            pattern = r"".join([re.escape(char) + r"\s*" for char in skill_clean]).strip()
-        else:
-            pattern = rf"\b{re.escape(skill_clean)}\b"
-        
-        if re.search(pattern, text):
-            found_by_category[skill_item["cat"]].append(skill_item["name"])
-            text = re.sub(pattern, " ", text) # Удаляем найденное из текста
-
-    # ФОРМИРУЕМ ПРИОРИТЕТНЫЙ СПИСОК
-    final_list = []
-    # Идем строго по нашему порядку SKILL_ORDER
-    SKILL_ORDER = ["Languages", "Frameworks", "Databases", "Infrastructure", "Tools", "Methodologies", "Security"]
-    
-    for category in SKILL_ORDER:
-        if category in found_by_category:
-            # Сортируем внутри категории по алфавиту и добавляем в общий список
-            final_list.extend(sorted(found_by_category[category]))
-            
-    return final_list # Теперь список всегда начинается с языков
-
-# =========================================================
-# 2. УСОВЕРШЕНСТВОВАННЫЙ КЛАССИФИКАТОР
-# =========================================================
-# CATEGORIES = {}
-# PRIORITY = []
-
-def classify_vacancy(title, description_lemmatized):
-    # Защита от NaN в заголовке
-    if pd.isna(title) or not isinstance(title, str):
-        title = "без названия"
-        
-    clean_title = clean_and_lemmatize(title)
-    scores = {cat: 0 for cat in CATEGORIES}
-    
-    for category in PRIORITY:
-        for keyword in CATEGORIES[category]:
-            if keyword in clean_title: 
-                scores[category] += 10
-                
-    if max(scores.values()) == 0:
-        # Защита от NaN в описании
-        desc = description_lemmatized if isinstance(description_lemmatized, str) else ""
-        for category in PRIORITY:
-            for keyword in CATEGORIES[category]:
-                if keyword in desc: 
-                    scores[category] += 1
-                    
-    best_cat = max(scores, key=scores.get)
-    return best_cat if scores[best_cat] > 0 else "Other"
+from main_page.export_stream import export_bytes
+from main_page.normalize import normalize_vacancies
+from main_page.aggregates import category_counts, set_dataset
+from main_page.text_store import get_store, iter_rows_with_texts, offload_texts
+from main_page.near_dup import NearDuplicateIndex, collapse, fan_out, near_duplicate_groups, vacancy_text
+from main_page.similarity import index_vacancies, similar_vacancies
+from main_page.search_index import index_for_search, search_vacancies
+from main_page.prefilter import PREFILTER_MIN_SCORE, split_by_relevance
+from main_page.pipeline import fetch_full_description, fetch_listing_page, process_description, vacancy_record
 
 # =========================================================
 # 3. ФУНКЦИИ ПАРСИНГА
@@ -128,57 +35,63 @@ def get_area_id_by_city(city_name: str) -> str:
 
 "wwww"
 
-def fetch_full_description(url):
-    try:
-        r = requests.get(url, headers={"User-Agent": "HH-Parser/1.0"}, timeout=5)
-        soup = BeautifulSoup(r.text, "html.parser")
-        block = soup.find("div", {"data-qa": "vacancy-description"}) or soup.find("div", class_="g-user-content")
-        return block.get_text(separator="\n").strip() if block else ""
-    except: return ""
-
-def start_parsing(text, city_name, max_pages, all_russia):
+def start_parsing(text, city_name, max_pages, all_russia, lemma_mode=LEMMA_MODE, min_score=PREFILTER_MIN_SCORE, classifier="rules"):
     area_id = "1" if all_russia else get_area_id_by_city(city_name)
     all_vacancies = []
+    skipped = 0
+    processing_time = 0.0
+    # Почти-дубликаты скачанного описания (та же вакансия в другом городе) не лемматизируем повторно
+    dedup = NearDuplicateIndex()
+    processed = {}
+    near_duplicates = 0
     status_container = st.empty()
     progress_bar = st.progress(0)
 
     for page in range(max_pages):
-        params = {"text": text, "area": area_id, "per_page": 20, "page": page}
         try:
-            res = requests.get("https://api.hh.ru/vacancies", params=params)
-            if res.status_code != 200: break
-            items = res.json().get("items", [])
+            items = fetch_listing_page(text, area_id, page, per_page=20)
             if not items: break
 
+            # Нерелевантные по данным выдачи не скачиваем и не лемматизируем
+            items, dropped = split_by_relevance(items, min_score)
+            skipped += len(dropped)
+
             for item in items:
+                started = time.perf_counter()
                 name = item.get("name")
                 url = item.get("alternate_url")
                 status_container.info(f"🛰️ Регион: {'Россия' if all_russia else city_name} | Анализ: {name[:30]}...")
                 
                 desc = fetch_full_description(url)
-                desc_lemmatized = clean_and_lemmatize(desc)
-                salary = item.get("salary")
-                found_skills = extract_skills(desc_lemmatized)
-                
-                all_vacancies.append({
-                    "name": name,
-                    "category": classify_vacancy(name, desc_lemmatized),
-                    "company": item.get("employer", {}).get("name"),
-                    "salary_from": salary["from"] if salary else None,
-                    "salary_to": salary["to"] if salary else None,
-                    "currency": salary["currency"] if salary else None,
-                    "experience": item.get("experience", {}).get("name", "Не указан"),
-                    "skills": ", ".join(found_skills),
-                    "url": url,
-                    "description": desc,
-                    "lemmatized_content": desc_lemmatized  # НОВАЯ КОЛОНКА
-                })
+                rep = dedup.add(item.get("id"), vacancy_text(name, (item.get("employer") or {}).get("name"), desc)) if desc else None
+                if rep in processed:
+                    near_duplicates += 1
+                    found_skills, desc_lemmatized = processed[rep]
+                else:
+                    # Навыки — по исходному тексту, леммы нужны только классификатору
+                    found_skills, desc_lemmatized = process_description(desc, lemma_mode)
+                    if rep is not None:
+                        processed[rep] = (found_skills, desc_lemmatized)
+                all_vacancies.append(vacancy_record(item, desc, found_skills, desc_lemmatized))
+                processing_time += time.perf_counter() - started
                 time.sleep(0.05)
         except: break
         progress_bar.progress((page + 1) / max_pages)
     
+    # Роли — одним пакетом после сбора (модели быстрее на пачке, чем по одной)
+    df = pd.DataFrame(all_vacancies)
+    if not df.empty:
+        df.insert(2, "category", classify_roles(df["name"], df["lemmatized_content"], classifier, df["description"]))
+
     status_container.success(f"✅ Сбор завершен! Найдено {len(all_vacancies)} вакансий.")
-    return pd.DataFrame(all_vacancies), None
+    if near_duplicates:
+        st.info(f"🔁 Почти-дубликатов (та же вакансия в другом городе): {near_duplicates} — навыки взяты у первой копии без повторного NLP.")
+    if skipped:
+        # Сэкономленное время — по среднему времени обработки (загрузка + NLP) одной вакансии
+        per_vacancy = processing_time / len(all_vacancies) if all_vacancies else 0.0
+        st.info(f"🧹 Отсеяно по данным выдачи: {skipped} (порог — {min_score} техн.). "
+                f"Сэкономлено ≈ {skipped * per_vacancy:.0f} с загрузки описаний и лемматизации.")
+    return df, None
 
 # =========================================================
 # 4. ИНТЕРФЕЙС STREAMLIT
@@ -198,6 +111,18 @@ with st.sidebar:
         
     query_in = st.text_input("Ключевое слово (Стек/Роль)", value="Python")
     limit_in = st.slider("Глубина поиска (страниц)", 1, 50, 5)
+    fast_lemmas = st.checkbox("⚡ Быстрая лемматизация (словарь, без контекстного теггера)", value=LEMMA_MODE == "dictionary")
+    lemma_mode = "dictionary" if fast_lemmas else "tagged"
+    classifier = st.selectbox(
+        "Классификатор ролей", available_backends(), format_func=CLASSIFIER_BACKENDS.get
+    )
+    if classifier == "distilled" and lemma_mode != LEMMA_MODE:
+        # Модель обучена на леммах режима HH_LEMMA_MODE — на других признаки расходятся
+        st.warning(f"Дистиллированная модель обучена на леммах режима «{LEMMA_MODE}» — точность ниже.")
+    # По умолчанию фильтр выключен: экономия загрузок и NLP — только при пороге ≥ 1
+    min_score = st.slider("Мин. технологий в анонсе вакансии (0 — без фильтра)", 0, 5, PREFILTER_MIN_SCORE,
+                          help="Фильтр выключен, пока порог 0. Включите (1–2), чтобы не качать и не лемматизировать "
+                               "вакансии без технологий в названии и анонсе.")
     
     st.divider()
     btn_start = st.button("🚀 Начать сбор данных", use_container_width=True)
@@ -206,49 +131,80 @@ with st.sidebar:
 st.header("🔎 Глобальный мониторинг IT-рынка")
 
 if 'vacancies_df' not in st.session_state:
-    st.session_state['vacancies_df'] = None
+    set_dataset(None)
 if 'selected_cat' not in st.session_state:
     st.session_state['selected_cat'] = "Все"
 
 if btn_start:
-    df_result, err = start_parsing(query_in, city_in, limit_in, all_russia)
+    df_result, err = start_parsing(query_in, city_in, limit_in, all_russia, lemma_mode, min_score, classifier)
     if err: st.error(err)
     else:
-        st.session_state['vacancies_df'] = df_result
+        # Описания и леммы уходят в дисковое хранилище, в сессии — только аналитика
+        set_dataset(offload_texts(normalize_vacancies(df_result)))
+        index_vacancies(st.session_state['vacancies_df'])
+        index_for_search(st.session_state['vacancies_df'])
 
 if st.session_state['vacancies_df'] is not None:
     df = st.session_state['vacancies_df']
     
     # Секция быстрых фильтров-кнопок
-    cat_counts = df["category"].value_counts()
+    cat_counts = category_counts(df)
     st.write("### Быстрые фильтры по направлениям:")
     
     cols = st.columns(6)
     if cols[0].button("🌐 Все вакансии"): 
         st.session_state['selected_cat'] = "Все"
     
-    for i, (cat, count) in enumerate(cat_counts.items()):
+    for i, (cat, count) in enumerate(zip(cat_counts['Category'], cat_counts['Count'])):
         if cols[(i+1) % 6].button(f"{cat}: {count}"):
             st.session_state['selected_cat'] = cat
 
     # Фильтрация и вывод таблицы
     display_df = df if st.session_state['selected_cat'] == "Все" else df[df["category"] == st.session_state['selected_cat']]
+
+    # Полнотекстовый поиск (FTS5): фразы, AND/OR/NOT, префиксы, сортировка по релевантности
+    search_query = st.text_input("🔍 Поиск по вакансиям", placeholder='kafka AND clickhouse, "data engineer", click*')
+    if search_query:
+        display_df = search_vacancies(display_df, search_query)
     
     st.info(f"Отображено: **{st.session_state['selected_cat']}** | Вакансий: **{len(display_df)}**")
-    st.dataframe(
-        display_df.drop(columns=['description']), 
+    table = st.dataframe(
+        display_df.drop(columns=['description'], errors='ignore'), 
         use_container_width=True,
         column_config={
             "url": st.column_config.LinkColumn("Ссылка"),
             "skills": st.column_config.TextColumn("Технологии", width="large")
-        }
+        },
+        on_select="rerun",
+        selection_mode="single-row",
     )
 
-    # Скачивание файла
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False)
-    st.download_button("📥 Скачать базу в Excel", output.getvalue(), f"hh_export_{query_in}.xlsx")
+    # Описание выбранной вакансии подгружаем из хранилища текстов только по клику
+    selected_rows = table.selection.rows
+    if selected_rows:
+        row = display_df.iloc[selected_rows[0]]
+        texts = get_store().get(row['id']) if 'id' in row else None
+        with st.expander(f"📄 {row['name']}", expanded=True):
+            st.write(texts['description'] if texts and texts['description'] else "Описание не сохранено.")
+
+        # Похожие вакансии — TF-IDF по леммам, косинусное сходство
+        if 'id' in row:
+            similar = similar_vacancies(df, row['id'])
+            st.write("### 🧭 Похожие вакансии")
+            if similar.empty:
+                st.caption("Похожих вакансий не найдено.")
+            else:
+                st.dataframe(
+                    similar[[c for c in ['similarity', 'name', 'company', 'category', 'skills', 'url'] if c in similar.columns]],
+                    use_container_width=True,
+                    column_config={
+                        "similarity": st.column_config.ProgressColumn("Сходство", min_value=0.0, max_value=1.0, format="%.2f"),
+                        "url": st.column_config.LinkColumn("Ссылка"),
+                    },
+                )
+
+    # Скачивание файла (потоковая запись во временный файл, тексты подставляются из хранилища пачками)
+    st.download_button("📥 Скачать базу в Excel", export_bytes(iter_rows_with_texts(df)), f"hh_export_{query_in}.xlsx")
     
     
 # =========================================================
@@ -299,23 +255,38 @@ if up_file:
         if st.button("🚀 Запустить полный пересчет", key="analyze_btn"):
             with st.status("🔄 Глубокий анализ 1000+ вакансий...") as status:
                 
-                # ЛЕММАТИЗАЦИЯ С ИНДИКАТОРОМ (важно для больших файлов)
-                st.write("🧠 Работает Natasha (лемматизация)...")
-                # Используем прогресс-бар для наглядности, так как 1000 строк — это долго
-                df_file['lemmatized_content'] = [clean_and_lemmatize(text) for text in df_file['description']]
-                
+                # ПОЧТИ-ДУБЛИКАТЫ: одна вакансия в разных городах обрабатывается один раз
+                companies = df_file['company'] if 'company' in df_file.columns else [None] * len(df_file)
+                reps = near_duplicate_groups(
+                    vacancy_text(n, c, d) for n, c, d in zip(df_file['name'], companies, df_file['description'])
+                )
+                unique, inverse = collapse(reps)
+                uniq_df = df_file.iloc[unique]
+                st.write(f"♻️ Уникальных текстов: {len(unique)} из {len(df_file)} (пропущено дубликатов: {len(df_file) - len(unique)})")
+
+                # НАВЫКИ — СРАЗУ ПО ИСХОДНОМУ ТЕКСТУ (лемматизация для них не нужна)
                 st.write("🔍 Поиск навыков...")
-                df_file['skills_list'] = df_file['lemmatized_content'].apply(extract_skills)
+                df_file['skills_list'] = fan_out((extract_skills_raw(text) for text in uniq_df['description']), inverse)
                 df_file['skills'] = df_file['skills_list'].apply(lambda x: ", ".join(x))
+                top_skills = Counter(s for skills in df_file['skills_list'] for s in skills).most_common(10)
+                st.write("ТОП навыков: " + ", ".join(f"{s} ({c})" for s, c in top_skills))
+                
+                # ЛЕММАТИЗАЦИЯ С ИНДИКАТОРОМ (важно для больших файлов)
+                st.write("🧠 Работает Natasha (лемматизация)...")
+                lemmas = [clean_and_lemmatize(text, lemma_mode) for text in uniq_df['description']]
+                df_file['lemmatized_content'] = fan_out(lemmas, inverse)
                 
                 st.write("🗂️ Классификация ролей...")
-                df_file['category'] = df_file.apply(
-                    lambda row: classify_vacancy(row['name'], row['lemmatized_content']), axis=1
+                # Заголовки внутри кластера могут отличаться (Senior/Middle) — классифицируем каждую строку
+                df_file['category'] = classify_roles(
+                    df_file['name'], df_file['lemmatized_content'], classifier, df_file['description']
                 )
                 
                 status.update(label="✅ Анализ завершен!", state="complete")
 
-            st.session_state['vacancies_df'] = df_file
+            set_dataset(offload_texts(normalize_vacancies(df_file)))
+            index_vacancies(st.session_state['vacancies_df'])
+            index_for_search(st.session_state['vacancies_df'])
             st.rerun()
 
     except Exception as e:
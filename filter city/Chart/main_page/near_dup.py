@@ -0,0 +1,158 @@
+"""
+Поиск почти-дубликатов вакансий (MinHash + LSH).
+
+Работодатели публикуют одну и ту же вакансию во многих городах, с разными id.
+Текст «название + работодатель + описание» режется на шинглы (тройки слов),
+для каждой вакансии считается MinHash-подпись, подписи раскладываются по
+корзинам LSH (banding) — кандидаты в дубликаты находятся без сравнения всех
+пар. Кандидаты проверяются по оценке сходства Жаккара и склеиваются в кластеры.
+
+Дальше тяжёлая работа (загрузка описания, лемматизация, классификация)
+делается для одного представителя кластера и раздаётся остальным.
+"""
+import re
+import zlib
+
+import numpy as np
+
+NUM_PERM = 64
+# 16 полос по 4 строки: порог срабатывания LSH ~ (1/16)^(1/4) = 0.5,
+# окончательно пары отбираются по оценке сходства DUP_THRESHOLD
+LSH_BANDS = 16
+DUP_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+# Простое чуть меньше 2^32: a, b, x < p, поэтому a*x + b < 2^64 и считается в uint64 без переполнения
+HASH_PRIME = 4294967291
+SEED = 42
+
+WORD_RE = re.compile(r"\w+")
+
+_rng = np.random.RandomState(SEED)
+# Коэффициенты хэш-функций (a*x + b) mod p
+_PERM_A = _rng.randint(1, HASH_PRIME, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, HASH_PRIME, size=NUM_PERM, dtype=np.uint64)
+
+
+def vacancy_text(name, employer, description) -> str:
+    return " ".join(str(part) for part in (name, employer, description) if isinstance(part, str) and part)
+
+
+def shingles(text, size=SHINGLE_SIZE) -> np.ndarray:
+    """Хэши (crc32) шинглов из size слов; короткий текст — один шингл целиком."""
+    words = WORD_RE.findall(text.lower())
+    if len(words) < size:
+        grams = {" ".join(words)}
+    else:
+        grams = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+    return hashes % np.uint64(HASH_PRIME)
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM) -> np.ndarray:
+    """Подписи (вакансий × num_perm): минимум (a*x + b) mod p по шинглам."""
+    texts = list(texts)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    a, b = _PERM_A[:num_perm, None], _PERM_B[:num_perm, None]
+    for row, text in enumerate(texts):
+        hashes = shingles(text)
+        signatures[row] = ((a * hashes[None, :] + b) % np.uint64(HASH_PRIME)).min(axis=1)
+    return signatures
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = np.arange(n)
+
+    def find(self, x):
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, x, y):
+        rx, ry = self.find(x), self.find(y)
+        if rx != ry:
+            # Представитель — вакансия, встретившаяся раньше
+            self.parent[max(rx, ry)] = min(rx, ry)
+
+
+def lsh_representatives(signatures, bands=LSH_BANDS, threshold=DUP_THRESHOLD) -> np.ndarray:
+    """
+    Для каждой вакансии — позиция представителя её кластера (первой вакансии кластера).
+    Пары-кандидаты берутся только из общих LSH-корзин.
+    """
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    uf = _UnionFind(n)
+    for band in range(bands):
+        chunk = signatures[:, band * rows:(band + 1) * rows]
+        buckets = {}
+        for i, key in enumerate(map(bytes, chunk)):
+            buckets.setdefault(key, []).append(i)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            first = members[0]
+            for other in members[1:]:
+                if uf.find(first) == uf.find(other):
+                    continue
+                # Оценка Жаккара — доля совпавших позиций подписи
+                if np.mean(signatures[first] == signatures[other]) >= threshold:
+                    uf.union(first, other)
+    return np.array([uf.find(i) for i in range(n)], dtype=np.int64)
+
+
+def near_duplicate_groups(texts, threshold=DUP_THRESHOLD) -> np.ndarray:
+    """Позиции представителей кластеров для списка текстов."""
+    texts = list(texts)
+    if not texts:
+        return np.empty(0, dtype=np.int64)
+    return lsh_representatives(minhash_signatures(texts), threshold=threshold)
+
+
+class NearDuplicateIndex:
+    """
+    Потоковый вариант для вакансий, приходящих по одной (страницы выдачи):
+    новая вакансия сравнивается с представителями уже виденных кластеров через
+    те же корзины LSH. Нужен, чтобы качать описание представителя сразу, не
+    дожидаясь всей выдачи.
+    """
+
+    def __init__(self, bands=LSH_BANDS, threshold=DUP_THRESHOLD):
+        self.bands = bands
+        self.threshold = threshold
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}
+
+    def add(self, key, text):
+        """Ключ представителя кластера для text; если похожих нет — сам key (новый кластер)."""
+        signature = minhash_signatures([text])[0]
+        rows = len(signature) // self.bands
+        band_keys = [bytes(signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+        checked = set()
+        for band, band_key in enumerate(band_keys):
+            for candidate in self.buckets[band].get(band_key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if np.mean(self.signatures[candidate] == signature) >= self.threshold:
+                    return candidate
+        # В корзины кладём только представителей: дубликаты с ними уже сравнивать незачем
+        self.signatures[key] = signature
+        for band, band_key in enumerate(band_keys):
+            self.buckets[band].setdefault(band_key, []).append(key)
+        return key
+
+
+def collapse(representatives):
+    """(позиции уникальных представителей, индекс представителя для каждой строки)."""
+    unique, inverse = np.unique(representatives, return_inverse=True)
+    return unique, inverse
+
+
+def fan_out(values, inverse) -> list:
+    """Результаты, посчитанные для представителей, — на все строки их кластеров."""
+    values = list(values)
+    return [values[i] for i in inverse]
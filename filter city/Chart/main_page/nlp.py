@@ -0,0 +1,232 @@
+"""
+NLP-часть главной страницы: лемматизация (natasha), извлечение навыков,
+классификация вакансий. Вынесено из main.py, чтобы функции можно было
+импортировать без запуска Streamlit-страницы.
+
+Лемматизация идёт через CachedLemmatizer:
+- кэш (словоформа, POS, признаки) -> лемма перед MorphVocab.lemmatize —
+  одни и те же «опыт», «разработки», «знание» не разбираются заново;
+- режим "dictionary" (быстрый, без контекстного теггера): слово без
+  неоднозначности берёт единственную нормальную форму из словаря, для
+  неоднозначных — самый вероятный разбор pymorphy. Леммы совпадают с режимом
+  "tagged" почти полностью (см. benchmarks/lemma_cache_report.py).
+"""
+import os
+import re
+from functools import lru_cache
+
+import pandas as pd
+from natasha import Segmenter, MorphVocab, NewsEmbedding, NewsMorphTagger, Doc
+
+from main_page.data import SKILL_MAP, CATEGORIES, PRIORITY
+from main_page.instrumentation import span, timed
+
+# Размер кэша лемм (записей (словоформа, POS, признаки))
+LEMMA_CACHE_SIZE = 200_000
+# Режим по умолчанию: "tagged" — контекстный теггер + кэш, "dictionary" — только словарь
+LEMMA_MODE = os.environ.get("HH_LEMMA_MODE", "tagged")
+LEMMA_MODES = ("tagged", "dictionary")
+
+# =========================================================
+# 1. НАСТРОЙКА NLP (NATASHA) И СЛОВАРЬ ТЕХНОЛОГИЙ
+# =========================================================
+segmenter = Segmenter()
+morph_vocab = MorphVocab()
+emb = NewsEmbedding()
+tagger = NewsMorphTagger(emb)
+
+
+class CachedLemmatizer:
+    def __init__(self, vocab=morph_vocab, morph_tagger=tagger, max_size=LEMMA_CACHE_SIZE):
+        self.vocab = vocab
+        self.tagger = morph_tagger
+        self.ambiguous_tokens = 0
+        self.dictionary_tokens = 0
+        self._lemma = lru_cache(max_size)(self._lemmatize)
+        self._dictionary_lemma = lru_cache(max_size)(self._lemma_by_dictionary)
+
+    def _lemmatize(self, word, pos, feats):
+        return self.vocab.lemmatize(word, pos, dict(feats))
+
+    def _lemma_by_dictionary(self, word):
+        """(лемма, неоднозначно ли): единственная нормальная форма или самый вероятный разбор."""
+        forms = self.vocab.parse(word)
+        normals = {form.normal for form in forms}
+        return forms[0].normal, len(normals) > 1
+
+    def lemma(self, token):
+        feats = tuple(sorted(token.feats.items())) if token.feats else ()
+        return self._lemma(token.text, token.pos, feats)
+
+    def lemmatize_doc(self, doc, mode=LEMMA_MODE):
+        """Проставляет token.lemma всем токенам документа (после doc.segment)."""
+        if mode not in LEMMA_MODES:
+            raise ValueError(f"Неизвестный режим лемматизации: {mode}")
+        if mode == "dictionary":
+            for token in doc.tokens:
+                token.lemma, ambiguous = self._dictionary_lemma(token.text)
+                self.ambiguous_tokens += ambiguous
+            self.dictionary_tokens += len(doc.tokens)
+        else:
+            doc.tag_morph(self.tagger)
+            for token in doc.tokens:
+                token.lemma = self.lemma(token)
+        return [token.lemma for token in doc.tokens]
+
+    def lemmatize(self, text, mode=LEMMA_MODE):
+        doc = Doc(text)
+        doc.segment(segmenter)
+        return self.lemmatize_doc(doc, mode)
+
+    def stats(self):
+        """Попадания в кэш (в активном режиме) и доля неоднозначных слов — для отчётов."""
+        info = self._lemma.cache_info()
+        dict_info = self._dictionary_lemma.cache_info()
+        hits, misses = info.hits + dict_info.hits, info.misses + dict_info.misses
+        return {
+            "lemma_hits": hits,
+            "lemma_misses": misses,
+            "lemma_hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "cache_size": info.currsize + dict_info.currsize,
+            "ambiguous_share": self.ambiguous_tokens / self.dictionary_tokens if self.dictionary_tokens else 0.0,
+        }
+
+    def clear(self):
+        self._lemma.cache_clear()
+        self._dictionary_lemma.cache_clear()
+        self.ambiguous_tokens = self.dictionary_tokens = 0
+
+
+lemmatizer = CachedLemmatizer()
+
+# SKILL_MAP = {}
+
+def clean_and_lemmatize(text, mode=LEMMA_MODE):
+    # Если текст пустой, NaN или не строка — возвращаем пустую строку
+    if pd.isna(text) or not isinstance(text, str) or not text.strip():
+        return ""
+
+    # Теперь безопасно вызываем .lower() и замены
+    clean_text = text.lower().replace('-', ' ').replace('/', ' ')
+    with span("lemmatize", mode=mode):
+        return " ".join(lemmatizer.lemmatize(clean_text, mode))
+
+# Порядок категорий в итоговом списке навыков (языки — первыми)
+SKILL_ORDER = ["Languages", "Frameworks", "Databases", "Infrastructure", "Tools", "Methodologies", "Security"]
+CYRILLIC = re.compile(r"[а-яё]")
+
+
+def _skill_pattern(skill_clean):
+    # Паттерн (гибкий для C++ и обычный для SQL)
+    if "++" in skill_clean or "#" in skill_clean:
+        return r"".join([re.escape(char) + r"\s*" for char in skill_clean]).strip()
+    return rf"\b{re.escape(skill_clean)}\b"
+
+
+def _inflected_pattern(skill_clean):
+    """
+    Паттерн для кириллического навыка по сырому тексту: каждое русское слово —
+    все его словоформы из словаря («1с предприятие» найдёт и «1с предприятия»).
+    Дефисы в тексте заменены пробелами, поэтому слова разделяем \s+.
+    """
+    parts = []
+    for word in re.split(r"[\s-]+", skill_clean):
+        forms = {word}
+        if word.isalpha() and CYRILLIC.search(word):
+            for parse in morph_vocab.parse(word):
+                forms.update(form.word for form in parse.lexeme)
+        parts.append("(?:" + "|".join(re.escape(f) for f in sorted(forms, key=len, reverse=True)) + ")")
+    return r"\b" + r"\s+".join(parts) + r"\b"
+
+
+def _compile_skill_patterns(raw):
+    # Сортируем по длине, чтобы сначала найти C++, а не C
+    items = sorted(
+        ((skill, category) for category, skills in SKILL_MAP.items() for skill in skills),
+        key=lambda item: len(item[0]), reverse=True,
+    )
+    patterns = []
+    for skill, category in items:
+        skill_clean = skill.lower()
+        pattern = _inflected_pattern(skill_clean) if raw and CYRILLIC.search(skill_clean) else _skill_pattern(skill_clean)
+        patterns.append((skill, category, re.compile(pattern)))
+    return patterns
+
+
+# Паттерны компилируются один раз: по леммам (как раньше) и по сырому тексту
+LEMMA_SKILL_PATTERNS = _compile_skill_patterns(raw=False)
+RAW_SKILL_PATTERNS = _compile_skill_patterns(raw=True)
+
+
+def _find_skills(text, patterns):
+    # Сюда будем сохранять найденное: { "Languages": ["python"], "Databases": ["sql"] }
+    found_by_category = {cat: [] for cat in SKILL_MAP.keys()}
+
+    for skill, category, pattern in patterns:
+        if pattern.search(text):
+            found_by_category[category].append(skill)
+            text = pattern.sub(" ", text) # Удаляем найденное из текста
+
+    # ФОРМИРУЕМ ПРИОРИТЕТНЫЙ СПИСОК
+    final_list = []
+    # Идем строго по нашему порядку SKILL_ORDER
+    for category in SKILL_ORDER:
+        if category in found_by_category:
+            # Сортируем внутри категории по алфавиту и добавляем в общий список
+            final_list.extend(sorted(found_by_category[category]))
+
+    return final_list # Теперь список всегда начинается с языков
+
+
+@timed("skill_match", source="lemmas")
+def extract_skills(lemmatized_text):
+    if not lemmatized_text: return []
+    
+    # Очистка текста
+    text = lemmatized_text.lower()
+    for char in "()/,[]": text = text.replace(char, " ")
+    return _find_skills(text, LEMMA_SKILL_PATTERNS)
+
+
+@timed("skill_match", source="raw")
+def extract_skills_raw(text):
+    """
+    Навыки по исходному описанию, без лемматизации: латинские названия технологий
+    морфология не меняет, а кириллические ищутся по всем словоформам.
+    Очистка — та же, что перед лемматизацией + та же, что в extract_skills.
+    """
+    if pd.isna(text) or not isinstance(text, str) or not text.strip():
+        return []
+    text = text.lower().replace('-', ' ').replace('/', ' ')
+    for char in "()/,[]": text = text.replace(char, " ")
+    return _find_skills(text, RAW_SKILL_PATTERNS)
+
+# =========================================================
+# 2. УСОВЕРШЕНСТВОВАННЫЙ КЛАССИФИКАТОР
+# =========================================================
+# CATEGORIES = {}
+# PRIORITY = []
+
+def classify_vacancy(title, description_lemmatized):
+    # Защита от NaN в заголовке
+    if pd.isna(title) or not isinstance(title, str):
+        title = "без названия"
+        
+    clean_title = clean_and_lemmatize(title)
+    scores = {cat: 0 for cat in CATEGORIES}
+    
+    for category in PRIORITY:
+        for keyword in CATEGORIES[category]:
+            if keyword in clean_title: 
+                scores[category] += 10
+                
+    if max(scores.values()) == 0:
+        # Защита от NaN в описании
+        desc = description_lemmatized if isinstance(description_lemmatized, str) else ""
+        for category in PRIORITY:
+            for keyword in CATEGORIES[category]:
+                if keyword in desc: 
+                    scores[category] += 1
+                    
+    best_cat = max(scores, key=scores.get)
+    return best_cat if scores[best_cat] > 0 else "Other"
@@ -0,0 +1,126 @@
+"""
+Нормализация датафрейма вакансий один раз — в момент, когда данные попадают
+в st.session_state['vacancies_df'] (парсинг или загрузка файла).
+
+Страницы аналитики читают готовые колонки и ничего не пересчитывают на каждом
+rerun:
+- salary_from / salary_to — числа (float, NaN если не указано);
+- salary_from_rub / salary_to_rub — те же суммы в рублях по CURRENCY_TO_RUB
+  (курсы на RATES_AS_OF, свои — через HH_CURRENCY_RATES);
+- salary_to_clean — верхняя граница в рублях, а если её нет — salary_from_rub * 1.2;
+- experience — заполнен ("Не указан"), experience_code — порядковый код (-1 — не указан);
+- skills_list — список навыков из строки skills.
+
+В конце датафрейм приводится к компактной схеме (schema.apply_schema).
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from main_page.schema import apply_schema
+
+EXPERIENCE_ORDER = ["Нет опыта", "От 1 года до 3 лет", "От 3 до 6 лет", "Более 6 лет"]
+EXPERIENCE_UNKNOWN = "Не указан"
+EXPERIENCE_CODES = {label: code for code, label in enumerate(EXPERIENCE_ORDER)}
+
+# Курсы к рублю для валют, которые встречаются в HH API: округлённые курсы ЦБ РФ
+# на DEFAULT_RATES_AS_OF. Актуальные задаются JSON-файлом в HH_CURRENCY_RATES:
+#     {"as_of": "2025-03-01", "source": "ЦБ РФ", "rates": {"USD": 84.5, "EUR": 91.0}}
+# (валюты из файла заменяют встроенные, остальные остаются).
+# Неизвестная валюта -> NaN в *_rub, чтобы не смешивать её с рублями.
+DEFAULT_CURRENCY_TO_RUB = {
+    "RUR": 1.0, "RUB": 1.0,
+    "USD": 90.0, "EUR": 98.0,
+    "KZT": 0.19, "BYR": 28.0, "BYN": 28.0,
+    "UZS": 0.0072, "UAH": 2.2, "KGS": 1.03,
+    "AZN": 53.0, "GEL": 33.0,
+}
+DEFAULT_RATES_AS_OF = "2024-01-01"
+DEFAULT_RATES_SOURCE = "ЦБ РФ, округлённо"
+RATES_FILE = os.environ.get("HH_CURRENCY_RATES")
+
+
+def load_currency_rates(path=RATES_FILE):
+    """(курсы, дата курсов, источник): встроенные курсы, поверх — файл HH_CURRENCY_RATES."""
+    rates = dict(DEFAULT_CURRENCY_TO_RUB)
+    if not path:
+        return rates, DEFAULT_RATES_AS_OF, DEFAULT_RATES_SOURCE
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    try:
+        rates.update({code.upper(): float(rate) for code, rate in data["rates"].items()})
+    except (KeyError, AttributeError, TypeError, ValueError) as e:
+        raise ValueError(f"{path}: ожидается {{'as_of': ..., 'rates': {{'USD': 90.0, ...}}}}") from e
+    return rates, str(data.get("as_of", "дата не указана")), str(data.get("source", os.path.basename(path)))
+
+
+CURRENCY_TO_RUB, RATES_AS_OF, RATES_SOURCE = load_currency_rates()
+
+# Если верхняя граница вилки не указана, считаем её как «от» * 1.2
+SALARY_TO_FALLBACK = 1.2
+
+# Кривые названия колонок из старых выгрузок
+COLUMN_ALIASES = {
+    'experienceatized_co': 'lemmatized_content',
+    'alary_fron': 'salary_from',
+    'employer': 'company',
+}
+
+# По наличию этой колонки страницы понимают, что датафрейм уже нормализован
+NORMALIZED_MARKER = 'experience_code'
+
+
+def split_skills(skills):
+    """Строка 'python, docker' -> ['python', 'docker'] (готовые списки не трогаем)."""
+    if isinstance(skills, list):
+        return skills
+    if not isinstance(skills, str) or not skills.strip():
+        return []
+    return [s.strip() for s in skills.split(',') if s.strip()]
+
+
+def normalize_vacancies(df: pd.DataFrame, rates: dict = None) -> pd.DataFrame:
+    rates = rates or CURRENCY_TO_RUB
+    df = df.rename(columns={k: v for k, v in COLUMN_ALIASES.items() if k in df.columns and v not in df.columns})
+
+    for col in ('salary_from', 'salary_to'):
+        if col not in df.columns:
+            df[col] = np.nan
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype(float)
+
+    # Повторная нормализация уже сжатого датафрейма: категории -> обычные строки
+    for col in ('currency', 'experience', 'category'):
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+
+    if 'currency' not in df.columns:
+        df['currency'] = None
+    currency = df['currency'].astype('string').str.strip().str.upper()
+    # Сумма без валюты — рубли (так ведут себя ручные выгрузки)
+    rate = currency.map(rates).astype(float)
+    rate = rate.where(currency.notna(), 1.0).to_numpy()
+    df['salary_from_rub'] = df['salary_from'].to_numpy() * rate
+    df['salary_to_rub'] = df['salary_to'].to_numpy() * rate
+    df['salary_to_clean'] = df['salary_to_rub'].fillna(df['salary_from_rub'] * SALARY_TO_FALLBACK)
+
+    if 'experience' not in df.columns:
+        df['experience'] = EXPERIENCE_UNKNOWN
+    df['experience'] = df['experience'].fillna(EXPERIENCE_UNKNOWN)
+    df['experience_code'] = df['experience'].map(EXPERIENCE_CODES).fillna(-1).astype('int8')
+
+    if 'category' in df.columns:
+        df['category'] = df['category'].fillna("Other")
+
+    if 'skills' not in df.columns:
+        df['skills'] = ""
+    df['skills_list'] = [split_skills(s) for s in df['skills']]
+    return apply_schema(df)
+
+
+def ensure_normalized(df: pd.DataFrame) -> pd.DataFrame:
+    """Для страниц: нормализует только то, что попало в сессию в обход normalize_vacancies."""
+    if df is None or NORMALIZED_MARKER in df.columns:
+        return df
+    return normalize_vacancies(df)
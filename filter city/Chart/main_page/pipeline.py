@@ -0,0 +1,312 @@
+"""
+Конвейер сбора без Streamlit: выдача HH -> описания -> леммы и навыки -> роли.
+
+Те же этапы, что у кнопки «Начать сбор данных» на главной странице (main.py
+берёт отсюда загрузку выдачи и описаний и обработку одной вакансии), но
+запускается из консоли — для cron и сервера без браузера:
+
+    cd "filter city/Chart"
+    python -m main_page.pipeline -q python -q "data engineer" -a Москва -a 2 --pages 20 \\
+        --fetch-workers 16 --nlp-workers 8 --output nightly.parquet --store
+
+Описания качаются пулом потоков (ожидание сети), лемматизация и навыки —
+пулом процессов (CPU, natasha держит GIL): обе стадии идут одновременно,
+готовое описание сразу уходит на лемматизацию. Почти-дубликат уже скачанного
+описания (та же вакансия в другом городе) на NLP не идёт — навыки и леммы
+берутся у представителя (main_page/near_dup.py). Роли — одним пакетом в конце.
+
+Результат — файл (.parquet / .csv / .xlsx / .json) и/или общее хранилище
+текстов и поисковый индекс (--store), которые видит Streamlit-приложение.
+В stdout — одна строка JSON со статистикой, ход работы — в stderr.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+
+from main_page.classifiers import CLASSIFIER_BACKENDS, classify_roles
+from main_page.instrumentation import get_registry, inc, span
+from main_page.near_dup import NearDuplicateIndex, vacancy_text
+from main_page.nlp import LEMMA_MODE, LEMMA_MODES, clean_and_lemmatize, extract_skills_raw
+from main_page.prefilter import PREFILTER_MIN_SCORE, split_by_relevance
+from main_page.setting.city_to_id import CITY_TO_ID
+
+VACANCIES_URL = "https://api.hh.ru/vacancies"
+USER_AGENT = "HH-Parser/1.0"
+REQUEST_TIMEOUT = 5
+# HH отдаёт не больше 2000 вакансий на запрос: per_page * pages <= 2000
+PER_PAGE = 100
+MAX_RESULTS = 2000
+FETCH_WORKERS = 8
+NLP_WORKERS = os.cpu_count() or 1
+OUTPUT_FORMATS = (".parquet", ".csv", ".xlsx", ".json")
+
+
+def resolve_area(value) -> str:
+    """id региона HH: число как есть, иначе поиск города по названию (None — не найден)."""
+    value = str(value).strip()
+    if value.isdigit():
+        return value
+    return CITY_TO_ID.get(value.lower())
+
+
+def fetch_listing_page(text, area_id, page, per_page=PER_PAGE, session=requests, full=False, **filters):
+    """
+    Вакансии одной страницы выдачи; None — ошибка HH (дальше листать незачем).
+    filters — доп. параметры HH (experience, period...); full=True — весь JSON (нужно поле pages).
+    """
+    params = {"text": text, "area": area_id, "per_page": per_page, "page": page, **filters}
+    with span("http_fetch", target="listing"):
+        res = session.get(VACANCIES_URL, params=params, timeout=REQUEST_TIMEOUT)
+    inc("http_responses", target="listing", status=res.status_code)
+    if res.status_code != 200:
+        return None
+    data = res.json()
+    return data if full else data.get("items", [])
+
+
+def fetch_full_description(url, session=requests):
+    try:
+        with span("http_fetch", target="html"):
+            r = session.get(url, headers={"User-Agent": USER_AGENT}, timeout=REQUEST_TIMEOUT)
+        inc("http_responses", target="html", status=r.status_code)
+        with span("html_extract", source="page"):
+            soup = BeautifulSoup(r.text, "html.parser")
+            block = soup.find("div", {"data-qa": "vacancy-description"}) or soup.find("div", class_="g-user-content")
+            return block.get_text(separator="\n").strip() if block else ""
+    except Exception:
+        inc("http_responses", target="html", status="error")
+        return ""
+
+
+def process_description(description, lemma_mode=LEMMA_MODE):
+    """(навыки, леммы) одного описания. Навыки — по исходному тексту, леммы нужны классификатору."""
+    return extract_skills_raw(description), clean_and_lemmatize(description, lemma_mode)
+
+
+def _process_task(args):
+    # Точка входа процесса-воркера: модели natasha уже загружены при импорте main_page.nlp
+    return process_description(*args)
+
+
+def vacancy_record(item, description, skills, lemmas) -> dict:
+    """Строка датафрейма по вакансии из выдачи и результатам обработки."""
+    salary = item.get("salary")
+    return {
+        "id": item.get("id"),
+        "name": item.get("name"),
+        "company": (item.get("employer") or {}).get("name"),
+        "salary_from": salary["from"] if salary else None,
+        "salary_to": salary["to"] if salary else None,
+        "currency": salary["currency"] if salary else None,
+        "experience": (item.get("experience") or {}).get("name", "Не указан"),
+        "skills": ", ".join(skills),
+        "url": item.get("alternate_url"),
+        "description": description,
+        "lemmatized_content": lemmas,
+    }
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def collect_listing(queries, areas, pages, per_page=PER_PAGE, min_score=0, session=requests):
+    """Выдача по всем (запрос, регион) без повторов id; отсеянные префильтром не возвращаются."""
+    items, seen = [], set()
+    stats = Counter()
+    for query in queries:
+        for area_id in areas:
+            for page in range(pages):
+                try:
+                    page_items = fetch_listing_page(query, area_id, page, per_page, session)
+                except requests.RequestException as e:
+                    log(f"[listing] {query!r} / {area_id}, стр. {page}: {e}")
+                    page_items = None
+                if not page_items:
+                    break
+                stats["listed"] += len(page_items)
+                fresh = [it for it in page_items if it.get("id") not in seen]
+                seen.update(it.get("id") for it in fresh)
+                stats["duplicates"] += len(page_items) - len(fresh)
+                kept, dropped = split_by_relevance(fresh, min_score)
+                stats["prefiltered"] += len(dropped)
+                items.extend(kept)
+            log(f"[listing] {query!r} / {area_id}: всего уникальных {len(items)}")
+    return items, stats
+
+
+def enrich(items, fetch_workers=FETCH_WORKERS, nlp_workers=NLP_WORKERS, lemma_mode=LEMMA_MODE, session=requests):
+    """
+    Описания, навыки и леммы для вакансий выдачи (в порядке items) -> (записи, ошибок загрузки, почти-дубликатов).
+    Загрузка и NLP перекрываются: описание уходит в пул процессов, как только скачано.
+    Почти-дубликат уже обработанного описания (near_dup, по названию, работодателю и
+    скачанному тексту) в NLP не идёт — ему достаются навыки и леммы представителя.
+    """
+    records = [None] * len(items)
+    failed = 0
+    dedup = NearDuplicateIndex()
+    results, siblings = {}, []
+    nlp_pool = ProcessPoolExecutor(nlp_workers) if nlp_workers > 1 else None
+    try:
+        if nlp_pool:
+            # Процессы стартуют до потоков загрузки: fork из многопоточного процесса небезопасен
+            nlp_pool.submit(int).result()
+        with ThreadPoolExecutor(fetch_workers) as fetch_pool:
+            fetches = {
+                fetch_pool.submit(fetch_full_description, item.get("alternate_url"), session): i
+                for i, item in enumerate(items)
+            }
+            pending = {}
+            for done, future in enumerate(as_completed(fetches), 1):
+                i = fetches[future]
+                description = future.result()
+                failed += not description
+                # Пустые описания не сравниваем: иначе склеятся все вакансии с одинаковым названием
+                rep = dedup.add(i, vacancy_text(items[i].get("name"), (items[i].get("employer") or {}).get("name"), description)) if description else i
+                if rep != i:
+                    siblings.append((i, rep, description))
+                elif nlp_pool:
+                    pending[nlp_pool.submit(_process_task, (description, lemma_mode))] = (i, description)
+                else:
+                    results[i] = process_description(description, lemma_mode)
+                    records[i] = vacancy_record(items[i], description, *results[i])
+                if done % 100 == 0:
+                    log(f"[enrich] скачано {done}/{len(items)}")
+            for future in as_completed(pending):
+                i, description = pending[future]
+                results[i] = future.result()
+                records[i] = vacancy_record(items[i], description, *results[i])
+    finally:
+        if nlp_pool:
+            nlp_pool.shutdown()
+    # Свой текст и поля выдачи — у каждой вакансии, навыки и леммы — от представителя
+    for i, rep, description in siblings:
+        records[i] = vacancy_record(items[i], description, *results[rep])
+    return records, failed, len(siblings)
+
+
+def write_output(df, path):
+    """Файл по расширению: .parquet / .csv / .xlsx / .json."""
+    from main_page.export_stream import write_csv, write_xlsx
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        try:
+            df.to_parquet(path, index=False)
+        except ImportError as e:
+            raise SystemExit(f"Для Parquet нужен pyarrow или fastparquet: {e}")
+    elif ext == ".csv":
+        write_csv(df, path, sep=";")
+    elif ext == ".xlsx":
+        write_xlsx(df, path)
+    elif ext == ".json":
+        df.to_json(path, orient="records", force_ascii=False, date_format="iso")
+    else:
+        raise SystemExit(f"Неизвестный формат {ext}, поддерживаются: {', '.join(OUTPUT_FORMATS)}")
+
+
+def write_store(df) -> dict:
+    """Тексты — в общее хранилище, вакансии — в поисковый индекс (как после сбора в приложении)."""
+    from main_page.search_index import index_for_search
+    from main_page.text_store import offload_texts
+
+    stored = offload_texts(df)
+    return {"stored": len(stored), "search_indexed": index_for_search(stored)}
+
+
+def run_pipeline(queries, areas, pages, per_page=PER_PAGE, fetch_workers=FETCH_WORKERS, nlp_workers=NLP_WORKERS,
+                 lemma_mode=LEMMA_MODE, classifier="rules", min_score=0, session=requests):
+    """(датафрейм в схеме приложения, статистика)."""
+    from main_page.normalize import normalize_vacancies
+
+    seconds = {}
+    started = time.perf_counter()
+    items, stats = collect_listing(queries, areas, pages, per_page, min_score, session)
+    seconds["listing"] = time.perf_counter() - started
+
+    t0 = time.perf_counter()
+    records, failed, near_duplicates = enrich(items, fetch_workers, nlp_workers, lemma_mode, session)
+    seconds["enrich"] = time.perf_counter() - t0
+    stats["fetch_failed"] = failed
+    stats["near_duplicates"] = near_duplicates
+
+    df = pd.DataFrame(records)
+    t0 = time.perf_counter()
+    if not df.empty:
+        df.insert(2, "category", classify_roles(df["name"], df["lemmatized_content"], classifier, df["description"]))
+        df = normalize_vacancies(df)
+    seconds["classify"] = time.perf_counter() - t0
+    seconds["total"] = time.perf_counter() - started
+
+    stats = {
+        **stats,
+        "rows": len(df),
+        "categories": df["category"].astype(str).value_counts().to_dict() if not df.empty else {},
+        "workers": {"fetch": fetch_workers, "nlp": nlp_workers},
+        "seconds": {k: round(v, 3) for k, v in seconds.items()},
+        "vacancies_per_second": round(len(df) / seconds["total"], 2) if seconds["total"] else None,
+        "http_responses": {
+            f"{c['labels'].get('target')}:{c['labels'].get('status')}": c["value"]
+            for c in get_registry().snapshot()["counters"] if c["name"] == "http_responses"
+        },
+    }
+    return df, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сбор и обработка вакансий HH без интерфейса")
+    parser.add_argument("-q", "--query", action="append", required=True, help="поисковый запрос (можно несколько)")
+    parser.add_argument("-a", "--area", action="append", default=None, help="id региона HH или город (можно несколько, по умолчанию Москва)")
+    parser.add_argument("--pages", type=int, default=5, help="глубина выдачи, страниц на (запрос, регион)")
+    parser.add_argument("--per-page", type=int, default=PER_PAGE)
+    parser.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS, help="потоков загрузки описаний")
+    parser.add_argument("--nlp-workers", type=int, default=NLP_WORKERS, help="процессов лемматизации (1 — в основном процессе)")
+    parser.add_argument("--lemma-mode", choices=LEMMA_MODES, default=LEMMA_MODE)
+    parser.add_argument("--classifier", choices=list(CLASSIFIER_BACKENDS), default="rules")
+    parser.add_argument("--min-score", type=int, default=PREFILTER_MIN_SCORE, help="мин. технологий в анонсе (0 — без фильтра)")
+    parser.add_argument("-o", "--output", help=f"файл результата ({', '.join(OUTPUT_FORMATS)})")
+    parser.add_argument("--store", action="store_true", help="записать в общее хранилище текстов и поисковый индекс")
+    args = parser.parse_args(argv)
+
+    if not args.output and not args.store:
+        parser.error("укажите --output и/или --store")
+    if args.per_page * args.pages > MAX_RESULTS:
+        args.pages = MAX_RESULTS // args.per_page
+        log(f"HH отдаёт не больше {MAX_RESULTS} вакансий на запрос — глубина урезана до {args.pages} стр.")
+    areas = []
+    for value in args.area or ["1"]:
+        area_id = resolve_area(value)
+        if area_id is None:
+            parser.error(f"регион не найден: {value}")
+        areas.append(area_id)
+
+    df, stats = run_pipeline(
+        args.query, areas, args.pages, args.per_page, args.fetch_workers, args.nlp_workers,
+        args.lemma_mode, args.classifier, args.min_score,
+    )
+    stats["queries"], stats["areas"] = args.query, areas
+
+    t0 = time.perf_counter()
+    if not df.empty:
+        if args.output:
+            write_output(df, args.output)
+            stats["output"] = os.path.abspath(args.output)
+        if args.store:
+            stats.update(write_store(df))
+    stats["seconds"]["write"] = round(time.perf_counter() - t0, 3)
+
+    print(json.dumps(stats, ensure_ascii=False))
+    # Пустой сбор — ненулевой код, чтобы cron заметил
+    return 0 if len(df) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""
+Дешёвый фильтр релевантности до загрузки описания и лемматизации.
+
+Выдача HH уже содержит название и фрагменты описания (snippet.requirement /
+snippet.responsibility). По ним теми же скомпилированными словарями навыков
+(extract_skills_raw) считается оценка — число разных технологий. key_skills
+в выдаче нет — только на странице вакансии. Вакансии ниже порога не
+скачиваются и не проходят через Natasha.
+
+Порог — HH_PREFILTER_MIN_SCORE или слайдер на главной странице. По умолчанию 0 —
+фильтр выключен и ничего не экономит: по коротким фрагментам легко отсеять нужную
+вакансию, поэтому его включают явно (1–2 технологии для IT-запросов).
+"""
+import os
+import re
+
+from main_page.nlp import extract_skills_raw
+
+PREFILTER_MIN_SCORE = int(os.environ.get("HH_PREFILTER_MIN_SCORE", "0"))
+# HH подсвечивает совпадения с запросом тегами <highlighttext>
+TAG_RE = re.compile(r"<[^>]+>")
+
+
+def listing_text(item) -> str:
+    """Текст вакансии из выдачи: название + фрагменты описания."""
+    snippet = item.get("snippet") or {}
+    parts = [item.get("name"), snippet.get("requirement"), snippet.get("responsibility")]
+    return TAG_RE.sub(" ", " ".join(p for p in parts if p))
+
+
+def relevance_score(item) -> int:
+    """Число разных технологий в данных выдачи."""
+    return len(extract_skills_raw(listing_text(item)))
+
+
+def split_by_relevance(items, min_score=PREFILTER_MIN_SCORE):
+    """(проходят, отсеяны) — списки вакансий из выдачи."""
+    if min_score <= 0:
+        return list(items), []
+    kept, skipped = [], []
+    for item in items:
+        (kept if relevance_score(item) >= min_score else skipped).append(item)
+    return kept, skipped
@@ -0,0 +1,157 @@
+"""
+Лёгкий классификатор ролей, дистиллированный из zero-shot BART.
+
+BART-MNLI размечает корпус один раз офлайн (use model/distill.py label), а здесь —
+ученик: хэширование признаков (слова названия + леммы описания и их биграммы)
+в разреженный вектор и мультиклассовая логистическая регрессия (L-BFGS, scipy).
+Предсказание — одно умножение разреженной матрицы на веса, тысячи вакансий в
+секунду на ядро.
+
+Артефакт — .npz с весами и метаданными: набор меток и его версия (хэш списка
+меток) и режим лемматизации обучающих лемм. Если CATEGORIES поменялись или
+приложение лемматизирует в другом режиме (HH_LEMMA_MODE), старый артефакт не
+загрузится — его нужно переобучить.
+"""
+import hashlib
+import json
+import os
+import re
+import zlib
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import minimize
+
+from main_page.data import CATEGORIES
+
+ROLE_LABELS = list(CATEGORIES) + ["Other"]
+N_FEATURES = 2 ** 18
+L2_PENALTY = 1e-4
+MAX_ITER = 300
+# Признаки названия весят больше: роль чаще всего видна по заголовку
+TITLE_WEIGHT = 6.0
+MODEL_PATH = os.environ.get(
+    "HH_ROLE_MODEL", os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "role_classifier.npz")
+)
+
+WORD_RE = re.compile(r"[\w+#]+")
+
+
+def label_set_version(labels) -> str:
+    return hashlib.sha1("\n".join(labels).encode("utf-8")).hexdigest()[:12]
+
+
+LABEL_SET_VERSION = label_set_version(ROLE_LABELS)
+
+
+def _hash(feature):
+    return zlib.crc32(feature.encode("utf-8")) % N_FEATURES
+
+
+def featurize(titles, lemmatized_texts) -> sp.csr_matrix:
+    """Хэш-признаки (вакансий × N_FEATURES): log(1 + tf), строки нормированы по L2."""
+    indptr, indices, data = [0], [], []
+    for title, text in zip(titles, lemmatized_texts):
+        counts = {}
+        for word in WORD_RE.findall(str(title).lower()) if isinstance(title, str) else []:
+            col = _hash("t:" + word)
+            counts[col] = counts.get(col, 0.0) + TITLE_WEIGHT
+        lemmas = text.split() if isinstance(text, str) else []
+        for lemma in lemmas:
+            col = _hash("d:" + lemma)
+            counts[col] = counts.get(col, 0.0) + 1.0
+        for first, second in zip(lemmas, lemmas[1:]):
+            col = _hash("b:" + first + " " + second)
+            counts[col] = counts.get(col, 0.0) + 1.0
+        values = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        norm = np.sqrt((values ** 2).sum())
+        indices.extend(counts.keys())
+        data.extend(values / norm if norm else values)
+        indptr.append(len(indices))
+    return sp.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+        shape=(len(indptr) - 1, N_FEATURES),
+    )
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    return scores / scores.sum(axis=1, keepdims=True)
+
+
+class DistilledRoleClassifier:
+    def __init__(self, weights, bias, labels, metadata=None):
+        self.weights = weights
+        self.bias = bias
+        self.labels = list(labels)
+        self.metadata = metadata or {}
+
+    @classmethod
+    def fit(cls, features, labels, label_set=ROLE_LABELS, l2=L2_PENALTY, max_iter=MAX_ITER):
+        """Мультиклассовая логистическая регрессия: кросс-энтропия + L2, L-BFGS."""
+        label_index = {label: i for i, label in enumerate(label_set)}
+        y = np.array([label_index[label] for label in labels])
+        n, n_classes = features.shape[0], len(label_set)
+        target = np.zeros((n, n_classes), dtype=np.float32)
+        target[np.arange(n), y] = 1
+        # Обучаем только на колонках, которые встретились: остальные веса нулевые
+        used = np.unique(features.indices)
+        x = features[:, used]
+        x_t = x.T.tocsr()
+
+        def loss_and_grad(params):
+            w = params[:-n_classes].reshape(len(used), n_classes)
+            b = params[-n_classes:]
+            probs = _softmax(np.asarray(x @ w) + b)
+            loss = -np.log(probs[np.arange(n), y] + 1e-12).mean() + 0.5 * l2 * (w ** 2).sum()
+            diff = (probs - target) / n
+            grad_w = np.asarray(x_t @ diff) + l2 * w
+            return loss, np.concatenate([grad_w.ravel(), diff.sum(axis=0)])
+
+        start = np.zeros(len(used) * n_classes + n_classes)
+        result = minimize(loss_and_grad, start, jac=True, method="L-BFGS-B", options={"maxiter": max_iter})
+        weights = np.zeros((N_FEATURES, n_classes), dtype=np.float32)
+        weights[used] = result.x[:-n_classes].reshape(len(used), n_classes)
+        return cls(weights, result.x[-n_classes:].astype(np.float32), label_set)
+
+    def predict_proba(self, titles, lemmatized_texts) -> np.ndarray:
+        return _softmax(np.asarray(featurize(titles, lemmatized_texts) @ self.weights) + self.bias)
+
+    def predict(self, titles, lemmatized_texts) -> list:
+        probs = self.predict_proba(titles, lemmatized_texts)
+        return [self.labels[i] for i in probs.argmax(axis=1)]
+
+    def save(self, path=MODEL_PATH, **metadata):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.metadata = {**self.metadata, **metadata, "labels": self.labels,
+                         "label_set_version": label_set_version(self.labels), "n_features": N_FEATURES}
+        # Веса почти все нулевые — храним только ненулевые строки
+        rows = np.flatnonzero(np.abs(self.weights).sum(axis=1))
+        np.savez_compressed(path, rows=rows, weights=self.weights[rows], bias=self.bias,
+                            metadata=json.dumps(self.metadata, ensure_ascii=False))
+
+    @classmethod
+    def load(cls, path=MODEL_PATH, lemma_mode=None):
+        """lemma_mode — режим лемм, которые будут подаваться модели; None — не проверять."""
+        with np.load(path) as stored:
+            metadata = json.loads(str(stored["metadata"]))
+            if metadata.get("label_set_version") != LABEL_SET_VERSION:
+                raise ValueError(
+                    f"Модель {path} обучена на другом наборе меток "
+                    f"({metadata.get('label_set_version')} != {LABEL_SET_VERSION}), переобучите её"
+                )
+            if metadata.get("n_features") != N_FEATURES:
+                raise ValueError(f"Модель {path} обучена с другим числом хэш-признаков, переобучите её")
+            if lemma_mode is not None and metadata.get("lemma_mode") != lemma_mode:
+                raise ValueError(
+                    f"Модель {path} обучена на леммах режима {metadata.get('lemma_mode')}, "
+                    f"а приложение лемматизирует в режиме {lemma_mode}, переобучите её"
+                )
+            weights = np.zeros((metadata["n_features"], len(metadata["labels"])), dtype=np.float32)
+            weights[stored["rows"]] = stored["weights"]
+            return cls(weights, stored["bias"], metadata["labels"], metadata)
+
+
+def model_available(path=MODEL_PATH) -> bool:
+    return os.path.exists(path)
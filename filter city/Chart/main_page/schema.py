@@ -0,0 +1,56 @@
+"""
+Компактная схема датафрейма вакансий, который лежит в st.session_state.
+
+- повторяющиеся подписи (категория, опыт, компания, валюта, город) -> category;
+- зарплаты -> float32 (NaN — не указано), коды -> int8;
+- skills_list -> списки из общих (interned) строк, так что «python» в 50k
+  вакансиях — один объект, а не 50k копий;
+- тексты (в том числе строка skills) -> string[pyarrow], если установлен pyarrow.
+
+apply_schema вызывают все источники данных: start_parsing и загрузка файла
+(через normalize_vacancies), fast_parser.get_total_data.
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = "string[pyarrow]"
+except ImportError:
+    TEXT_DTYPE = None
+
+CATEGORY_COLUMNS = ['category', 'experience', 'company', 'employer', 'currency', 'city']
+FLOAT_COLUMNS = ['salary_from', 'salary_to', 'salary_from_rub', 'salary_to_rub', 'salary_to_clean']
+INT8_COLUMNS = ['experience_code']
+# skills — строка через запятую, почти уникальная у каждой вакансии: category тут ничего не экономит
+TEXT_COLUMNS = ['name', 'url', 'skills', 'description', 'lemmatized_content', 'full_description', 'key_skills']
+
+
+def intern_skills(skills_lists) -> list:
+    """Списки навыков с общими строками: одинаковые навыки ссылаются на один объект."""
+    return [[sys.intern(str(s)) for s in skills] if isinstance(skills, list) else [] for skills in skills_lists]
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Приводит колонки к компактным типам (без копии, если типы уже нужные)."""
+    if df is None or df.empty:
+        return df
+    converted = {}
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            converted[col] = df[col].astype('category')
+    for col in FLOAT_COLUMNS:
+        if col in df.columns and df[col].dtype != np.float32:
+            converted[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float32)
+    for col in INT8_COLUMNS:
+        if col in df.columns and df[col].dtype != np.int8:
+            converted[col] = df[col].astype(np.int8)
+    if TEXT_DTYPE:
+        for col in TEXT_COLUMNS:
+            if col in df.columns and str(df[col].dtype) != TEXT_DTYPE:
+                converted[col] = df[col].astype(TEXT_DTYPE)
+    if 'skills_list' in df.columns:
+        converted['skills_list'] = intern_skills(df['skills_list'])
+    return df.assign(**converted) if converted else df
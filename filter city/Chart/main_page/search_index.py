@@ -0,0 +1,172 @@
+"""
+Полнотекстовый поиск по вакансиям (SQLite FTS5).
+
+Индекс лежит в том же SQLite-файле, что и хранилище текстов (HH_TEXT_STORE):
+виртуальная таблица FTS5 по названию, описанию и леммам. Таблица contentless —
+без несжатой копии текстов, только инвертированный индекс. Строка FTS связана
+с id вакансии через таблицу search_ids (rowid), там же — хэш и сжатая копия
+проиндексированного текста. Если текст вакансии изменился, её строка FTS
+удаляется командой 'delete' (contentless-таблице для этого нужен исходный
+текст — он и хранится в копии) и вставляется заново под тем же rowid: индекс
+не растёт от повторных сборов.
+
+Запросы — синтаксис FTS5: фразы ("data engineer"), AND/OR/NOT, префиксы (click*).
+Ранжирование — BM25, совпадение в названии весит больше.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import zlib
+
+import pandas as pd
+
+from main_page.text_store import COMPRESS_LEVEL, TEXT_STORE_PATH, FETCH_BATCH, load_texts
+
+# Веса колонок для bm25: name, description, lemmas
+BM25_WEIGHTS = (5.0, 1.0, 1.0)
+
+
+def _quote_terms(query):
+    """Запрос с неверным синтаксисом FTS5 (C++, node.js) — ищем слова как фразы."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def _content_hash(name, desc, lemmas):
+    return hashlib.sha1("\x1f".join((name or "", desc or "", lemmas or "")).encode("utf-8")).hexdigest()
+
+
+class SearchIndex:
+    def __init__(self, path=TEXT_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Индекс старого формата (без копии текста) нельзя чистить построчно — пересоздаём,
+        # он заполнится заново при следующих сборах и загрузках
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(search_ids)")}
+        if columns and "indexed_text" not in columns:
+            conn.execute("DROP TABLE search_ids")
+            conn.execute("DROP TABLE IF EXISTS vacancy_fts")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_ids ("
+            "vacancy_id TEXT PRIMARY KEY, content_hash TEXT, indexed_text BLOB)"
+        )
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS vacancy_fts USING fts5("
+            "name, description, lemmas, content='', tokenize='unicode61 remove_diacritics 2')"
+        )
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def indexed(self, vacancy_ids) -> dict:
+        """{id: хэш проиндексированного текста} для id из списка, которые уже есть в индексе."""
+        vacancy_ids = [str(v) for v in vacancy_ids]
+        conn = self._conn()
+        found = {}
+        for start in range(0, len(vacancy_ids), FETCH_BATCH):
+            batch = vacancy_ids[start:start + FETCH_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            found.update(conn.execute(
+                f"SELECT vacancy_id, content_hash FROM search_ids WHERE vacancy_id IN ({placeholders})", batch
+            ))
+        return found
+
+    def put_many(self, rows) -> int:
+        """
+        rows: (vacancy_id, name, description, lemmatized_content). Id с тем же текстом
+        пропускаются, с изменившимся — переиндексируются под тем же rowid.
+        Возвращает число записанных.
+        """
+        conn = self._conn()
+        added = 0
+        with conn:
+            for vid, name, desc, lemmas in rows:
+                vid, values = str(vid), (name or "", desc or "", lemmas or "")
+                content_hash = _content_hash(*values)
+                packed = zlib.compress(json.dumps(values, ensure_ascii=False).encode("utf-8"), COMPRESS_LEVEL)
+                known = conn.execute(
+                    "SELECT rowid, content_hash, indexed_text FROM search_ids WHERE vacancy_id = ?", (vid,)
+                ).fetchone()
+                if known is None:
+                    rowid = conn.execute(
+                        "INSERT INTO search_ids (vacancy_id, content_hash, indexed_text) VALUES (?, ?, ?)",
+                        (vid, content_hash, packed),
+                    ).lastrowid
+                elif known[1] == content_hash:
+                    continue
+                else:
+                    rowid, old = known[0], json.loads(zlib.decompress(known[2]).decode("utf-8"))
+                    conn.execute(
+                        "INSERT INTO vacancy_fts (vacancy_fts, rowid, name, description, lemmas) VALUES ('delete', ?, ?, ?, ?)",
+                        (rowid, *old),
+                    )
+                    conn.execute(
+                        "UPDATE search_ids SET content_hash = ?, indexed_text = ? WHERE rowid = ?",
+                        (content_hash, packed, rowid),
+                    )
+                conn.execute(
+                    "INSERT INTO vacancy_fts (rowid, name, description, lemmas) VALUES (?, ?, ?, ?)",
+                    (rowid, *values),
+                )
+                added += 1
+        return added
+
+    def search(self, query, limit=-1) -> list:
+        """[(vacancy_id, bm25)] по возрастанию bm25 (в FTS5 меньше — релевантнее); limit=-1 — без ограничения."""
+        query = (query or "").strip()
+        if not query:
+            return []
+        sql = (
+            f"SELECT s.vacancy_id, bm25(vacancy_fts, {', '.join(map(str, BM25_WEIGHTS))}) AS score "
+            "FROM vacancy_fts JOIN search_ids s ON s.rowid = vacancy_fts.rowid "
+            "WHERE vacancy_fts MATCH ? ORDER BY score LIMIT ?"
+        )
+        conn = self._conn()
+        try:
+            return conn.execute(sql, (query, limit)).fetchall()
+        except sqlite3.OperationalError:
+            return conn.execute(sql, (_quote_terms(query), limit)).fetchall()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex()
+        return _index
+
+
+def index_for_search(df: pd.DataFrame, index: SearchIndex = None) -> int:
+    """
+    Добавляет в поиск новые вакансии df и переиндексирует те, чей текст изменился
+    (тексты — из хранилища).
+    """
+    if index is None:
+        index = get_search_index()
+    if df is None or df.empty or 'id' not in df.columns:
+        return 0
+    names = df['name'].astype(str) if 'name' in df.columns else [""] * len(df)
+    return index.put_many(zip(
+        df['id'], names, load_texts(df, 'description'), load_texts(df, 'lemmatized_content')
+    ))
+
+
+def search_vacancies(df: pd.DataFrame, query) -> pd.DataFrame:
+    """Строки df, подходящие под запрос, в порядке BM25."""
+    if not query or not query.strip() or 'id' not in df.columns:
+        return df
+    ranks = {vid: rank for rank, (vid, _) in enumerate(get_search_index().search(query))}
+    ids = df['id'].astype(str)
+    mask = ids.isin(list(ranks))
+    return df[mask].iloc[ids[mask].map(ranks).to_numpy().argsort(kind='stable')]
@@ -0,0 +1,202 @@
+"""
+Индекс «похожих вакансий» по лемматизированным описаниям.
+
+Разреженная TF-IDF матрица (вакансия × лемма) с L2-нормировкой строк:
+косинусное сходство — скалярное произведение строк. Запрос считается по
+инвертированному индексу (CSC-колонки только тех лемм, что есть в вакансии),
+поэтому на 100k вакансий ответ — миллисекунды.
+
+Индекс пополняется инкрементально: новые вакансии (по id) дописываются к
+матрице счётчиков, у известных id с изменившимися леммами (та же вакансия
+перекачана или лемматизирована в другом режиме) строка заменяется. IDF и
+нормировка пересчитываются лениво при первом запросе после изменения. Индекс общий для всех сессий процесса, как и хранилище текстов.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from main_page.text_store import load_texts
+
+TOP_NEIGHBORS = 10
+# Слишком короткие токены (предлоги, союзы, обрывки) не индексируем
+MIN_TOKEN_LEN = 2
+
+
+def _tokens(text):
+    return [t for t in text.split() if len(t) >= MIN_TOKEN_LEN and not t.isdigit()] if text else []
+
+
+class SimilarityIndex:
+    def __init__(self):
+        self.vocabulary = {}
+        self.ids = []
+        self.positions = {}
+        # Хэш лемм по id: тот же текст не переиндексируем, изменившийся — заменяем
+        self._hashes = {}
+        self._counts = sp.csr_matrix((0, 0), dtype=np.float32)
+        self._doc_freq = np.zeros(0, dtype=np.int64)
+        self._matrix = None
+        self._ids_index = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, vacancy_id):
+        return str(vacancy_id) in self.positions
+
+    def add(self, vacancy_ids, lemmatized_texts):
+        """
+        Добавляет новые вакансии и заменяет строки тех, чьи леммы изменились.
+        Возвращает число добавленных и обновлённых.
+        """
+        indptr, indices, data, new_ids, seen = [0], [], [], [], set()
+        with self._lock:
+            for vid, text in zip(vacancy_ids, lemmatized_texts):
+                vid = str(vid)
+                text_hash = hash(text or "")
+                if vid in seen or self._hashes.get(vid) == text_hash:
+                    continue
+                seen.add(vid)
+                self._hashes[vid] = text_hash
+                terms = {}
+                for token in _tokens(text):
+                    col = self.vocabulary.setdefault(token, len(self.vocabulary))
+                    terms[col] = terms.get(col, 0) + 1
+                indices.extend(terms.keys())
+                data.extend(terms.values())
+                indptr.append(len(indices))
+                new_ids.append(vid)
+            if not new_ids:
+                return 0
+
+            n_terms = len(self.vocabulary)
+            block = sp.csr_matrix(
+                (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+                shape=(len(new_ids), n_terms),
+            )
+            old = self._counts
+            old.resize((old.shape[0], n_terms))
+            self._doc_freq = np.concatenate([self._doc_freq, np.zeros(n_terms - len(self._doc_freq), dtype=np.int64)])
+            self._doc_freq += np.bincount(block.indices, minlength=n_terms)
+
+            # Известные id: старая строка обнуляется, новая встаёт на её место
+            replaced = [(k, self.positions[vid]) for k, vid in enumerate(new_ids) if vid in self.positions]
+            if replaced:
+                k, rows = (np.asarray(col) for col in zip(*replaced))
+                self._doc_freq -= np.bincount(old[rows].indices, minlength=n_terms)
+                keep = np.ones(old.shape[0], dtype=np.float32)
+                keep[rows] = 0
+                scatter = sp.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, k)), shape=(old.shape[0], len(new_ids)))
+                old = sp.csr_matrix(sp.diags(keep) @ old + scatter @ block)
+                old.eliminate_zeros()
+                is_new = np.ones(len(new_ids), dtype=bool)
+                is_new[k] = False
+                block = block[is_new]
+                new_ids = [vid for vid, fresh in zip(new_ids, is_new) if fresh]
+
+            self._counts = sp.vstack([old, block], format='csr')
+            for vid in new_ids:
+                self.positions[vid] = len(self.ids)
+                self.ids.append(vid)
+            self._matrix = None
+            self._ids_index = None
+        return len(seen)
+
+    def _weighted(self):
+        """(CSR, CSC) TF-IDF с сублинейным TF и L2-нормой строк; пересчёт только после add."""
+        with self._lock:
+            if self._matrix is None:
+                n_docs = self._counts.shape[0]
+                idf = np.log((1 + n_docs) / (1 + self._doc_freq)).astype(np.float32) + 1
+                tfidf = self._counts.copy()
+                tfidf.data = 1 + np.log(tfidf.data)
+                tfidf = tfidf @ sp.diags(idf)
+                norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1)).ravel())
+                norms[norms == 0] = 1
+                tfidf = sp.csr_matrix(sp.diags(1 / norms) @ tfidf, dtype=np.float32)
+                self._matrix = (tfidf, tfidf.tocsc())
+            return self._matrix
+
+    def _id_index(self) -> pd.Index:
+        """id -> номер строки векторно (для among); пересобирается только после add."""
+        with self._lock:
+            if self._ids_index is None:
+                self._ids_index = pd.Index(self.ids)
+            return self._ids_index
+
+    def unknown(self, vacancy_ids) -> np.ndarray:
+        """Маска id, которых нет в индексе (только по id, без текстов)."""
+        return self._id_index().get_indexer(pd.Index(vacancy_ids).astype(str)) < 0
+
+    def neighbors(self, vacancy_id, k=TOP_NEIGHBORS, among=None) -> list:
+        """
+        [(id, косинусное сходство)] — k ближайших вакансий.
+        among — id, среди которых искать (например, текущая выборка сессии).
+        """
+        row = self.positions.get(str(vacancy_id))
+        if row is None:
+            return []
+        rows, cols = self._weighted()
+        query = rows[row]
+        if query.nnz == 0:
+            return []
+        # Инвертированный индекс: только колонки лемм запроса
+        scores = np.asarray(cols[:, query.indices] @ query.data).ravel()
+        scores[row] = -1
+        if among is not None and len(among) < len(self.ids):
+            allowed = np.zeros(len(scores), dtype=bool)
+            rows_among = self._id_index().get_indexer(pd.Index(among).astype(str))
+            allowed[rows_among[rows_among >= 0]] = True
+            scores[~allowed] = -1
+        k = min(k, int((scores > 0).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_similarity_index() -> SimilarityIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SimilarityIndex()
+        return _index
+
+
+def index_vacancies(df: pd.DataFrame, index: SimilarityIndex = None) -> int:
+    """
+    Дописывает в индекс новые вакансии df и обновляет те, чьи леммы изменились
+    (леммы — из хранилища текстов).
+    """
+    if index is None:
+        index = get_similarity_index()
+    if df is None or df.empty or 'id' not in df.columns:
+        return 0
+    return index.add(df['id'], load_texts(df, 'lemmatized_content'))
+
+
+def similar_vacancies(df: pd.DataFrame, vacancy_id, k=TOP_NEIGHBORS) -> pd.DataFrame:
+    """
+    Строки df, похожие на вакансию vacancy_id, с колонкой similarity (по убыванию).
+    Индекс пополняется при сборе и загрузке (index_vacancies); здесь леммы
+    догружаются только для id, которых в индексе нет, — обычно ни для одного.
+    """
+    index = get_similarity_index()
+    missing = df[index.unknown(df['id'])]
+    if not missing.empty:
+        index.add(missing['id'], load_texts(missing, 'lemmatized_content'))
+    found = index.neighbors(vacancy_id, k, among=df['id'])
+    if not found:
+        return df.iloc[0:0].assign(similarity=pd.Series(dtype=float))
+    scores = dict(found)
+    ids = df['id'].astype(str)
+    result = df[ids.isin(list(scores))].assign(similarity=ids.map(scores))
+    return result.sort_values('similarity', ascending=False)
@@ -0,0 +1,90 @@
+"""
+Разреженная матрица «вакансия × навык» (CSR, 0/1) со стабильным словарём навыков.
+
+Строится один раз на датасет (см. aggregates.py), после чего счётчики навыков,
+счётчики по категориям и средняя зарплата по навыку — это произведения
+разреженной матрицы на вектор. На 100k вакансий и несколько сотен навыков
+матрица занимает единицы мегабайт.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+class SkillMatrix:
+    def __init__(self, matrix: sparse.csr_matrix, vocabulary: list):
+        self.matrix = matrix            # (вакансий × навыков), 1 — навык упомянут
+        self.vocabulary = vocabulary    # навыки по алфавиту: индекс столбца -> навык
+        self.index = {skill: i for i, skill in enumerate(vocabulary)}
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    def counts(self, rows=None) -> np.ndarray:
+        """Сколько вакансий упоминает каждый навык (rows — булева маска строк)."""
+        if rows is None:
+            return np.asarray(self.matrix.sum(axis=0)).ravel().astype(np.int64)
+        weights = np.asarray(rows, dtype=np.float32)
+        return (self.matrix.T @ weights).astype(np.int64)
+
+    def counts_by_group(self, labels) -> tuple:
+        """
+        Счётчики навыков сразу для всех групп одним произведением G @ M,
+        где G — разреженная матрица «группа × вакансия».
+        Возвращает (группы, матрица счётчиков группа × навык).
+        """
+        codes, groups = pd.factorize(pd.Series(labels), sort=False)
+        valid = codes >= 0
+        n_rows = self.matrix.shape[0]
+        group_matrix = sparse.csr_matrix(
+            (np.ones(valid.sum(), dtype=np.float32), (codes[valid], np.arange(n_rows)[valid])),
+            shape=(len(groups), n_rows),
+        )
+        return list(groups), (group_matrix @ self.matrix).toarray().astype(np.int64)
+
+    def mean_by_skill(self, values) -> tuple:
+        """
+        Среднее значения (например, зарплаты) и число непустых значений по каждому навыку:
+        M.T @ values / M.T @ mask. Для навыков без значений — NaN.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        mask = ~np.isnan(values)
+        totals = self.matrix.T @ np.where(mask, values, 0.0)
+        counts = self.matrix.T @ mask.astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = totals / counts
+        return means, counts.astype(np.int64)
+
+    def top(self, counts, limit=None) -> pd.DataFrame:
+        """DataFrame Skill / Count по убыванию (нулевые отбрасываются)."""
+        counts = np.asarray(counts)
+        order = np.argsort(-counts, kind='stable')
+        order = order[counts[order] > 0]
+        if limit is not None:
+            order = order[:limit]
+        return pd.DataFrame({
+            'Skill': [self.vocabulary[i] for i in order],
+            'Count': counts[order],
+        })
+
+
+def build_skill_matrix(skills_lists) -> SkillMatrix:
+    """Списки навыков по вакансиям -> SkillMatrix. Повторы внутри вакансии считаются один раз."""
+    skills_lists = list(skills_lists)
+    vocabulary = sorted({s for skills in skills_lists for s in skills})
+    index = {skill: i for i, skill in enumerate(vocabulary)}
+
+    indptr = np.zeros(len(skills_lists) + 1, dtype=np.int64)
+    indices = []
+    for row, skills in enumerate(skills_lists):
+        cols = sorted({index[s] for s in skills})
+        indices.extend(cols)
+        indptr[row + 1] = indptr[row] + len(cols)
+
+    indices = np.asarray(indices, dtype=np.int32)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.float32), indices, indptr),
+        shape=(len(skills_lists), len(vocabulary)),
+    )
+    return SkillMatrix(matrix, vocabulary)
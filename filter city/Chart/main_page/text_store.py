@@ -0,0 +1,150 @@
+"""
+Дисковое хранилище длинных текстов вакансий (description, lemmatized_content).
+
+В st.session_state остаются только аналитические колонки, а тексты сжимаются
+zlib и лежат в SQLite по id вакансии. Загружаются по требованию: при открытии
+строки в таблице, при пересчёте аналитики по текстам и при экспорте.
+
+Путь к файлу — переменная окружения HH_TEXT_STORE (по умолчанию во временной папке).
+Хранилище общее для всех сессий: одна и та же вакансия хранится один раз.
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import zlib
+
+import pandas as pd
+
+TEXT_STORE_PATH = os.environ.get("HH_TEXT_STORE", os.path.join(tempfile.gettempdir(), "hh_vacancy_texts.sqlite"))
+# Колонки, которые уходят из датафрейма в хранилище
+OFFLOAD_COLUMNS = ['description', 'lemmatized_content']
+COMPRESS_LEVEL = 6
+# Сколько id за один SELECT (лимит переменных SQLite — 999 в старых сборках)
+FETCH_BATCH = 500
+
+
+def _pack(text):
+    if text is None or (not isinstance(text, str) and pd.isna(text)):
+        return None
+    return zlib.compress(str(text).encode("utf-8"), COMPRESS_LEVEL)
+
+
+def _unpack(blob):
+    return zlib.decompress(blob).decode("utf-8") if blob is not None else ""
+
+
+class TextStore:
+    def __init__(self, path=TEXT_STORE_PATH):
+        self.path = path
+        # Streamlit выполняет скрипты в разных потоках — соединение своё у каждого потока
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS texts ("
+            "vacancy_id TEXT PRIMARY KEY, description BLOB, lemmatized_content BLOB)"
+        )
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def put_many(self, rows):
+        """rows: итерируемое (vacancy_id, description, lemmatized_content)."""
+        conn = self._conn()
+        conn.executemany(
+            "INSERT OR REPLACE INTO texts (vacancy_id, description, lemmatized_content) VALUES (?, ?, ?)",
+            ((str(vid), _pack(desc), _pack(lemmas)) for vid, desc, lemmas in rows),
+        )
+        conn.commit()
+
+    def get_many(self, vacancy_ids) -> dict:
+        """{id: {'description': ..., 'lemmatized_content': ...}} для найденных id."""
+        vacancy_ids = [str(v) for v in vacancy_ids]
+        conn = self._conn()
+        found = {}
+        for start in range(0, len(vacancy_ids), FETCH_BATCH):
+            batch = vacancy_ids[start:start + FETCH_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            for vid, desc, lemmas in conn.execute(
+                f"SELECT vacancy_id, description, lemmatized_content FROM texts WHERE vacancy_id IN ({placeholders})",
+                batch,
+            ):
+                found[vid] = {'description': _unpack(desc), 'lemmatized_content': _unpack(lemmas)}
+        return found
+
+    def get(self, vacancy_id) -> dict:
+        return self.get_many([vacancy_id]).get(str(vacancy_id))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> TextStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TextStore()
+        return _store
+
+
+def vacancy_ids(df: pd.DataFrame) -> pd.Series:
+    """
+    id вакансий HH, а для загруженных файлов без id — стабильный хэш
+    ссылки (или названия + компании + описания).
+    """
+    if 'id' in df.columns and df['id'].notna().all():
+        return df['id'].astype(str)
+
+    def synthetic(row):
+        key = row.get('url') or f"{row.get('name')}|{row.get('company')}|{row.get('description')}"
+        return "f" + hashlib.sha1(str(key).encode("utf-8")).hexdigest()[:16]
+
+    ids = pd.Series([synthetic(row) for row in df.to_dict('records')], index=df.index)
+    if 'id' in df.columns:
+        ids = df['id'].astype(object).where(df['id'].notna(), ids).astype(str)
+    return ids
+
+
+def offload_texts(df: pd.DataFrame, store: TextStore = None) -> pd.DataFrame:
+    """Переносит description/lemmatized_content в хранилище; возвращает df без них (с колонкой id)."""
+    if df is None or df.empty:
+        return df
+    store = store or get_store()
+    df = df.assign(id=vacancy_ids(df))
+    present = [c for c in OFFLOAD_COLUMNS if c in df.columns]
+    if not present:
+        return df
+    texts = [df[c] if c in df.columns else pd.Series(None, index=df.index) for c in OFFLOAD_COLUMNS]
+    store.put_many(zip(df['id'], *texts))
+    return df.drop(columns=present)
+
+
+def load_texts(df: pd.DataFrame, column='description', store: TextStore = None) -> list:
+    """Тексты одной колонки в порядке строк df ('' если текста нет)."""
+    store = store or get_store()
+    if column in df.columns:
+        return df[column].fillna("").astype(str).tolist()
+    found = store.get_many(df['id'].tolist()) if 'id' in df.columns else {}
+    return [found.get(str(vid), {}).get(column, "") for vid in df.get('id', [])]
+
+
+def iter_rows_with_texts(df: pd.DataFrame, store: TextStore = None, batch_size=FETCH_BATCH):
+    """Строки df словарями с подставленными текстами — для потокового экспорта."""
+    store = store or get_store()
+    for start in range(0, len(df), batch_size):
+        chunk = df.iloc[start:start + batch_size]
+        found = store.get_many(chunk['id'].tolist()) if 'id' in chunk.columns else {}
+        for row in chunk.to_dict('records'):
+            texts = found.get(str(row.get('id')), {})
+            for col in OFFLOAD_COLUMNS:
+                if col not in row:
+                    row[col] = texts.get(col, "")
+            yield row
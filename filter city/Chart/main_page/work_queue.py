@@ -0,0 +1,408 @@
+"""
+Общая очередь задач с арендой (lease) для распределённого сбора.
+
+Задача (срез выдачи или загрузка описания вакансии) выдаётся узлу в аренду на
+LEASE_SECONDS; узел продлевает аренду heartbeat-ом, пока работает. Если узел
+упал и аренда истекла — задача снова выдаётся другому (до MAX_ATTEMPTS раз).
+Отказ по лимиту HH (429) попыткой не считается: fail(..., retryable=True)
+возвращает задачу в очередь без расхода попыток.
+Постановка идемпотентна по ключу задачи: одну вакансию из разных срезов
+выдачи скачают один раз. Результаты пишутся upsert-ом по id вакансии —
+повторная обработка (после истёкшей аренды) просто перезапишет строку.
+
+Бэкенды (адрес — HH_QUEUE_URL или --queue):
+- sqlite:///path/to/queue.sqlite (или просто путь) — несколько воркеров на
+  одной машине; захват задач в BEGIN IMMEDIATE. Файл — только на локальном
+  диске: очередь работает в режиме WAL, которому нужна общая память процессов,
+  а на сетевых ФС (NFS, SMB) блокировки SQLite ненадёжны;
+- redis://host:6379/0 — несколько машин, нужен пакет redis; захват — Lua-скрипт.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+QUEUE_URL = os.environ.get("HH_QUEUE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "hh_work_queue.sqlite"))
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 3
+LEASE_BATCH = 20
+
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+
+
+class SQLiteWorkQueue:
+    def __init__(self, path):
+        self.path = path
+        # Соединение своё у каждого потока (heartbeat идёт из отдельного потока)
+        self._local = threading.local()
+        conn = self._conn()
+        # WAL — только для процессов одной машины (см. docstring модуля)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS work_items ("
+            " item_key TEXT PRIMARY KEY, kind TEXT, payload TEXT, status TEXT,"
+            " owner TEXT, lease_expires REAL, attempts INTEGER DEFAULT 0, error TEXT, updated REAL);"
+            "CREATE INDEX IF NOT EXISTS work_items_claim ON work_items (kind, status, lease_expires);"
+            "CREATE TABLE IF NOT EXISTS results (vacancy_id TEXT PRIMARY KEY, payload TEXT, node TEXT, updated REAL);"
+            "CREATE TABLE IF NOT EXISTS node_stats ("
+            " node TEXT, kind TEXT, done INTEGER, failed INTEGER, busy_seconds REAL, first_seen REAL, last_seen REAL,"
+            " PRIMARY KEY (node, kind));"
+        )
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None — транзакции открываем сами (BEGIN IMMEDIATE при захвате)
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, kind, items) -> int:
+        """items: (ключ, payload). Уже известные ключи пропускаются; вернёт число новых."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO work_items (item_key, kind, payload, status, updated) VALUES (?, ?, ?, ?, ?)",
+            ((key, kind, json.dumps(payload, ensure_ascii=False), PENDING, now) for key, payload in items),
+        )
+        added = conn.total_changes - before
+        conn.execute("COMMIT")
+        return added
+
+    def lease(self, node, kind=None, limit=LEASE_BATCH, lease_seconds=LEASE_SECONDS) -> list:
+        """Свободные задачи (и задачи с истёкшей арендой) -> [(ключ, kind, payload)] в аренду узлу."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Истёкшая аренда на последней попытке — задача больше не выдаётся
+            conn.execute(
+                "UPDATE work_items SET status = ?, error = 'lease expired', updated = ?"
+                " WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, now, LEASED, now, MAX_ATTEMPTS),
+            )
+            rows = conn.execute(
+                "SELECT item_key, kind, payload FROM work_items"
+                " WHERE (status = ? OR (status = ? AND lease_expires < ?)) AND attempts < ?"
+                + (" AND kind = ?" if kind else "") +
+                " ORDER BY updated LIMIT ?",
+                (PENDING, LEASED, now, MAX_ATTEMPTS) + ((kind,) if kind else ()) + (limit,),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE work_items SET status = ?, owner = ?, lease_expires = ?, attempts = attempts + 1, updated = ?"
+                " WHERE item_key = ?",
+                ((LEASED, node, now + lease_seconds, now, key) for key, _, _ in rows),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [(key, item_kind, json.loads(payload)) for key, item_kind, payload in rows]
+
+    def heartbeat(self, node, keys, lease_seconds=LEASE_SECONDS) -> int:
+        """Продлевает аренду задач узла; вернёт, сколько ещё за ним (остальные уже отданы другим)."""
+        conn = self._conn()
+        keys = list(keys)
+        cur = conn.executemany(
+            "UPDATE work_items SET lease_expires = ? WHERE item_key = ? AND owner = ? AND status = ?",
+            ((time.time() + lease_seconds, key, node, LEASED) for key in keys),
+        )
+        return cur.rowcount
+
+    def complete(self, node, keys, kind, busy_seconds=0.0) -> int:
+        """
+        Закрывает задачи, которые ещё в аренде у узла; вернёт их число.
+        Задачи, уже отданные другому узлу (аренда истекла), не трогаются.
+        """
+        conn = self._conn()
+        keys = list(keys)
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        completed = conn.executemany(
+            "UPDATE work_items SET status = ?, updated = ?, error = NULL WHERE item_key = ? AND owner = ? AND status = ?",
+            ((DONE, now, key, node, LEASED) for key in keys),
+        ).rowcount
+        self._count(conn, node, kind, completed, 0, busy_seconds, now)
+        conn.execute("COMMIT")
+        return completed
+
+    def fail(self, node, key, kind, error, retryable=False):
+        """
+        Задача возвращается в очередь; после MAX_ATTEMPTS попыток — failed.
+        retryable — отказ не из-за задачи (429): попытка возвращается, в failed узла не считается.
+        Поздний отказ по задаче, которая уже у другого узла (или сделана), игнорируется -> False.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        if retryable:
+            cur = conn.execute(
+                "UPDATE work_items SET status = ?, attempts = MAX(attempts - 1, 0),"
+                " owner = NULL, lease_expires = NULL, error = ?, updated = ? WHERE item_key = ? AND owner = ? AND status = ?",
+                (PENDING, str(error)[:500], now, key, node, LEASED),
+            )
+        else:
+            cur = conn.execute(
+                "UPDATE work_items SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END,"
+                " owner = NULL, lease_expires = NULL, error = ?, updated = ? WHERE item_key = ? AND owner = ? AND status = ?",
+                (MAX_ATTEMPTS, FAILED, PENDING, str(error)[:500], now, key, node, LEASED),
+            )
+        applied = cur.rowcount > 0
+        self._count(conn, node, kind, 0, int(applied and not retryable), 0.0, now)
+        conn.execute("COMMIT")
+        return applied
+
+    @staticmethod
+    def _count(conn, node, kind, done, failed, busy_seconds, now):
+        conn.execute(
+            "INSERT INTO node_stats (node, kind, done, failed, busy_seconds, first_seen, last_seen)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (node, kind) DO UPDATE SET done = done + excluded.done, failed = failed + excluded.failed,"
+            " busy_seconds = busy_seconds + excluded.busy_seconds, last_seen = excluded.last_seen",
+            (node, kind, done, failed, busy_seconds, now - busy_seconds, now),
+        )
+
+    def save_results(self, node, records):
+        """Upsert по id вакансии: повторная обработка перезаписывает строку, а не дублирует."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "INSERT INTO results (vacancy_id, payload, node, updated) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (vacancy_id) DO UPDATE SET payload = excluded.payload, node = excluded.node, updated = excluded.updated",
+            ((str(r["id"]), json.dumps(r, ensure_ascii=False), node, now) for r in records),
+        )
+        conn.execute("COMMIT")
+
+    def iter_results(self):
+        for (payload,) in self._conn().execute("SELECT payload FROM results ORDER BY vacancy_id"):
+            yield json.loads(payload)
+
+    def status(self) -> dict:
+        conn = self._conn()
+        now = time.time()
+        counts = {}
+        for kind, status, expired, n in conn.execute(
+            "SELECT kind, status, status = ? AND lease_expires < ?, COUNT(*) FROM work_items GROUP BY 1, 2, 3",
+            (LEASED, now),
+        ):
+            # Просроченная аренда — задача фактически снова в очереди
+            key = "expired" if expired else status
+            counts.setdefault(kind, {}).setdefault(key, 0)
+            counts[kind][key] += n
+        nodes = [
+            {"node": node, "kind": kind, "done": done, "failed": failed,
+             "busy_seconds": round(busy, 1), "last_seen": round(now - last, 1),
+             "per_second": round(done / (last - first), 2) if last > first else None}
+            for node, kind, done, failed, busy, first, last in conn.execute(
+                "SELECT node, kind, done, failed, busy_seconds, first_seen, last_seen FROM node_stats ORDER BY node, kind"
+            )
+        ]
+        results = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {"items": counts, "results": results, "nodes": nodes}
+
+
+# Захват задач в Redis одним скриптом: возврат просроченных аренд + выдача из pending.
+# Завершённые (done/failed) задачи не возвращаются и не выдаются, даже если ключ остался в списке
+_REDIS_LEASE = """
+local now, expires, node, limit, max_attempts = tonumber(ARGV[1]), tonumber(ARGV[2]), ARGV[3], tonumber(ARGV[4]), tonumber(ARGV[5])
+local function finished(item)
+  local status = redis.call('HGET', item, 'status')
+  return status == 'done' or status == 'failed'
+end
+for _, key in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], 0, now)) do
+  redis.call('ZREM', KEYS[2], key)
+  if not finished(KEYS[3] .. key) then
+    redis.call('RPUSH', KEYS[1], key)
+  end
+end
+local out = {}
+while #out < limit do
+  local key = redis.call('LPOP', KEYS[1])
+  if not key then break end
+  local item = KEYS[3] .. key
+  if not finished(item) then
+    local attempts = redis.call('HINCRBY', item, 'attempts', 1)
+    if attempts > max_attempts then
+      redis.call('HSET', item, 'status', 'failed')
+    else
+      redis.call('HSET', item, 'status', 'leased', 'owner', node)
+      redis.call('ZADD', KEYS[2], expires, key)
+      table.insert(out, key)
+    end
+  end
+end
+return out
+"""
+
+# Закрытие задач узла: только тех, что ещё в аренде у него (иначе их уже взял другой)
+_REDIS_COMPLETE = """
+local node, completed = ARGV[1], 0
+for i = 2, #ARGV do
+  local key = ARGV[i]
+  local item = KEYS[2] .. key
+  if redis.call('HGET', item, 'owner') == node and redis.call('HGET', item, 'status') == 'leased' then
+    redis.call('ZREM', KEYS[1], key)
+    redis.call('HSET', item, 'status', 'done')
+    completed = completed + 1
+  end
+end
+if completed > 0 then
+  redis.call('HINCRBY', KEYS[3], 'done', completed)
+end
+return completed
+"""
+
+# Отказ по задаче: проверка аренды и возврат в очередь — атомарно.
+# Возвращает новый статус или false, если задача уже не у этого узла
+_REDIS_FAIL = """
+local key, node, err, retryable, max_attempts = ARGV[1], ARGV[2], ARGV[3], ARGV[4] == '1', tonumber(ARGV[5])
+local item = KEYS[3] .. key
+if redis.call('HGET', item, 'owner') ~= node or redis.call('HGET', item, 'status') ~= 'leased' then
+  return false
+end
+redis.call('ZREM', KEYS[1], key)
+local attempts = tonumber(redis.call('HGET', item, 'attempts') or '0')
+if retryable then
+  redis.call('HSET', item, 'status', 'pending', 'attempts', math.max(attempts - 1, 0), 'error', err)
+elseif attempts >= max_attempts then
+  redis.call('HSET', item, 'status', 'failed', 'error', err)
+  redis.call('HINCRBY', KEYS[4], 'failed', 1)
+  return 'failed'
+else
+  redis.call('HSET', item, 'status', 'pending', 'error', err)
+end
+redis.call('RPUSH', KEYS[2], key)
+return 'pending'
+"""
+
+
+class RedisWorkQueue:
+    """То же, что SQLiteWorkQueue, поверх Redis: pending — список, аренды — sorted set по сроку."""
+
+    def __init__(self, url, prefix="hh:queue:"):
+        import redis
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._lease_script = self.redis.register_script(_REDIS_LEASE)
+        self._complete_script = self.redis.register_script(_REDIS_COMPLETE)
+        self._fail_script = self.redis.register_script(_REDIS_FAIL)
+
+    def _k(self, name, kind=""):
+        return f"{self.prefix}{name}{':' + kind if kind else ''}"
+
+    def enqueue(self, kind, items) -> int:
+        added = 0
+        pipe = self.redis.pipeline()
+        items = list(items)
+        for key, payload in items:
+            pipe.hsetnx(self._k("item:") + key, "payload", json.dumps(payload, ensure_ascii=False))
+        created = pipe.execute()
+        pipe = self.redis.pipeline()
+        for (key, _), new in zip(items, created):
+            if new:
+                pipe.hset(self._k("item:") + key, mapping={"kind": kind, "status": PENDING, "attempts": 0})
+                pipe.rpush(self._k("pending", kind), key)
+                added += 1
+        pipe.sadd(self._k("kinds"), kind)
+        pipe.execute()
+        return added
+
+    def lease(self, node, kind=None, limit=LEASE_BATCH, lease_seconds=LEASE_SECONDS) -> list:
+        kinds = [kind] if kind else sorted(self.redis.smembers(self._k("kinds")) or {"listing", "detail"})
+        now = time.time()
+        leased = []
+        for item_kind in kinds:
+            keys = self._lease_script(
+                keys=[self._k("pending", item_kind), self._k("leases", item_kind), self._k("item:")],
+                args=[now, now + lease_seconds, node, limit - len(leased), MAX_ATTEMPTS],
+            )
+            for key in keys:
+                leased.append((key, item_kind, json.loads(self.redis.hget(self._k("item:") + key, "payload"))))
+            if len(leased) >= limit:
+                break
+        return leased
+
+    def heartbeat(self, node, keys, lease_seconds=LEASE_SECONDS) -> int:
+        kept = 0
+        for key in keys:
+            item = self.redis.hgetall(self._k("item:") + key)
+            if item.get("owner") == node and item.get("status") == LEASED:
+                self.redis.zadd(self._k("leases", item["kind"]), {key: time.time() + lease_seconds}, xx=True)
+                kept += 1
+        return kept
+
+    def complete(self, node, keys, kind, busy_seconds=0.0) -> int:
+        keys = list(keys)
+        completed = int(self._complete_script(
+            keys=[self._k("leases", kind), self._k("item:"), self._k("counts", kind)], args=[node, *keys],
+        )) if keys else 0
+        pipe = self.redis.pipeline()
+        self._count(pipe, node, kind, completed, 0, busy_seconds)
+        pipe.execute()
+        return completed
+
+    def fail(self, node, key, kind, error, retryable=False) -> bool:
+        status = self._fail_script(
+            keys=[self._k("leases", kind), self._k("pending", kind), self._k("item:"), self._k("counts", kind)],
+            args=[key, node, str(error)[:500], int(retryable), MAX_ATTEMPTS],
+        )
+        pipe = self.redis.pipeline()
+        self._count(pipe, node, kind, 0, int(bool(status) and not retryable), 0.0)
+        pipe.execute()
+        return bool(status)
+
+    def _count(self, pipe, node, kind, done, failed, busy_seconds):
+        stats = self._k("node:") + f"{node}|{kind}"
+        now = time.time()
+        pipe.hsetnx(stats, "first_seen", now - busy_seconds)
+        pipe.hincrby(stats, "done", done)
+        pipe.hincrby(stats, "failed", failed)
+        pipe.hincrbyfloat(stats, "busy_seconds", busy_seconds)
+        pipe.hset(stats, "last_seen", now)
+        pipe.sadd(self._k("nodes"), f"{node}|{kind}")
+        pipe.sadd(self._k("kinds"), kind)
+
+    def save_results(self, node, records):
+        records = list(records)
+        if records:
+            self.redis.hset(self._k("results"), mapping={str(r["id"]): json.dumps(r, ensure_ascii=False) for r in records})
+
+    def iter_results(self):
+        for _, payload in sorted(self.redis.hscan_iter(self._k("results"))):
+            yield json.loads(payload)
+
+    def status(self) -> dict:
+        now = time.time()
+        counts = {}
+        for kind in self.redis.smembers(self._k("kinds")):
+            counts[kind] = {
+                PENDING: self.redis.llen(self._k("pending", kind)),
+                LEASED: self.redis.zcount(self._k("leases", kind), now, "+inf"),
+                "expired": self.redis.zcount(self._k("leases", kind), 0, now),
+                **{k: int(v) for k, v in self.redis.hgetall(self._k("counts", kind)).items()},
+            }
+        nodes = []
+        for member in sorted(self.redis.smembers(self._k("nodes"))):
+            node, kind = member.rsplit("|", 1)
+            s = self.redis.hgetall(self._k("node:") + member)
+            first, last = float(s.get("first_seen", now)), float(s.get("last_seen", now))
+            done = int(s.get("done", 0))
+            nodes.append({"node": node, "kind": kind, "done": done, "failed": int(s.get("failed", 0)),
+                          "busy_seconds": round(float(s.get("busy_seconds", 0)), 1), "last_seen": round(now - last, 1),
+                          "per_second": round(done / (last - first), 2) if last > first else None})
+        return {"items": counts, "results": self.redis.hlen(self._k("results")), "nodes": nodes}
+
+
+def open_queue(url=QUEUE_URL):
+    """Очередь по адресу: redis://... или sqlite:///путь (просто путь — тоже SQLite)."""
+    if url.startswith(("redis://", "rediss://")):
+        return RedisWorkQueue(url)
+    if url.startswith("sqlite:///"):
+        url = url[len("sqlite:///"):]
+    return SQLiteWorkQueue(url)
@@ -3,20 +3,19 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
+from main_page.normalize import RATES_AS_OF, RATES_SOURCE, ensure_normalized
+from main_page.aggregates import salary_by_category, salary_by_experience, set_dataset
 
 # --- 1. ПРОВЕРКА ДАННЫХ ---
 if 'vacancies_df' not in st.session_state or st.session_state['vacancies_df'] is None:
     st.warning("⚠️ Данные не найдены. Сначала запустите парсер на главной странице.")
     st.stop()
 
-df = st.session_state['vacancies_df'].copy()
-
-# Конвертируем колонку в числа, если они вдруг загрузились как строки
-df['salary_from'] = pd.to_numeric(df['salary_from'], errors='coerce')
-df['salary_to'] = pd.to_numeric(df['salary_to'], errors='coerce')
+# Числовые зарплаты в рублях и salary_to_clean уже посчитаны при загрузке данных
+df = set_dataset(ensure_normalized(st.session_state['vacancies_df']))
 
 # Оставляем только те вакансии, где указана хотя бы минимальная зарплата
-df_salary = df.dropna(subset=['salary_from'])
+df_salary = df.dropna(subset=['salary_from_rub'])
 
 if df_salary.empty:
     st.error("❌ В собранных вакансиях не указаны зарплаты. Нечего анализировать.")
@@ -24,17 +23,17 @@ if df_salary.empty:
 
 st.title("💰 Детальный анализ зарплат в IT")
 st.markdown(f"Аналитика построена на основе **{len(df_salary)}** вакансий с указанным доходом.")
+st.caption(f"Зарплаты в валюте пересчитаны в рубли по курсам на {RATES_AS_OF} ({RATES_SOURCE}); свои курсы — файл в HH_CURRENCY_RATES.")
 
 # --- 2. ОБЩИЕ МЕТРИКИ (KPI) ---
-avg_min = df_salary['salary_from'].median()
-df_salary['salary_to_clean'] = df_salary['salary_to'].fillna(df_salary['salary_from'] * 1.2)
+avg_min = df_salary['salary_from_rub'].median()
 avg_max = df_salary['salary_to_clean'].median()
 
 m1, m2, m3 = st.columns(3)
 # Используем безопасное приведение к int через проверку на NaN
 m1.metric("Медианный 'от'", f"{int(avg_min/1000) if pd.notnull(avg_min) else 0}к")
 m2.metric("Медианный 'до'", f"{int(avg_max/1000) if pd.notnull(avg_max) else 0}к")
-max_val = df_salary['salary_from'].max()
+max_val = df_salary['salary_from_rub'].max()
 m3.metric("Самый высокий 'от'", f"{int(max_val/1000) if pd.notnull(max_val) else 0}к")
 
 # --- 3. ГРАФИК: ЗАРПЛАТНЫЕ ОБЛАКА ---
@@ -44,10 +43,10 @@ st.subheader("📊 Зарплатные вилки по направлениям
 fig_box = px.box(
     df_salary, 
     x="category", 
-    y="salary_from", 
+    y="salary_from_rub", 
     color="category",
     points="all",
-    labels={'salary_from': 'Зарплата от (руб.)', 'category': 'Направление'},
+    labels={'salary_from_rub': 'Зарплата от (руб.)', 'category': 'Направление'},
     title="Распределение зарплат (точки — конкретные вакансии)"
 )
 fig_box.update_layout(showlegend=False)
@@ -57,10 +56,10 @@ st.plotly_chart(fig_box, use_container_width=True)
 st.divider()
 st.subheader("📈 Диапазоны выплат (Медианный Мин. - Макс.)")
 
-salary_stats = df_salary.groupby('category').agg({
-    'salary_from': 'median',
-    'salary_to_clean': 'median'
-}).reset_index()
+# Медианы по категориям берём из общего кэша агрегатов (квантили считаются один раз на датасет)
+salary_stats = salary_by_category(df)[['category', 'from_q50', 'to_q50']].rename(
+    columns={'from_q50': 'salary_from', 'to_q50': 'salary_to_clean'}
+)
 
 salary_stats = salary_stats.sort_values('salary_to_clean')
 
@@ -91,11 +90,9 @@ st.plotly_chart(fig_sal, use_container_width=True)
 st.divider()
 st.subheader("⏳ Сколько стоит опыт?")
 
-exp_salary = df_salary.groupby('experience')['salary_from'].median().reindex(
-    ["Нет опыта", "От 1 года до 3 лет", "От 3 до 6 лет", "Более 6 лет"]
-).reset_index()
+# Группировка по experience_code уже даёт порядок от «Нет опыта» к «Более 6 лет»
+exp_salary = salary_by_experience(df).rename(columns={'salary_from_rub': 'salary_from'})
 
-# Ключевое исправление: удаляем строки, где после reindex появились NaN (если таких категорий нет в данных)
 exp_salary_clean = exp_salary.dropna(subset=['salary_from'])
 
 if not exp_salary_clean.empty:
@@ -117,5 +114,5 @@ else:
 # --- 6. ТОП САМЫХ ДОРОГИХ ВАКАНСИЙ ---
 st.divider()
 st.subheader("💎 ТОП-5 самых высокооплачиваемых вакансий")
-top_5 = df_salary.sort_values(by='salary_from', ascending=False).head(5)
-st.table(top_5[['name', 'company', 'salary_from', 'category']])
\ No newline at end of file
+top_5 = df_salary.nlargest(5, 'salary_from_rub')
+st.table(top_5[['name', 'company', 'salary_from', 'currency', 'category']])
\ No newline at end of file
@@ -2,25 +2,25 @@ import requests
 import json
 from datetime import datetime, timedelta
 import json
+import os
+import sys
 import time
 from datetime import datetime
 
+# Папка Chart — оттуда берём общее инструментирование (main_page/instrumentation.py)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from main_page.instrumentation import format_summary, inc, span, timed
+
 """"
 В данном примере мы ищем тег <script> с типом "application/ld+json", который содержит структурированные данные о вакансии.
 Если такой тег найден, мы извлекаем его содержимое, превращаем его в словарь Python с помощью json.loads() и затем извлекаем нужные поля, такие как название вакансии, описание, дата публикации и тип занятости.
 Если тег не найден, мы просто создаем пустой словарь, и в дальнейшем можно обработать этот случай по своему усмотрению.
 """
 
-# Функция-декоратор для измерения времени выполнения функции
+# Декоратор замера времени: каждый вызов — спан с именем функции в общем реестре метрик.
+# Раньше печатал время на каждый вызов; теперь сводка по этапам — format_summary() в конце скрипта
 def timer(func):
-    def wrapper(*args, **kwargs):
-        print("Начало выполнения функции...")
-        t_start = time.perf_counter()
-        result = func(*args, **kwargs)
-        t_end = time.perf_counter()
-        print(f"Время выполнения функции: {t_end - t_start:.5f} секунд")
-        return result
-    return wrapper
+    return timed(func.__name__)(func)
 
 
 # Получаем текущую дату
@@ -87,7 +87,9 @@ def parse_vacancies(params):
             params["page"] = 0
             
             while True:
-                response = requests.get("https://api.hh.ru/vacancies", params=params)
+                with span("http_fetch", target="listing"):
+                    response = requests.get("https://api.hh.ru/vacancies", params=params)
+                inc("http_responses", target="listing", status=response.status_code)
                 data = response.json()
                 
                 if response.status_code != 200:
@@ -133,6 +135,7 @@ def parse_vacancies(params):
 
 if __name__ == "__main__":
     parse_vacancies(params_vacancy)
+    print(format_summary())
 # print(json.dumps(data, indent=4, ensure_ascii=False))
 
 
@@ -1,6 +1,6 @@
 import json 
 from parse_by_id import parse_vacancy_by_id, process_vacancy, BASE_URL, NAMBER_VACANCY
-from example import timer
+from example import format_summary, timer
 
 """"
 В данном примере мы ищем тег <script> с типом "application/ld+json", который содержит структурированные данные о вакансии.
@@ -19,4 +19,5 @@ def parse_all_vacancies():
         print(key, process_vacancy(parse_vacancy_by_id(item['id_hh'])))
     
 if __name__ == "__main__":
-    parse_all_vacancies()
\ No newline at end of file
+    parse_all_vacancies()
+    print(format_summary())
\ No newline at end of file
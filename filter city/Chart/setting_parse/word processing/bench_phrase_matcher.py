@@ -0,0 +1,79 @@
+"""
+Пропускная способность found_data_processing: старый перебор словарей
+(`item in text` для каждой записи) против PhraseMatcher (один проход по леммам).
+
+Вход — vacancy_description.json (как в main()), если его нет — описания из
+тестовой выгрузки "тест 1000 вакансий Москва.xlsx" в корне репозитория.
+Лемматизация считается один раз и в замер не входит.
+
+    python bench_phrase_matcher.py [сколько вакансий]
+"""
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+from data import CATEGORIES, GRADE_MAP, SKILL_MAP
+from word_processing import analyze, get_matcher
+
+SAMPLE_XLSX = os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "тест 1000 вакансий Москва.xlsx")
+REPEATS = 3
+
+
+def load_descriptions(limit):
+    if os.path.exists("vacancy_description.json"):
+        with open("vacancy_description.json", "r", encoding="utf-8") as f:
+            return [item["description"] for item in json.load(f) if item.get("description")][:limit]
+    df = pd.read_excel(SAMPLE_XLSX)
+    return df["description"].dropna().astype(str).tolist()[:limit]
+
+
+def scan_dictionaries(text):
+    """Старый способ: каждая запись каждого словаря — поиск по списку лемм."""
+    found = {}
+    for mapping in (SKILL_MAP, CATEGORIES, GRADE_MAP):
+        for label, items in mapping.items():
+            hits = [item for item in items if item in text]
+            if hits:
+                found[label] = hits
+    return found
+
+
+def best_time(func, docs):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for doc in docs:
+            func(doc)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    descriptions = load_descriptions(limit)
+    start = time.perf_counter()
+    docs = [analyze(text) for text in descriptions]
+    lemma_time = time.perf_counter() - start
+
+    matcher = get_matcher()
+    tokens = sum(len(doc) for doc in docs)
+    scan = best_time(scan_dictionaries, docs)
+    trie = best_time(matcher.match, docs)
+
+    # Сколько записей находит каждый способ (многословные фразы — только у PhraseMatcher)
+    scan_hits = sum(len(v) for doc in docs for v in scan_dictionaries(doc).values())
+    trie_hits = sum(len(v) for doc in docs for group in matcher.match(doc).values() for v in group.values())
+    multiword = sum(1 for _, _, phrase in matcher.entries if len(analyze(phrase)) > 1)
+
+    print(f"Вакансий: {len(docs)}, лемм: {tokens}, записей словарей: {len(matcher.entries)} (многословных: {multiword})")
+    print(f"Лемматизация (вне замера): {lemma_time:.2f} с")
+    print(f"Перебор словарей: {scan:.3f} с ({len(docs) / scan:,.0f} вакансий/с), найдено записей: {scan_hits}")
+    print(f"PhraseMatcher:    {trie:.3f} с ({len(docs) / trie:,.0f} вакансий/с), найдено записей: {trie_hits}")
+    print(f"Ускорение: x{scan / trie:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Поиск фраз из словарей (SKILL_MAP, CATEGORIES, GRADE_MAP) за один проход по леммам.
+
+Раньше found_data_processing проверял `item in text` для каждой записи каждого
+словаря — O(словарь × токены), и многословные записи ("spring boot",
+"team lead", "без опыта") не находились вовсе: в тексте они разбиты на токены.
+
+Здесь все записи один раз прогоняются через ту же лемматизацию, что и текст,
+и складываются в префиксное дерево (trie) по токенам. Текст проходится один раз:
+с каждой позиции идём по дереву, пока есть продолжение, и собираем все
+записи, которые закончились по пути.
+"""
+from collections import defaultdict
+
+# Ключ конца фразы в узле дерева (токены — строки, поэтому None не пересечётся)
+_END = None
+
+
+class PhraseMatcher:
+    def __init__(self, analyze):
+        """analyze: текст -> список лемм (та же функция, что и для описаний вакансий)."""
+        self.analyze = analyze
+        self.root = {}
+        self.entries = []
+        self.max_depth = 0
+
+    def add(self, group, label, phrase):
+        """Добавляет запись словаря: group — словарь (skills/categories/grades), label — ключ внутри него."""
+        entry = len(self.entries)
+        self.entries.append((group, label, phrase))
+        # Леммы фразы + её слова как есть: одиночное слово вне контекста может
+        # лемматизироваться иначе, чем в тексте ("лид" -> "лида")
+        for tokens in {tuple(self.analyze(phrase)), tuple(phrase.lower().split())}:
+            if not tokens:
+                continue
+            node = self.root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            ends = node.setdefault(_END, [])
+            if entry not in ends:
+                ends.append(entry)
+            self.max_depth = max(self.max_depth, len(tokens))
+
+    @classmethod
+    def from_dictionaries(cls, dictionaries, analyze):
+        """dictionaries: {group: {label: [фразы]}} — например {"skills": SKILL_MAP, ...}."""
+        matcher = cls(analyze)
+        for group, mapping in dictionaries.items():
+            for label, phrases in mapping.items():
+                for phrase in phrases:
+                    matcher.add(group, label, phrase)
+        return matcher
+
+    def match(self, tokens) -> dict:
+        """
+        {group: {label: [фразы]}} — все записи, встретившиеся в списке лемм.
+        Фразы внутри label — в порядке словаря, каждая один раз.
+        """
+        found = set()
+        root = self.root
+        for start in range(len(tokens)):
+            node = root.get(tokens[start])
+            pos = start + 1
+            while node is not None:
+                if _END in node:
+                    found.update(node[_END])
+                if pos == len(tokens):
+                    break
+                node = node.get(tokens[pos])
+                pos += 1
+
+        result = defaultdict(dict)
+        for entry in sorted(found):
+            group, label, phrase = self.entries[entry]
+            result[group].setdefault(label, []).append(phrase)
+        return dict(result)
@@ -15,8 +15,8 @@ from natasha import (
 
 import json
 import re
+from functools import lru_cache
 
-from streamlit import text
 from data import *
 
 import sys
@@ -26,8 +26,12 @@ from itertools import islice
 
 # Добавляем путь к родительской папке
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# И к папке Chart — оттуда берём общую лемматизацию с кэшем (main_page/nlp.py)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from example import timer
+from example import format_summary, timer
+from main_page.nlp import LEMMA_MODE, emb, lemmatizer, morph_vocab, segmenter
+from phrase_matcher import PhraseMatcher
 
 
 # Коды цветов
@@ -42,11 +46,7 @@ RESET = "\033[0m"
 Обратите внимание, что при сохранении в YAML мы используем параметр allow_unicode=True, чтобы сохранить все символы в их оригинальном виде, а также default_flow_style=False для более читаемого формата.
 """
 
-segmenter = Segmenter()
-morph_vocab = MorphVocab()
-
-emb = NewsEmbedding()
-morph_tagger = NewsMorphTagger(emb)
+# segmenter, morph_vocab, emb и морфологический теггер — общие с main_page/nlp.py (модели грузятся один раз)
 syntax_parser = NewsSyntaxParser(emb)
 ner_tagger = NewsNERTagger(emb)
 
@@ -59,6 +59,11 @@ def lemmatization(text):
     В данном примере мы выполняем лемматизацию текста описания вакансии с помощью библиотеки Natasha. Мы сначала очищаем текст от специальных символов, оставляя только буквы, цифры и пробелы. Затем мы создаем документ Natasha, разбиваем его на слова, определяем форму слов и получаем их леммы. Результатом является список лемм, который можно использовать для дальнейшего анализа текста.
     Обратите внимание, что лемматизация может не всегда работать идеально, особенно для сложных текстов или специализированной терминологии, поэтому результаты могут потребовать дополнительной обработки или проверки.
     """
+    return analyze(text)
+
+
+def analyze(text):
+    """Очистка + леммы без замера времени: ею же лемматизируются фразы словарей для PhraseMatcher."""
     # удалить спецсимволы (оставить буквы, цифры и пробел)
     clean_text = re.sub(r'[^a-zA-Zа-яА-Я0-9\s+#+]', ' ', text)
     # убрать лишние пробелы
@@ -67,16 +72,18 @@ def lemmatization(text):
     doc = Doc(clean_text)
     # 4️⃣ разбиваем на слова
     doc.segment(segmenter)
-    # 5️⃣ определяем форму слов
-    doc.tag_morph(morph_tagger)
-    # 6️⃣ получаем леммы
-    lemmas = []
+    # 5️⃣-6️⃣ форма слов и леммы: кэш (словоформа, POS, признаки) -> лемма,
+    # в режиме HH_LEMMA_MODE=dictionary — без контекстного теггера
+    return lemmatizer.lemmatize_doc(doc, LEMMA_MODE)
 
-    for token in doc.tokens:    
-        token.lemmatize(morph_vocab)
-        lemmas.append(token.lemma)
 
-    return lemmas 
+@lru_cache(maxsize=1)
+def get_matcher():
+    """Дерево фраз по всем трём словарям — строится один раз."""
+    return PhraseMatcher.from_dictionaries(
+        {"skills": SKILL_MAP, "categories": CATEGORIES, "grades": GRADE_MAP}, analyze
+    )
+
 
 def found_data_processing(text: list):
     """"
@@ -96,46 +103,29 @@ def found_data_processing(text: list):
     
     # аналогично для остальных категорий навыков, например:
     
+    # Один проход по леммам: навыки, категории и грейды сразу (в т.ч. многословные — "spring boot", "team lead")
+    found = get_matcher().match(text)
     found_technologies = {}
     
     print("\n---- разделение по навыкам ----\n")
-    SKILL_MAP_LIST = []
-    for value in SKILL_MAP:
-        SKILL_MAP_LIST.append(value)
-    
-    for skill in SKILL_MAP_LIST:
-        found_skill = [item for item in SKILL_MAP[skill] if item in text]
-        
-        if found_skill:
-            print(f"Найдены {skill}: {found_skill}")
-            found_technologies[skill] = found_skill
+    for skill, found_skill in found.get("skills", {}).items():
+        print(f"Найдены {skill}: {found_skill}")
+        found_technologies[skill] = found_skill
     
-    # Категории для навыков могут быть разными, например: "Languages", "Frameworks", "Tools", "Testing", "Cybersecurity" и т.д. В данном примере мы просто проходим по всем категориям в SKILL_MAP и ищем соответствующие ключевые слова в тексте. Если какие-то навыки из категории найдены, мы выводим их на экран.
+    # Категории для навыков могут быть разными, например: "Languages", "Frameworks", "Tools", "Testing", "Cybersecurity" и т.д. Все они уже найдены за тот же проход по тексту.
     print("\n---- разделение по категориям ----\n")
-    CATEGORIES_MAP_LIST = []
-    for value in CATEGORIES:
-        CATEGORIES_MAP_LIST.append(value)
-    
-    for category in CATEGORIES_MAP_LIST:
-        found_category = [item for item in CATEGORIES[category] if item in text]
-        
-        if found_category:
-            print(f"Найдены {category}: {found_category}")
-            found_technologies[category] = found_category
+    for category, found_category in found.get("categories", {}).items():
+        print(f"Найдены {category}: {found_category}")
+        found_technologies[category] = found_category
      
     print("\n---- разделение по грейдам ----\n")       
-    # Грейды для навыков могут быть разными, например: "Junior", "Middle", "Senior", "Lead" и т.д. В данном примере мы просто проходим по всем грейдам в GRADE_MAP и ищем соответствующие ключевые слова в тексте. Если какие-то грейды из категории найдены, мы выводим их на экран.
-    for grade in GRADE_MAP:
-        found_grade = [item for item in GRADE_MAP[grade] if item in text]
-        if found_grade:
-            print(f"Найдены {grade}: {found_grade}")
-            found_technologies[grade] = found_grade
+    # Грейды: "Junior", "Middle", "Senior", "Lead" и т.д.
+    for grade, found_grade in found.get("grades", {}).items():
+        print(f"Найдены {grade}: {found_grade}")
+        found_technologies[grade] = found_grade
     
-    profitability_assessment = 0
-    
-    for count in SKILL_MAP_LIST:
-        if count in found_technologies:
-            profitability_assessment += len(found_technologies.get(count, []))
+    # Оценка релевантности — число найденных навыков из SKILL_MAP
+    profitability_assessment = sum(len(items) for items in found.get("skills", {}).values())
             
     pretty_dict = json.dumps(found_technologies, indent=4, ensure_ascii=False)
             
@@ -162,6 +152,8 @@ def main():
             
             print(f"\n#################################{GREEN}{BOLD} id: {item['id']}{RESET}  ########################################")
             print(f"{BLUE}{BOLD} №{num} Обрабатываем вакансию{RESET}", found_data_processing(lemmatization(description_vacancy)), " \n")
-            
-            
-main()
+
+
+if __name__ == "__main__":
+    main()
+    print(format_summary())
@@ -1,14 +1,16 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from collections import Counter
+from main_page.normalize import ensure_normalized
+from main_page.aggregates import set_dataset, skill_counts, skill_salary
 
 # --- 1. ПРОВЕРКА ДАННЫХ ---
 if 'vacancies_df' not in st.session_state or st.session_state['vacancies_df'] is None:
     st.warning("⚠️ Данные не найдены. Пожалуйста, сначала запустите парсер на главной странице.")
     st.stop()
 
-df = st.session_state['vacancies_df']
+# skills_list (готовые списки навыков) строится один раз при загрузке данных
+df = set_dataset(ensure_normalized(st.session_state['vacancies_df']))
 
 # Проверяем наличие колонки с навыками
 if 'skills' not in df.columns:
@@ -19,14 +21,8 @@ st.title("🛠️ Аналитика технологического стека
 st.markdown(f"Анализ навыков на основе **{len(df)}** вакансий.")
 
 # --- 2. ПОДГОТОВКА ДАННЫХ ДЛЯ ГРАФИКОВ ---
-# Превращаем строку навыков обратно в список и считаем их
-all_skills_list = []
-for s in df['skills'].dropna():
-    if s:
-        all_skills_list.extend([skill.strip() for skill in s.split(',')])
-
-skill_counts = Counter(all_skills_list)
-df_skills = pd.DataFrame(skill_counts.items(), columns=['Skill', 'Count']).sort_values(by='Count', ascending=False)
+# Счётчики навыков (общий и по категориям) считаются один раз на датасет
+df_skills = skill_counts(df)
 
 # --- 3. ВИЗУАЛИЗАЦИЯ 1: ТОП ТЕХНОЛОГИЙ (ОБЩИЙ) ---
 st.subheader("🔝 ТОП-20 самых востребованных технологий")
@@ -50,14 +46,8 @@ st.subheader("🎯 Стек технологий по направлениям")
 
 selected_cat = st.selectbox("Выберите направление для анализа:", options=df['category'].unique())
 
-# Фильтруем навыки только для выбранной категории
-cat_skills = []
-for s in df[df['category'] == selected_cat]['skills'].dropna():
-    if s:
-        cat_skills.extend([skill.strip() for skill in s.split(',')])
-
-cat_skill_counts = Counter(cat_skills)
-df_cat_skills = pd.DataFrame(cat_skill_counts.items(), columns=['Skill', 'Count']).sort_values(by='Count', ascending=False)
+# Навыки выбранной категории — готовый счётчик из кэша, без фильтрации df на каждый выбор
+df_cat_skills = skill_counts(df, selected_cat)
 
 if not df_cat_skills.empty:
     fig_cat = px.pie(
@@ -76,23 +66,16 @@ else:
 st.divider()
 st.subheader("💡 Связь: Технология + Зарплата")
 
-# Берем только те вакансии, где указана зарплата (хотя бы 'от')
-df_salary = df[df['salary_from'].notnull()].copy()
+# Средняя зарплата 'от' по каждому навыку (произведение разреженной матрицы навыков на вектор зарплат)
+df_skill_salary = skill_salary(df)
 
-if not df_salary.empty:
-    # Разворачиваем список навыков, чтобы каждая строка была "Один навык - Одна зарплата"
-    df_salary['skills_list'] = df_salary['skills'].str.split(',')
-    df_exploded = df_salary.explode('skills_list')
-    df_exploded['skills_list'] = df_exploded['skills_list'].str.strip()
-    
-    # Считаем среднюю зарплату по каждому навыку
-    skill_salary = df_exploded.groupby('skills_list')['salary_from'].agg(['mean', 'count']).reset_index()
-    skill_salary = skill_salary[skill_salary['count'] > 1] # Убираем единичные случаи
-    skill_salary.columns = ['Технология', 'Средняя зарплата (от)', 'Кол-во вакансий']
+if not df_skill_salary.empty:
+    df_skill_salary = df_skill_salary[df_skill_salary['count'] > 1] # Убираем единичные случаи
+    df_skill_salary.columns = ['Технология', 'Средняя зарплата (от)', 'Кол-во вакансий']
     
     st.write("Средняя предлагаемая зарплата (минимум) для специалистов со знанием:")
     st.dataframe(
-        skill_salary.sort_values(by='Средняя зарплата (от)', ascending=False),
+        df_skill_salary.sort_values(by='Средняя зарплата (от)', ascending=False),
         use_container_width=True,
         hide_index=True
     )
@@ -0,0 +1,80 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from main_page.normalize import ensure_normalized
+from main_page.aggregates import set_dataset, skill_stacks
+from main_page.cooccurrence import MIN_SUPPORT
+
+# --- 1. ПРОВЕРКА ДАННЫХ ---
+if 'vacancies_df' not in st.session_state or st.session_state['vacancies_df'] is None:
+    st.warning("⚠️ Данные не найдены. Пожалуйста, сначала запустите парсер на главной странице.")
+    st.stop()
+
+df = set_dataset(ensure_normalized(st.session_state['vacancies_df']))
+
+st.title("🧩 Стеки технологий")
+st.markdown(
+    "Какие технологии требуют **вместе**. Стек — набор навыков, который встречается "
+    f"хотя бы в {MIN_SUPPORT:.0%} вакансий направления (и не меньше чем в 3)."
+)
+
+# Пары и стеки посчитаны один раз на датасет (общий кэш агрегатов)
+with st.spinner("Считаем совместную встречаемость навыков..."):
+    stacks = skill_stacks(df)
+
+ALL = "Все направления"
+categories = [ALL] + [cat for cat in df['category'].value_counts().index if cat in stacks]
+selected_cat = st.selectbox("Направление:", options=categories)
+result = stacks[None if selected_cat == ALL else selected_cat]
+
+st.caption(f"Вакансий в выборке: {result['total']}")
+
+# --- 2. ТОП СТЕКОВ ---
+st.subheader("🔗 Самые частые стеки")
+df_stacks = result['stacks']
+if df_stacks.empty:
+    st.info("В этой выборке нет устойчивых сочетаний навыков.")
+else:
+    st.dataframe(
+        df_stacks.rename(columns={'stack': 'Стек', 'size': 'Навыков', 'count': 'Вакансий', 'support': 'Доля', 'lift': 'Lift'}),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Доля": st.column_config.NumberColumn(format="%.3f"),
+            "Lift": st.column_config.NumberColumn(format="%.2f"),
+        }
+    )
+
+# --- 3. ПАРЫ НАВЫКОВ ---
+st.divider()
+st.subheader("🤝 Пары навыков")
+st.markdown("**Lift > 1** — навыки встречаются вместе чаще, чем случайно; PMI — то же в логарифмической шкале.")
+
+df_pairs = result['pairs']
+if df_pairs.empty:
+    st.info("Недостаточно данных для пар навыков.")
+else:
+    df_pairs = df_pairs.assign(pair=df_pairs['skill_a'] + " + " + df_pairs['skill_b'])
+    fig_pairs = px.bar(
+        df_pairs.head(20),
+        x='count',
+        y='pair',
+        orientation='h',
+        color='lift',
+        color_continuous_scale='Viridis',
+        text='count',
+        labels={'count': 'Вакансий', 'pair': 'Пара', 'lift': 'Lift'}
+    )
+    fig_pairs.update_layout(yaxis={'categoryorder': 'total ascending'}, height=600)
+    st.plotly_chart(fig_pairs, use_container_width=True)
+
+    # Тепловая карта lift для самых частых навыков из пар
+    top_skills = pd.unique(pd.concat([df_pairs['skill_a'], df_pairs['skill_b']]))[:15]
+    heat = (
+        df_pairs[df_pairs['skill_a'].isin(top_skills) & df_pairs['skill_b'].isin(top_skills)]
+        .pivot_table(index='skill_a', columns='skill_b', values='lift')
+    )
+    if not heat.empty:
+        fig_heat = px.imshow(heat, color_continuous_scale='RdBu_r', color_continuous_midpoint=1.0, aspect='auto',
+                             labels={'color': 'Lift'}, title="Lift для пар частых навыков")
+        st.plotly_chart(fig_heat, use_container_width=True)
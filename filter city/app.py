@@ -1,15 +1,14 @@
 # -*- coding: utf-8 -*-
 """
 Веб-интерфейс для парсера HH.ru.
-Использует save_csv_2.py без изменений.
+Поиск и разбор выдачи — из save_csv_2.py.
 """
 
 import os
-import io
 import uuid
 import json
 import threading
-from flask import Flask, render_template, request, send_file, redirect, url_for, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, jsonify, stream_with_context
 
 # рабочая папка = папка этого файла (для импорта save_csv_2)
 _app_dir = os.path.dirname(os.path.abspath(__file__))
@@ -17,21 +16,38 @@ os.chdir(_app_dir)
 import sys
 if _app_dir not in sys.path:
     sys.path.insert(0, _app_dir)
+# общие модули Streamlit-приложения (main_page.*)
+_chart_dir = os.path.join(_app_dir, "Chart")
+if _chart_dir not in sys.path:
+    sys.path.append(_chart_dir)
 
 from save_csv_2 import (
     get_all_vacancies,
     get_area_id_by_city,
     get_vacancies_by_region,
     parse_vacancies,
-)  # save_csv_2 не изменяем
-import pandas as pd
+)
+from http_cache import (
+    ByteBudgetCache,
+    attachment_headers,
+    cache_vacancies,
+    compress_response,
+    etag_matches,
+    publish_search_result,
+)
+from main_page.export_stream import CSV_MIMETYPE, XLSX_MIMETYPE, iter_csv_bytes, iter_xlsx_bytes
+from main_page.analytics_engine import compute_analytics
+
+MAX_CACHE_ENTRIES = 20
+# Лимиты кэшей в байтах: выборки для экспорта и готовые ответы /search_result
+MAX_EXPORT_CACHE_BYTES = int(os.environ.get("HH_EXPORT_CACHE_MB", "64")) * 1024 * 1024
+MAX_RESULT_CACHE_BYTES = int(os.environ.get("HH_RESULT_CACHE_MB", "32")) * 1024 * 1024
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET", "hh-parser-dev-key")
-app.vacancy_cache = {}
+app.vacancy_cache = ByteBudgetCache(MAX_EXPORT_CACHE_BYTES, max_entries=MAX_CACHE_ENTRIES)
 app.search_progress = {}
-app.search_results = {}
-MAX_CACHE_ENTRIES = 20
+app.search_results = ByteBudgetCache(MAX_RESULT_CACHE_BYTES)
 
 TEXTS = {
     "ru": {
@@ -45,6 +61,7 @@ TEXTS = {
         "found": "Найдено: {} вакансий",
         "no_results": "Вакансии не найдены",
         "error_region": "Регион для города «{}» не найден",
+        "error_too_large": "Результат слишком большой ({} МБ), уточните запрос или выберите быстрый поиск",
         "vacancy": "Вакансия",
         "company": "Компания",
         "city": "Город",
@@ -74,6 +91,7 @@ TEXTS = {
         "found": "Found: {} vacancies",
         "no_results": "No vacancies found",
         "error_region": "Region for city «{}» not found",
+        "error_too_large": "Result is too large ({} MB), narrow the query or use fast search",
         "vacancy": "Vacancy",
         "company": "Company",
         "city": "City",
@@ -95,26 +113,6 @@ TEXTS = {
 }
 
 
-# Направления и технологии для аналитики (ключевые слова, по которым считаем вхождения)
-DIRECTION_KEYWORDS = {
-    "Backend": ["backend", "бэкенд", "бэкенд", "back-end", "серверн"],
-    "Frontend": ["frontend", "фронтенд", "front-end", "front end", "верстк", "верстальщик"],
-    "Fullstack": ["fullstack", "full-stack", "фуллстек", "full stack"],
-    "Data / ML": ["data science", "machine learning", "ml", "аналитик данных", "data analyst", "нейросет", "ai ", "искусственный интеллект"],
-    "DevOps / SRE": ["devops", "sre", "инфраструктур", "ci/cd", "deployment"],
-    "Mobile": ["mobile", "мобильн", "android", "ios", "react native", "flutter", "кроссплатформен"],
-    "QA / Тестирование": ["qa", "тестиров", "quality assurance", "automation test", "sdet"],
-    "Управление": ["менеджер", "manager", "team lead", "тимлид", "руководитель", "project manager", "pm "],
-}
-
-TECH_KEYWORDS = [
-    "Python", "Java", "JavaScript", "TypeScript", "React", "Vue", "Angular",
-    "SQL", "PostgreSQL", "MongoDB", "Redis", "Docker", "Kubernetes", "K8s",
-    "Git", "Linux", "AWS", "Kotlin", "Swift", "Go", "Golang", "PHP", "C#",
-    "1C", "Node.js", "Django", "Flask", "FastAPI", "Spring", "GraphQL", "REST",
-]
-
-
 def get_vacancies_fast(text, city_name, per_page=20, max_pages=10, progress_callback=None):
     """Быстрый поиск с опциональным отчётом прогресса."""
     area_id = get_area_id_by_city(city_name)
@@ -135,72 +133,6 @@ def get_vacancies_fast(text, city_name, per_page=20, max_pages=10, progress_call
     return all_vacancies
 
 
-def _count_keywords(text, keywords):
-    if not text:
-        return 0
-    t = text.lower()
-    return sum(1 for kw in keywords if kw.lower() in t)
-
-
-def compute_analytics(vacancies):
-    """Классификация по направлениям, технологиям, топ компаний, зарплаты."""
-    by_direction = {name: 0 for name in DIRECTION_KEYWORDS}
-    by_technology = {tech: 0 for tech in TECH_KEYWORDS}
-    company_count = {}
-    salary_values = []
-
-    for v in vacancies:
-        name = (v.get("name") or "")
-        desc = (v.get("description") or "")
-        combined = name + " " + desc
-
-        for direction, keywords in DIRECTION_KEYWORDS.items():
-            if _count_keywords(combined, keywords) > 0:
-                by_direction[direction] += 1
-
-        for tech in TECH_KEYWORDS:
-            if tech.lower() in combined.lower():
-                by_technology[tech] += 1
-
-        company = (v.get("company") or "").strip()
-        if company:
-            company_count[company] = company_count.get(company, 0) + 1
-
-        sal = v.get("salary_from")
-        if sal is not None and isinstance(sal, (int, float)):
-            salary_values.append(sal)
-
-    by_direction = {k: v for k, v in by_direction.items() if v > 0}
-    by_technology = {k: v for k, v in by_technology.items() if v > 0}
-    top_companies = sorted(company_count.items(), key=lambda x: -x[1])[:15]
-
-    salary_bins = {}
-    if salary_values:
-        for s in salary_values:
-            if s < 50000:
-                key = "до 50k"
-            elif s < 100000:
-                key = "50–100k"
-            elif s < 150000:
-                key = "100–150k"
-            elif s < 200000:
-                key = "150–200k"
-            elif s < 300000:
-                key = "200–300k"
-            else:
-                key = "300k+"
-            salary_bins[key] = salary_bins.get(key, 0) + 1
-    salary_order = ["до 50k", "50–100k", "100–150k", "150–200k", "200–300k", "300k+"]
-    salary_dist = {k: salary_bins.get(k, 0) for k in salary_order if salary_bins.get(k, 0) > 0}
-
-    return {
-        "by_direction": by_direction,
-        "by_technology": by_technology,
-        "top_companies": top_companies,
-        "salary_dist": salary_dist,
-    }
-
-
 def format_salary(v):
     if not v:
         return "—"
@@ -236,18 +168,13 @@ def _run_search(search_id, city, query, fast, lang):
         for v in vacancies:
             v["salary_str"] = format_salary(v)
 
-        cache_key = None
-        if vacancies:
-            cache_key = str(uuid.uuid4())
-            while len(app.vacancy_cache) >= MAX_CACHE_ENTRIES:
-                app.vacancy_cache.pop(next(iter(app.vacancy_cache)))
-            app.vacancy_cache[cache_key] = [dict(v) for v in vacancies]
+        vacancies_json = json.dumps(vacancies, ensure_ascii=False)
+        cache_key = cache_vacancies(app.vacancy_cache, vacancies, vacancies_json)
 
         analytics = compute_analytics(vacancies)
-        app.search_progress[search_id] = {"status": "done", "progress": 100, "message": ""}
-        app.search_results[search_id] = {
+        result = {
             "vacancies": vacancies,
-            "vacancies_json": json.dumps(vacancies, ensure_ascii=False),
+            "vacancies_json": vacancies_json,
             "cache_key": cache_key,
             "city": city,
             "query": query,
@@ -256,11 +183,22 @@ def _run_search(search_id, city, query, fast, lang):
             "analytics": analytics,
             "texts": {k: t.get(k, "") for k in ["vacancy", "company", "city", "salary", "link", "details", "tab_results", "tab_analytics", "by_direction", "by_technology", "top_companies", "salary_dist"]},
         }
+        # Сериализуем один раз: повторные запросы отдают готовые байты или 304
+        body = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        publish_search_result(app.search_results, app.search_progress, search_id, body, t["error_too_large"])
     except Exception as e:
         app.search_progress[search_id] = {"status": "error", "progress": 0, "message": str(e)}
         print(f"\n[{search_id[:8]}] Ошибка: {e}")
 
 
+def _not_modified(etag):
+    response = app.response_class(status=304)
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
 def _get_search_params():
     """Читает city, query, lang, fast из JSON или form."""
     data = None
@@ -304,13 +242,9 @@ def index():
             return render_template("index.html", lang=lang, texts=TEXTS[lang], error=str(e), city=city, query=query)
         for v in vacancies:
             v["salary_str"] = format_salary(v)
-        cache_key = str(uuid.uuid4()) if vacancies else None
-        if vacancies:
-            while len(app.vacancy_cache) >= MAX_CACHE_ENTRIES:
-                app.vacancy_cache.pop(next(iter(app.vacancy_cache)))
-            app.vacancy_cache[cache_key] = [dict(v) for v in vacancies]
-        analytics = compute_analytics(vacancies)
         vacancies_json = json.dumps(vacancies, ensure_ascii=False) if vacancies else "[]"
+        cache_key = cache_vacancies(app.vacancy_cache, vacancies, vacancies_json)
+        analytics = compute_analytics(vacancies)
         return render_template(
             "index.html",
             lang=lang,
@@ -350,31 +284,47 @@ def search_status(search_id):
 
 @app.route("/search_result/<search_id>")
 def search_result(search_id):
-    data = app.search_results.pop(search_id, None)
+    data = app.search_results.get(search_id)
     if not data:
         return jsonify({"error": "not_found"}), 404
-    return jsonify(data)
+    if etag_matches(request.if_none_match, data["etag"]):
+        return _not_modified(data["etag"])
+    response = app.response_class(data["body"], mimetype="application/json")
+    response.set_etag(data["etag"])
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
 
 @app.route("/export")
 def export():
     key = request.args.get("key", "").strip()
-    vacancies = app.vacancy_cache.pop(key, None) if key else None
-    if not vacancies:
+    entry = app.vacancy_cache.get(key) if key else None
+    if not entry:
         return redirect(url_for("index"))
+    fmt = "csv" if request.args.get("format") == "csv" else "xlsx"
+    etag = f"{entry['digest']}-{fmt}"
+    if etag_matches(request.if_none_match, etag):
+        return _not_modified(etag)
 
-    df = pd.DataFrame(vacancies)
-    buf = io.BytesIO()
-    df.to_excel(buf, index=False)
-    buf.seek(0)
+    vacancies = entry["vacancies"]
     city = (vacancies[0].get("city") or "vacancies").strip()
-    filename = f"vacancies_{city}.xlsx"
-    return send_file(
-        buf,
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        as_attachment=True,
-        download_name=filename,
-    )
+    if fmt == "csv":
+        body, mimetype = iter_csv_bytes(vacancies), CSV_MIMETYPE
+    else:
+        body, mimetype = iter_xlsx_bytes(vacancies), XLSX_MIMETYPE
+    # Файл собирается пачками и уходит кусками, не целиком из памяти (xlsx — после сохранения книги во временный файл)
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers.set("Content-Disposition", "attachment", **attachment_headers(f"vacancies_{city}.{fmt}"))
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+@app.after_request
+def _compress(response):
+    return compress_response(response, request.headers.get("Accept-Encoding", ""))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+ASGI-режим веб-интерфейса: порт маршрутов app.py на Quart.
+
+Поиски идут через асинхронный клиент HH (hh_async.py) на одной aiohttp-сессии,
+поэтому один процесс обслуживает сотни одновременных поисков и опросов статуса
+без отдельного потока на каждого пользователя.
+
+Запуск:
+    hypercorn asgi_app:app --bind 0.0.0.0:5000
+    # или: python asgi_app.py
+"""
+
+import asyncio
+import json
+import os
+import uuid
+
+import aiohttp
+from quart import Quart, Response, jsonify, redirect, render_template, request, url_for
+from quart.wrappers.response import DataBody
+
+# app.py настраивает рабочую папку и sys.path; берём из него тексты и аналитику
+from app import (
+    MAX_CACHE_ENTRIES,
+    MAX_EXPORT_CACHE_BYTES,
+    MAX_RESULT_CACHE_BYTES,
+    TEXTS,
+    format_salary,
+)
+from hh_async import AsyncHHClient
+from http_cache import (
+    ByteBudgetCache,
+    apply_compression,
+    attachment_headers,
+    cache_vacancies,
+    compression_encoding,
+    etag_matches,
+    publish_search_result,
+)
+from main_page.analytics_engine import compute_analytics
+from main_page.export_stream import CSV_MIMETYPE, XLSX_MIMETYPE, iter_csv_bytes, iter_xlsx_bytes
+
+app = Quart(__name__)
+app.secret_key = os.environ.get("FLASK_SECRET", "hh-parser-dev-key")
+app.vacancy_cache = ByteBudgetCache(MAX_EXPORT_CACHE_BYTES, max_entries=MAX_CACHE_ENTRIES)
+app.search_progress = {}
+app.search_results = ByteBudgetCache(MAX_RESULT_CACHE_BYTES)
+# Лимит соединений общей сессии к HH (на все поиски процесса)
+HH_CONNECTION_LIMIT = int(os.environ.get("HH_CONNECTION_LIMIT", "100"))
+
+RESULT_TEXT_KEYS = ["vacancy", "company", "city", "salary", "link", "details", "tab_results", "tab_analytics", "by_direction", "by_technology", "top_companies", "salary_dist"]
+
+
+@app.before_serving
+async def _open_hh_session():
+    app.hh_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=HH_CONNECTION_LIMIT),
+        timeout=aiohttp.ClientTimeout(total=30),
+    )
+    app.hh_client = AsyncHHClient(app.hh_session)
+
+
+@app.after_serving
+async def _close_hh_session():
+    await app.hh_session.close()
+
+
+def _not_modified(etag):
+    response = Response("", status=304)
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+async def _search(city, query, fast, progress_callback=None):
+    client = app.hh_client
+    if fast:
+        return await client.get_vacancies_fast(text=query, city_name=city, per_page=20, max_pages=10, progress_callback=progress_callback)
+    return await client.get_all_vacancies(text=query, city_name=city, per_page=20, max_pages=10)
+
+
+async def _run_search(search_id, city, query, fast, lang):
+    t = TEXTS.get(lang, TEXTS["ru"])
+    try:
+        def progress(current, total, kind):
+            pct = int(100 * current / total) if total else 0
+            app.search_progress[search_id] = {"status": "running", "progress": min(pct, 99), "message": t["progress_page"].format(current, total)}
+
+        if not fast:
+            app.search_progress[search_id] = {"status": "running", "progress": 0, "message": t["progress_full"]}
+        vacancies = await _search(city, query, fast, progress if fast else None)
+
+        for v in vacancies:
+            v["salary_str"] = format_salary(v)
+        vacancies_json = json.dumps(vacancies, ensure_ascii=False)
+        cache_key = cache_vacancies(app.vacancy_cache, vacancies, vacancies_json)
+        # Аналитика — чистый CPU, не держим на ней event loop
+        analytics = await asyncio.to_thread(compute_analytics, vacancies)
+        result = {
+            "vacancies": vacancies,
+            "vacancies_json": vacancies_json,
+            "cache_key": cache_key,
+            "city": city,
+            "query": query,
+            "count": len(vacancies),
+            "found_msg": t["found"].format(len(vacancies)),
+            "analytics": analytics,
+            "texts": {k: t.get(k, "") for k in RESULT_TEXT_KEYS},
+        }
+        body = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        publish_search_result(app.search_results, app.search_progress, search_id, body, t["error_too_large"])
+    except Exception as e:
+        app.search_progress[search_id] = {"status": "error", "progress": 0, "message": str(e)}
+
+
+async def _get_search_params():
+    data = await request.get_json(silent=True)
+    if not data:
+        data = await request.form
+    city = (data.get("city") or "").strip()
+    query = (data.get("query") or "").strip()
+    lang = (data.get("lang") or "ru").strip() or "ru"
+    fast = data.get("fast") in (True, "1", "true", "on")
+    return city, query, lang, fast
+
+
+@app.route("/", methods=["GET", "POST"])
+async def index():
+    form = await request.form
+    lang = request.args.get("lang", "ru") or form.get("lang", "ru") or "ru"
+    if lang not in TEXTS:
+        lang = "ru"
+    t = TEXTS[lang]
+
+    # Синхронный поиск (форма без JS или запасной вариант)
+    if request.method == "POST" and form.get("city"):
+        city = (form.get("city") or "").strip()
+        query = (form.get("query") or "").strip()
+        fast = form.get("fast") == "1"
+        if not city or not query:
+            return await render_template("index.html", lang=lang, texts=t, error=t["fill_fields"], city=city, query=query)
+        try:
+            vacancies = await _search(city, query, fast)
+        except Exception as e:
+            return await render_template("index.html", lang=lang, texts=t, error=str(e), city=city, query=query)
+        for v in vacancies:
+            v["salary_str"] = format_salary(v)
+        vacancies_json = json.dumps(vacancies, ensure_ascii=False) if vacancies else "[]"
+        cache_key = cache_vacancies(app.vacancy_cache, vacancies, vacancies_json)
+        analytics = await asyncio.to_thread(compute_analytics, vacancies)
+        return await render_template(
+            "index.html",
+            lang=lang,
+            texts=t,
+            vacancies=vacancies,
+            vacancies_json=vacancies_json,
+            city=city,
+            query=query,
+            count=len(vacancies),
+            found_msg=t["found"].format(len(vacancies)),
+            cache_key=cache_key,
+            analytics=analytics,
+        )
+
+    return await render_template("index.html", lang=lang, texts=t)
+
+
+@app.route("/search", methods=["POST"])
+async def search_start():
+    city, query, lang, fast = await _get_search_params()
+    t = TEXTS.get(lang, TEXTS["ru"])
+    if not city or not query:
+        return jsonify({"error": t["fill_fields"]}), 400
+
+    search_id = str(uuid.uuid4())
+    app.search_progress[search_id] = {"status": "running", "progress": 0, "message": t["loading"]}
+    app.add_background_task(_run_search, search_id, city, query, fast, lang)
+    return jsonify({"search_id": search_id})
+
+
+@app.route("/search_status/<search_id>")
+async def search_status(search_id):
+    data = app.search_progress.get(search_id, {"status": "unknown", "progress": 0, "message": ""})
+    return jsonify(data)
+
+
+@app.route("/search_result/<search_id>")
+async def search_result(search_id):
+    data = app.search_results.get(search_id)
+    if not data:
+        return jsonify({"error": "not_found"}), 404
+    if etag_matches(request.if_none_match, data["etag"]):
+        return _not_modified(data["etag"])
+    response = Response(data["body"], mimetype="application/json")
+    response.set_etag(data["etag"])
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+async def _iterate_in_thread(chunks):
+    """Синхронный генератор экспорта (openpyxl/csv) крутим в пуле, чтобы не блокировать loop."""
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+@app.route("/export")
+async def export():
+    key = request.args.get("key", "").strip()
+    entry = app.vacancy_cache.get(key) if key else None
+    if not entry:
+        return redirect(url_for("index"))
+    fmt = "csv" if request.args.get("format") == "csv" else "xlsx"
+    etag = f"{entry['digest']}-{fmt}"
+    if etag_matches(request.if_none_match, etag):
+        return _not_modified(etag)
+
+    vacancies = entry["vacancies"]
+    city = (vacancies[0].get("city") or "vacancies").strip()
+    if fmt == "csv":
+        body, mimetype = iter_csv_bytes(vacancies), CSV_MIMETYPE
+    else:
+        body, mimetype = iter_xlsx_bytes(vacancies), XLSX_MIMETYPE
+    response = Response(_iterate_in_thread(body), mimetype=mimetype)
+    response.headers.set("Content-Disposition", "attachment", **attachment_headers(f"vacancies_{city}.{fmt}"))
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+@app.after_request
+async def _compress(response):
+    if not isinstance(response.response, DataBody):
+        return response  # потоковые ответы (экспорт) не трогаем
+    encoding = compression_encoding(response, request.headers.get("Accept-Encoding", ""))
+    if encoding is None:
+        return response
+    return apply_compression(response, await response.get_data(), encoding)
+
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=5000)
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк веб-интерфейса: потоковый Flask (app.py) против ASGI-режима (asgi_app.py)
+на локальном моке HH API, без обращений к настоящему hh.ru.
+
+    python bench_serving.py --searches 200 --latency 0.05
+    python bench_serving.py --modes asgi --searches 500 --full
+
+Мок отдаёт /areas, /vacancies (постранично) и HTML-страницы вакансий
+с заданной задержкой. Каждый «пользователь» делает POST /search, опрашивает
+/search_status и забирает /search_result — так же, как фронтенд в index.html.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import aiohttp
+from aiohttp import web
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CITY = "Москва"
+
+
+# ---------------------------------------------------------------------------
+# Мок HH API
+# ---------------------------------------------------------------------------
+
+def make_mock_hh(latency, pages, per_page_items):
+    async def areas(request):
+        await asyncio.sleep(latency)
+        return web.json_response([
+            {"id": "113", "name": "Россия", "areas": [
+                {"id": "1", "name": CITY, "areas": []},
+                {"id": "2", "name": "Санкт-Петербург", "areas": []},
+            ]},
+        ])
+
+    async def vacancies(request):
+        await asyncio.sleep(latency)
+        page = int(request.query.get("page", 0))
+        per_page = min(int(request.query.get("per_page", 20)), per_page_items)
+        base = f"http://{request.host}"
+        items = []
+        if page < pages:
+            for i in range(per_page):
+                vid = f"{page}{i:03d}"
+                items.append({
+                    "id": vid,
+                    "name": f"Python разработчик {vid}",
+                    "area": {"name": CITY},
+                    "address": {"city": CITY},
+                    "employer": {"name": f"Компания {i % 7}"},
+                    "salary": {"from": 100000 + 1000 * i, "to": None, "currency": "RUR"},
+                    "alternate_url": f"{base}/vacancy/{vid}",
+                    "snippet": {"requirement": "Python, Django, PostgreSQL", "responsibility": "Разработка backend"},
+                })
+        return web.json_response({"items": items, "pages": pages, "page": page})
+
+    async def vacancy_page(request):
+        await asyncio.sleep(latency)
+        vid = request.match_info["vid"]
+        body = "<p>Опыт Python, Docker, Kubernetes, SQL. Backend разработка.</p>" * 20
+        return web.Response(
+            text=f'<html><body><div data-qa="vacancy-description">{vid} {body}</div></body></html>',
+            content_type="text/html",
+        )
+
+    mock = web.Application()
+    mock.router.add_get("/areas", areas)
+    mock.router.add_get("/vacancies", vacancies)
+    mock.router.add_get("/vacancy/{vid}", vacancy_page)
+    return mock
+
+
+def start_mock_hh(port, latency, pages, per_page_items):
+    """Запускает мок в отдельном потоке со своим event loop."""
+    ready = threading.Event()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        runner = web.AppRunner(make_mock_hh(latency, pages, per_page_items), access_log=None)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port, backlog=2048).start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+
+
+# ---------------------------------------------------------------------------
+# Серверы под нагрузкой (отдельные процессы)
+# ---------------------------------------------------------------------------
+
+def serve(mode, port):
+    if mode == "threaded":
+        from app import app
+        # Тот же dev-сервер, что и app.run(...), но без debug/reloader
+        app.run(host="127.0.0.1", port=port, threaded=True, debug=False, use_reloader=False)
+    else:
+        from hypercorn.asyncio import serve as hypercorn_serve
+        from hypercorn.config import Config
+        from asgi_app import app
+        config = Config()
+        config.bind = [f"127.0.0.1:{port}"]
+        config.accesslog = None
+        config.backlog = 2048
+        asyncio.run(hypercorn_serve(app, config))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def thread_count(pid):
+    """Число потоков процесса (Linux, /proc); None, если недоступно."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+async def wait_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Сервер на порту {port} не поднялся")
+
+
+# ---------------------------------------------------------------------------
+# Нагрузка
+# ---------------------------------------------------------------------------
+
+async def one_search(session, base, fast, poll_interval):
+    t0 = time.perf_counter()
+    async with session.post(f"{base}/search", json={"city": CITY, "query": "python", "fast": fast}) as r:
+        search_id = (await r.json())["search_id"]
+    polls = 0
+    while True:
+        async with session.get(f"{base}/search_status/{search_id}") as r:
+            status = (await r.json())["status"]
+        polls += 1
+        if status in ("done", "error"):
+            break
+        await asyncio.sleep(poll_interval)
+    async with session.get(f"{base}/search_result/{search_id}") as r:
+        data = await r.json()
+    return time.perf_counter() - t0, status == "done" and data.get("count", 0) > 0, polls
+
+
+async def run_load(port, pid, searches, fast, poll_interval):
+    base = f"http://127.0.0.1:{port}"
+    max_threads = 0
+    stop = asyncio.Event()
+
+    async def sample_threads():
+        nonlocal max_threads
+        while not stop.is_set():
+            max_threads = max(max_threads, thread_count(pid) or 0)
+            await asyncio.sleep(0.1)
+
+    sampler = asyncio.create_task(sample_threads())
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=600)) as session:
+        t0 = time.perf_counter()
+        results = await asyncio.gather(
+            *(one_search(session, base, fast, poll_interval) for _ in range(searches)),
+            return_exceptions=True,
+        )
+        wall = time.perf_counter() - t0
+    stop.set()
+    await sampler
+
+    latencies = sorted(r[0] for r in results if not isinstance(r, Exception))
+    ok = sum(1 for r in results if not isinstance(r, Exception) and r[1])
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else None
+
+    return {
+        "searches": searches,
+        "ok": ok,
+        "errors": searches - ok,
+        "wall_s": round(wall, 3),
+        "searches_per_s": round(searches / wall, 2) if wall else None,
+        "p50_s": round(pct(0.50), 3) if latencies else None,
+        "p95_s": round(pct(0.95), 3) if latencies else None,
+        "mean_s": round(statistics.mean(latencies), 3) if latencies else None,
+        "max_server_threads": max_threads or None,
+    }
+
+
+def bench_mode(mode, args, hh_url):
+    port = free_port()
+    env = dict(os.environ, HH_API_URL=hh_url)
+    proc = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", mode, "--port", str(port)],
+        cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        asyncio.run(wait_port(port))
+        return asyncio.run(run_load(port, proc.pid, args.searches, not args.full, args.poll))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="threaded,asgi", help="threaded,asgi")
+    parser.add_argument("--searches", type=int, default=100, help="одновременных поисков")
+    parser.add_argument("--latency", type=float, default=0.05, help="задержка мока HH на запрос, сек")
+    parser.add_argument("--pages", type=int, default=3, help="страниц выдачи у мока")
+    parser.add_argument("--full", action="store_true", help="полный поиск (с описаниями), а не быстрый")
+    parser.add_argument("--poll", type=float, default=0.4, help="интервал опроса статуса, как во фронтенде")
+    parser.add_argument("--json", action="store_true", help="вывести результат в JSON")
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    mock_port = free_port()
+    start_mock_hh(mock_port, args.latency, args.pages, per_page_items=20)
+    hh_url = f"http://127.0.0.1:{mock_port}"
+
+    report = {}
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        report[mode] = bench_mode(mode, args, hh_url)
+        if not args.json:
+            print(f"{mode:>9}: " + ", ".join(f"{k}={v}" for k, v in report[mode].items()))
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Асинхронный клиент HH API на aiohttp — аналог функций save_csv_2.py
+для ASGI-режима (asgi_app.py). Одна сессия на процесс, без потока на запрос.
+"""
+
+import asyncio
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from save_csv_2 import AREAS_URL, BASE_URL, parse_vacancies
+
+HEADERS = {"User-Agent": "HH-Parser/1.0"}
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
+# Сколько полных описаний одной выборки качаем одновременно
+DESCRIPTION_CONCURRENCY = 10
+# И не чаще одного нового запроса описания в столько секунд на процесс (как time.sleep(0.2) в save_csv_2)
+DESCRIPTION_INTERVAL = 0.2
+# На 429 ждём Retry-After (не дольше MAX_RETRY_AFTER) и повторяем до MAX_RETRIES раз
+MAX_RETRIES = 3
+MAX_RETRY_AFTER = 30
+
+
+def _retry_after(resp):
+    try:
+        return min(float(resp.headers.get("Retry-After", 1)), MAX_RETRY_AFTER)
+    except ValueError:
+        return 1.0
+
+
+class AsyncHHClient:
+    def __init__(self, session, base_url=BASE_URL, areas_url=AREAS_URL):
+        self.session = session
+        self.base_url = base_url
+        self.areas_url = areas_url
+        self._areas = None
+        self._areas_lock = asyncio.Lock()
+        self._rate_lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    async def _throttle(self, delay=0.0):
+        """Ждёт своей очереди на запрос; delay > 0 (после 429) отодвигает все следующие запросы."""
+        loop = asyncio.get_running_loop()
+        async with self._rate_lock:
+            now = loop.time()
+            slot = max(now + delay, self._next_slot)
+            self._next_slot = slot + DESCRIPTION_INTERVAL
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _get(self, url, params=None, as_json=False, throttle=False, timeout=None):
+        """GET с повтором на 429: HH просит подождать — ждём Retry-After и пробуем снова."""
+        delay = 0.0
+        for attempt in range(MAX_RETRIES + 1):
+            if throttle or delay:
+                await self._throttle(delay)
+            async with self.session.get(url, params=params, headers=HEADERS, timeout=timeout) as resp:
+                if resp.status == 429 and attempt < MAX_RETRIES:
+                    delay = _retry_after(resp)
+                    continue
+                resp.raise_for_status()
+                return await (resp.json() if as_json else resp.text())
+
+    async def _get_areas(self):
+        # Дерево регионов большое и почти не меняется — грузим один раз на процесс
+        async with self._areas_lock:
+            if self._areas is None:
+                async with self.session.get(self.areas_url, headers=HEADERS) as resp:
+                    resp.raise_for_status()
+                    self._areas = await resp.json()
+        return self._areas
+
+    async def get_area_id_by_city(self, city_name):
+        areas = await self._get_areas()
+        stack = list(areas)
+        while stack:
+            area = stack.pop(0)
+            if area["name"].lower() == city_name.lower():
+                return area["id"]
+            stack[:0] = area.get("areas") or []
+        return None
+
+    async def get_vacancies_by_region(self, text, area_id, per_page=20, page=0):
+        params = {"text": text, "area": area_id, "per_page": per_page, "page": page}
+        return await self._get(self.base_url, params=params, as_json=True)
+
+    async def fetch_full_description(self, url):
+        if not url:
+            return ""
+        try:
+            html = await self._get(url, throttle=True, timeout=REQUEST_TIMEOUT)
+        except Exception:
+            return ""
+        soup = BeautifulSoup(html, "html.parser")
+        block = soup.find("div", {"data-qa": "vacancy-description"}) or soup.find("div", class_="g-user-content")
+        return block.get_text(separator="\n").strip() if block else ""
+
+    async def get_vacancies_fast(self, text, city_name, per_page=20, max_pages=10, progress_callback=None):
+        """Быстрый поиск (только выдача), как get_vacancies_fast в app.py."""
+        area_id = await self.get_area_id_by_city(city_name)
+        if not area_id:
+            return []
+        all_vacancies = []
+        for page in range(max_pages):
+            if progress_callback:
+                progress_callback(page + 1, max_pages, "page")
+            data = await self.get_vacancies_by_region(text=text, area_id=area_id, per_page=per_page, page=page)
+            vacancies = [v for v in parse_vacancies(data) if v["city"].lower() == city_name.lower()]
+            if not vacancies:
+                break
+            all_vacancies.extend(vacancies)
+        return all_vacancies
+
+    async def get_all_vacancies(self, text, city_name, per_page=20, max_pages=10, progress_callback=None):
+        """Выдача + полные описания со страниц вакансий (параллельно, с ограничением числа и частоты запросов)."""
+        vacancies = await self.get_vacancies_fast(text, city_name, per_page, max_pages, progress_callback)
+        semaphore = asyncio.Semaphore(DESCRIPTION_CONCURRENCY)
+
+        async def enrich(v):
+            async with semaphore:
+                full_desc = await self.fetch_full_description(v.get("url"))
+            if full_desc:
+                v["description"] = full_desc
+
+        await asyncio.gather(*(enrich(v) for v in vacancies))
+        return vacancies
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Сжатие ответов, HTTP-валидаторы (ETag / If-None-Match) и кэш с лимитом по байтам
+для веб-интерфейса на Flask (app.py) и его ASGI-версии (asgi_app.py).
+"""
+
+import gzip
+import hashlib
+import threading
+import unicodedata
+import uuid
+from collections import OrderedDict
+from urllib.parse import quote
+
+try:
+    import brotli  # необязательная зависимость: без неё отдаём только gzip
+except ImportError:
+    brotli = None
+
+# Ответы меньше этого размера не сжимаем — заголовки съедят выигрыш
+COMPRESS_MIN_SIZE = 1024
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "text/html",
+    "text/css",
+    "text/plain",
+    "application/javascript",
+}
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def strong_etag(*parts):
+    """Сильный ETag по содержимому: sha256 от байтов всех частей."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def negotiate_encoding(accept_encoding):
+    """Выбирает кодировку по заголовку Accept-Encoding: br (если есть brotli) > gzip > None."""
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+
+    def allowed(enc):
+        return accepted.get(enc, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and allowed("br"):
+        return "br"
+    if allowed("gzip"):
+        return "gzip"
+    return None
+
+
+def compress_bytes(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Проверяет If-None-Match против ETag ресурса. Сжатые представления получают
+    суффикс кодировки ("<etag>-gzip"), поэтому принимаем и их.
+    """
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.star_tag:
+        return True
+    return any(
+        if_none_match.contains(candidate)
+        for candidate in (etag, f"{etag}-gzip", f"{etag}-br")
+    )
+
+
+def attachment_headers(filename):
+    """Параметры Content-Disposition для вложения с кириллическим именем (RFC 6266)."""
+    try:
+        filename.encode("ascii")
+        return {"filename": filename}
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+        return {"filename": simple, "filename*": "UTF-8''" + quote(filename, safe="!#$&+^`|~")}
+
+
+def compression_encoding(response, accept_encoding):
+    """
+    Кодировка, которой стоит сжать ответ, или None. Тело не читает, поэтому
+    подходит и для Flask, и для Quart (где get_data асинхронный).
+    """
+    if response.status_code != 200 or "Content-Encoding" in response.headers:
+        return None
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return None
+    response.vary.add("Accept-Encoding")
+    return negotiate_encoding(accept_encoding)
+
+
+def apply_compression(response, body, encoding):
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+    response.set_data(compress_bytes(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    # У разных представлений должны быть разные сильные ETag
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+    return response
+
+
+def compress_response(response, accept_encoding):
+    """Сжимает готовый Flask-ответ (JSON/HTML), если клиент это поддерживает."""
+    if response.direct_passthrough or response.is_streamed:
+        return response
+    encoding = compression_encoding(response, accept_encoding)
+    if encoding is None:
+        return response
+    return apply_compression(response, response.get_data(), encoding)
+
+
+class ByteBudgetCache:
+    """
+    LRU-кэш с ограничением по суммарному размеру значений (в байтах)
+    и, опционально, по количеству записей. Чтение не удаляет запись.
+    """
+
+    def __init__(self, max_bytes, max_entries=None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._items = OrderedDict()  # key -> (value, size)
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return default
+            self._items.move_to_end(key)
+            return item[0]
+
+    def put(self, key, value, size):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._total -= old[1]
+            if size > self.max_bytes:
+                # Запись больше всего бюджета — не кэшируем вовсе
+                return False
+            self._items[key] = (value, size)
+            self._total += size
+            self._evict()
+            return True
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is None:
+                return default
+            self._total -= item[1]
+            return item[0]
+
+    def _evict(self):
+        while self._items and (
+            self._total > self.max_bytes
+            or (self.max_entries is not None and len(self._items) > self.max_entries)
+        ):
+            _, (_, size) = self._items.popitem(last=False)
+            self._total -= size
+
+    @property
+    def total_bytes(self):
+        return self._total
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+def cache_vacancies(cache, vacancies, vacancies_json):
+    """Кладёт выборку в кэш экспорта (без удаления при скачивании). Возвращает ключ для /export."""
+    if not vacancies:
+        return None
+    payload = vacancies_json.encode("utf-8")
+    cache_key = str(uuid.uuid4())
+    entry = {
+        "vacancies": [dict(v) for v in vacancies],
+        "digest": strong_etag(payload),
+    }
+    if not cache.put(cache_key, entry, len(payload)):
+        # Не влезла в бюджет — кнопки экспорта не будет, а не ссылка в никуда
+        return None
+    return cache_key
+
+
+def publish_search_result(cache, progress, search_id, body, too_large_message):
+    """
+    Готовый ответ /search_result — в кэш, статус поиска — в progress.
+    Ответ больше бюджета кэша: статус "error" (too_large_message с размером в МБ),
+    а не "done", который привёл бы клиента к 404 на /search_result.
+    """
+    if not cache.put(search_id, {"body": body, "etag": strong_etag(body)}, len(body)):
+        message = too_large_message.format(round(len(body) / 1024 / 1024, 1))
+        progress[search_id] = {"status": "error", "progress": 0, "message": message}
+        return False
+    progress[search_id] = {"status": "done", "progress": 100, "message": ""}
+    return True
@@ -1,11 +1,21 @@
+import os
+import sys
 import requests
 import csv
 import pandas as pd
 import time
 from bs4 import BeautifulSoup
 
-BASE_URL = "https://api.hh.ru/vacancies"
-AREAS_URL = "https://api.hh.ru/areas"
+# потоковый экспорт живёт в модулях Streamlit-приложения (Chart/main_page)
+_chart_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Chart")
+if _chart_dir not in sys.path:
+    sys.path.append(_chart_dir)
+from main_page.export_stream import write_xlsx
+
+# HH_API_URL позволяет направить парсер на локальный мок HH (бенчмарки)
+HH_API_URL = os.environ.get("HH_API_URL", "https://api.hh.ru").rstrip("/")
+BASE_URL = f"{HH_API_URL}/vacancies"
+AREAS_URL = f"{HH_API_URL}/areas"
 
 def get_area_id_by_city(city_name):
     response = requests.get(AREAS_URL)
@@ -129,9 +139,8 @@ def save_vacancies_to_xlsx(vacancies, filename):
         print("Нет вакансий для сохранения.")
         return
 
-    df = pd.DataFrame(vacancies)
-    # Сохраняем в Excel; index=False чтобы не добавлять колонку индекса
-    df.to_excel(filename, index=False)
+    # Пишем построчно (write-only лист), без промежуточного DataFrame
+    write_xlsx(vacancies, filename)
 
     print(f"Вакансии сохранены в файл: {filename}")
 
@@ -0,0 +1,149 @@
+"""
+Дистилляция zero-shot BART в лёгкий классификатор ролей.
+
+1. label — BART-MNLI размечает корпус один раз (офлайн, лучше на GPU),
+   разметка сохраняется в CSV рядом с корпусом и при повторном запуске дописывается:
+       python distill.py label "vacancies.xlsx"
+2. train — ученик (хэш-признаки + логистическая регрессия, main_page/role_model.py)
+   обучается на разметке, точность считается против учителя на отложенной части:
+       python distill.py train "vacancies.xlsx"
+
+Корпус — xlsx/csv/json с колонками name и description (lemmatized_content,
+если есть, берётся как есть, иначе описание лемматизируется). Режим лемм
+(--lemma-mode, по умолчанию HH_LEMMA_MODE, как в приложении) записывается в
+артефакт: модель с леммами другого режима приложение не загрузит.
+--teacher rules размечает словарным classify_vacancy — для проверки конвейера без GPU.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "filter city", "Chart")))
+
+from main_page.nlp import LEMMA_MODE, LEMMA_MODES, classify_vacancy, clean_and_lemmatize
+from main_page.role_model import (
+    LABEL_SET_VERSION, MODEL_PATH, ROLE_LABELS, DistilledRoleClassifier, featurize,
+)
+
+TEACHER_MODEL = "facebook/bart-large-mnli"
+# Ниже этой уверенности учителя — "Other"
+TEACHER_MIN_SCORE = 0.2
+BATCH_SIZE = 8
+# BART читает максимум 1024 токена — длинные описания обрезаем
+MAX_CHARS = 1500
+HOLDOUT_SHARE = 0.2
+SEED = 42
+
+
+def read_corpus(path) -> pd.DataFrame:
+    if path.endswith(".xlsx"):
+        df = pd.read_excel(path)
+    elif path.endswith(".json"):
+        df = pd.read_json(path)
+    else:
+        df = pd.read_csv(path)
+    df["name"] = df["name"].fillna("").astype(str)
+    df["description"] = df.get("description", pd.Series("", index=df.index)).fillna("").astype(str)
+    df["row"] = np.arange(len(df))
+    return df
+
+
+def labels_path(corpus_path, teacher):
+    return f"{os.path.splitext(corpus_path)[0]}_{teacher}_labels_{LABEL_SET_VERSION}.csv"
+
+
+def label(args):
+    df = read_corpus(args.corpus)
+    out = labels_path(args.corpus, args.teacher)
+    done = set(pd.read_csv(out)["row"]) if os.path.exists(out) else set()
+    todo = df[~df["row"].isin(done)]
+    print(f"Размечено ранее: {len(done)}, осталось: {len(todo)}, набор меток {LABEL_SET_VERSION}")
+
+    if args.teacher == "bart":
+        from transformers import pipeline
+        classifier = pipeline("zero-shot-classification", model=TEACHER_MODEL, device=args.device)
+        candidates = [label for label in ROLE_LABELS if label != "Other"]
+
+    new_file = not os.path.exists(out)
+    with open(out, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(["row", "label", "score"])
+        start = time.perf_counter()
+        for i in range(0, len(todo), BATCH_SIZE):
+            batch = todo.iloc[i:i + BATCH_SIZE]
+            if args.teacher == "bart":
+                texts = [f"{n}. {d[:MAX_CHARS]}" for n, d in zip(batch["name"], batch["description"])]
+                results = classifier(texts, candidate_labels=candidates)
+                if isinstance(results, dict):
+                    results = [results]
+                rows = [
+                    (r, res["labels"][0] if res["scores"][0] >= TEACHER_MIN_SCORE else "Other", round(res["scores"][0], 4))
+                    for r, res in zip(batch["row"], results)
+                ]
+            else:
+                rows = [(r, classify_vacancy(n, clean_and_lemmatize(d, args.lemma_mode)), 1.0)
+                        for r, n, d in zip(batch["row"], batch["name"], batch["description"])]
+            writer.writerows(rows)
+            f.flush()
+        print(f"Разметка {len(todo)} вакансий: {time.perf_counter() - start:.1f} с -> {out}")
+
+
+def train(args):
+    df = read_corpus(args.corpus)
+    teacher = pd.read_csv(labels_path(args.corpus, args.teacher))
+    df = df.merge(teacher, on="row")
+    if "lemmatized_content" in df.columns:
+        lemmas = df["lemmatized_content"].fillna("").astype(str).tolist()
+    else:
+        lemmas = [clean_and_lemmatize(text, args.lemma_mode) for text in df["description"]]
+
+    rng = np.random.RandomState(SEED)
+    holdout = rng.rand(len(df)) < HOLDOUT_SHARE
+    features = featurize(df["name"], lemmas)
+    labels = df["label"].to_numpy()
+
+    start = time.perf_counter()
+    model = DistilledRoleClassifier.fit(features[~holdout], labels[~holdout])
+    fit_time = time.perf_counter() - start
+
+    titles, holdout_lemmas = df["name"][holdout].tolist(), [l for l, h in zip(lemmas, holdout) if h]
+    start = time.perf_counter()
+    predicted = np.array(model.predict(titles, holdout_lemmas))
+    per_second = len(titles) / (time.perf_counter() - start)
+    accuracy = float((predicted == labels[holdout]).mean())
+
+    print(f"Обучение: {(~holdout).sum()} вакансий, {fit_time:.1f} с")
+    print(f"Точность против учителя ({args.teacher}) на отложенных {holdout.sum()}: {accuracy:.3f}")
+    print(f"Скорость (признаки + предсказание): {per_second:,.0f} вакансий/с")
+    for label_name in ROLE_LABELS:
+        mask = labels[holdout] == label_name
+        if mask.any():
+            print(f"  {label_name:<28} {mask.sum():>5}  {float((predicted[mask] == label_name).mean()):.3f}")
+
+    model.save(args.output, teacher=args.teacher if args.teacher != "bart" else TEACHER_MODEL,
+               holdout_accuracy=round(accuracy, 4), train_size=int((~holdout).sum()),
+               lemma_mode=args.lemma_mode, trained_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+    print(f"Модель сохранена: {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Дистилляция BART в лёгкий классификатор ролей")
+    parser.add_argument("command", choices=["label", "train"])
+    parser.add_argument("corpus", help="xlsx/csv/json с колонками name, description")
+    parser.add_argument("--teacher", choices=["bart", "rules"], default="bart")
+    parser.add_argument("--device", type=int, default=-1, help="GPU для BART (0), -1 — CPU")
+    parser.add_argument("--output", default=MODEL_PATH)
+    parser.add_argument("--lemma-mode", choices=LEMMA_MODES, default=LEMMA_MODE,
+                        help="режим лемматизации описаний (и лемм lemmatized_content корпуса) — как в приложении")
+    args = parser.parse_args()
+    label(args) if args.command == "label" else train(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Локальный процесс инференса zero-shot модели (facebook/bart-large-mnli).
+
+Модель живёт в одном процессе, а не в каждом воркере Streamlit, и не блокирует UI.
+Клиенты (лаборатория experiments_page, use model/test.py, главная страница) шлют
+запросы по HTTP на localhost; воркер собирает запросы всех клиентов в
+микро-батчи: ждёт до BATCH_WINDOW_MS после первого запроса или пока не
+наберётся MAX_BATCH текстов, и прогоняет батч одним вызовом модели.
+
+    python inference_worker.py [--port 8765] [--device 0]
+
+POST /classify  {"texts": [...], "labels": [...], "multi_label": false}
+                -> {"results": [{"labels": [...], "scores": [...]}, ...]}
+GET  /metrics   глубина очереди, размеры батчей, задержки
+GET  /health
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from aiohttp import web
+
+MODEL_NAME = "facebook/bart-large-mnli"
+HOST = "127.0.0.1"
+PORT = 8765
+MAX_BATCH = 16
+BATCH_WINDOW_MS = 20
+# Сколько последних задержек держим для перцентилей
+LATENCY_WINDOW = 1000
+
+
+class InferenceWorker:
+    def __init__(self, model_fn, max_batch=MAX_BATCH, window_ms=BATCH_WINDOW_MS):
+        """model_fn(texts, labels, multi_label) -> [{"labels": [...], "scores": [...]}]"""
+        self.model_fn = model_fn
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self.queue = asyncio.Queue()
+        # Модель вызывается в одном отдельном потоке: event loop продолжает принимать запросы
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = 0
+        self.texts_done = 0
+        self.batch_sizes = Counter()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.started = time.time()
+
+    async def submit(self, text, labels, multi_label=False):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, tuple(labels), multi_label, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        """Первый запрос + всё, что успело прийти за окно, не больше max_batch."""
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Модель принимает один набор меток на вызов — группируем
+            groups = {}
+            for item in batch:
+                groups.setdefault((item[1], item[2]), []).append(item)
+            for (labels, multi_label), items in groups.items():
+                texts = [item[0] for item in items]
+                try:
+                    results = await loop.run_in_executor(self.executor, self.model_fn, texts, list(labels), multi_label)
+                    if len(results) != len(items):
+                        raise RuntimeError(f"Модель вернула {len(results)} результатов на {len(items)} текстов")
+                except Exception as e:
+                    results = [e] * len(items)
+                # Клиент мог отключиться и отменить свой future — такие пропускаем, батчер живёт дальше
+                for item, result in zip(items, results):
+                    if item[3].done():
+                        continue
+                    if isinstance(result, Exception):
+                        item[3].set_exception(result)
+                    else:
+                        item[3].set_result(result)
+                self.batches += 1
+                self.texts_done += len(items)
+                self.batch_sizes[len(items)] += 1
+                now = time.perf_counter()
+                self.latencies.extend(now - item[4] for item in items)
+
+    def metrics(self) -> dict:
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            "queue_depth": self.queue.qsize(),
+            "batches": self.batches,
+            "texts": self.texts_done,
+            "avg_batch_size": round(self.texts_done / self.batches, 2) if self.batches else 0.0,
+            "batch_size_histogram": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+            "latency_ms_p50": round(float(np.percentile(latencies, 50)), 1),
+            "latency_ms_p95": round(float(np.percentile(latencies, 95)), 1),
+            "uptime_s": round(time.time() - self.started),
+        }
+
+
+def make_app(worker: InferenceWorker) -> web.Application:
+    async def classify(request):
+        body = await request.json()
+        texts, labels = body.get("texts") or [], body.get("labels") or []
+        if not labels:
+            return web.json_response({"error": "labels пустой"}, status=400)
+        results = await asyncio.gather(*(
+            worker.submit(str(text), labels, bool(body.get("multi_label"))) for text in texts
+        ))
+        return web.json_response({"results": results})
+
+    async def metrics(request):
+        return web.json_response(worker.metrics())
+
+    async def health(request):
+        return web.json_response({"status": "ok", "model": MODEL_NAME})
+
+    async def start_batcher(app):
+        app["batcher"] = asyncio.create_task(worker.run())
+
+    async def stop_batcher(app):
+        app["batcher"].cancel()
+
+    app = web.Application(client_max_size=32 * 1024 ** 2)
+    app.router.add_post("/classify", classify)
+    app.router.add_get("/metrics", metrics)
+    app.router.add_get("/health", health)
+    app.on_startup.append(start_batcher)
+    app.on_cleanup.append(stop_batcher)
+    return app
+
+
+def load_zero_shot(device=-1):
+    from transformers import pipeline
+    classifier = pipeline("zero-shot-classification", model=MODEL_NAME, device=device, torch_dtype="auto")
+
+    def model_fn(texts, labels, multi_label):
+        results = classifier(texts, candidate_labels=labels, multi_label=multi_label, batch_size=len(texts))
+        results = [results] if isinstance(results, dict) else results
+        return [{"labels": r["labels"], "scores": [float(s) for s in r["scores"]]} for r in results]
+
+    return model_fn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный воркер zero-shot классификации")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--device", type=int, default=-1, help="GPU (0) или CPU (-1)")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--window-ms", type=int, default=BATCH_WINDOW_MS)
+    args = parser.parse_args()
+
+    worker = InferenceWorker(load_zero_shot(args.device), args.max_batch, args.window_ms)
+    web.run_app(make_app(worker), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
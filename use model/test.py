@@ -1,13 +1,14 @@
 import csv
-from transformers import pipeline
+import os
+import sys
 
-# GPU + float16
-classifier = pipeline(
-    "zero-shot-classification",
-    model="facebook/bart-large-mnli",
-    device=0,
-    torch_dtype="auto"
-)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "filter city", "Chart")))
+from main_page.inference_client import WORKER_COMMAND, InferenceClient
+
+# Модель (GPU + float16) держит воркер: python inference_worker.py --device 0
+client = InferenceClient()
+if not client.available():
+    sys.exit(f"Воркер инференса не запущен ({client.url}). Запустите: {WORKER_COMMAND}")
 
 CATEGORIES = ["backend", "frontend", "mobile", "data-science", "devops", "qa", "project management"]
 
@@ -24,12 +25,8 @@ with open(input_file, encoding="utf-8") as f:
 for i in range(0, len(rows), batch_size):
     batch = rows[i:i+batch_size]
     texts = [f"{r['name']} {r.get('description','')}" for r in batch]
-    results = classifier(texts, candidate_labels=CATEGORIES)
-    
-    # если batch_size=1, возвращается dict, иначе list
-    if isinstance(results, dict):
-        results = [results]
-        
+    results = client.classify(texts, CATEGORIES)
+
     for r, res in zip(batch, results):
         r["category"] = res["labels"][0]
         r["score"] = res["scores"][0]
@@ -41,3 +38,4 @@ with open(output_file, mode="w", newline="", encoding="utf-8") as f:
     writer.writerows(rows)
 
 print(f"Классификация завершена. Результат сохранён в {output_file}")
+print(f"Воркер: {client.metrics()}")